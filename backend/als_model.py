@@ -0,0 +1,378 @@
+import os
+import threading
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from scipy import sparse
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from interaction_store import InteractionStore, interaction_store
+from model_artifacts import MODEL_DIR, load_artifact, publish
+
+load_dotenv()
+
+ALS_FACTORS = int(os.getenv("ALS_FACTORS", "64"))
+ALS_ITERATIONS = int(os.getenv("ALS_ITERATIONS", "15"))
+ALS_REGULARIZATION = float(os.getenv("ALS_REGULARIZATION", "0.1"))
+ALS_ALPHA = float(os.getenv("ALS_ALPHA", "10"))
+ALS_CG_STEPS = int(os.getenv("ALS_CG_STEPS", "3"))
+ALS_THREADS = int(os.getenv("ALS_THREADS", "0"))  # 0 = one per CPU
+# Reuse gathered item rows across CG steps when they fit in this budget
+ALS_GATHER_CACHE_MB = int(os.getenv("ALS_GATHER_CACHE_MB", "512"))
+ALS_REBUILD_EVERY = int(os.getenv("ALS_REBUILD_EVERY", "10000"))
+
+def _row_blocks(num_rows: int, indptr: np.ndarray, target_nnz: int = 1 << 18) -> List[Tuple[int, int]]:
+    """Split rows into contiguous blocks of roughly `target_nnz` stored entries"""
+    blocks, start = [], 0
+    while start < num_rows:
+        stop = int(np.searchsorted(indptr, indptr[start] + target_nnz, side="right"))
+        stop = min(max(stop - 1, start + 1), num_rows)
+        blocks.append((start, stop))
+        start = stop
+    return blocks
+
+def _least_squares_cg(
+    confidence: sparse.csr_matrix,
+    X: np.ndarray,
+    Y: np.ndarray,
+    regularization: float,
+    steps: int,
+    pool: ThreadPoolExecutor
+):
+    """One ALS half-step: update every row of X in place with Y fixed.
+
+    For each row u this approximately solves the implicit-feedback normal
+    equations (Y^T C_u Y + reg I) x_u = Y^T C_u p_u with a few conjugate
+    gradient steps, warm-started from the current x_u. `confidence` holds
+    c_ui - 1 (= alpha * weight) at the observed entries. All rows run CG in
+    lockstep, so each step is a handful of dense BLAS products plus sparse
+    products over the observed entries, split across threads by row block.
+    """
+    factors = Y.shape[1]
+    YtY = Y.T @ Y + regularization * np.eye(factors, dtype=Y.dtype)
+    blocks = _row_blocks(X.shape[0], confidence.indptr)
+
+    # Y is fixed for the whole half-step, so its gathered rows can be reused
+    gathered: Dict[int, np.ndarray] = {}
+    cache = confidence.nnz * factors * Y.itemsize <= ALS_GATHER_CACHE_MB * (1 << 20)
+
+    def observed_product(V: np.ndarray, out: np.ndarray, weights_plus_one: bool = False):
+        """out[u] += sum_i w_ui (v_u . y_i) y_i, or sum_i (c_ui) y_i if weights_plus_one"""
+        def run(block):
+            start, stop = block
+            lo, hi = confidence.indptr[start], confidence.indptr[stop]
+            if lo == hi:
+                return
+            indptr = confidence.indptr[start:stop + 1] - lo
+            cols = confidence.indices[lo:hi]
+            data = confidence.data[lo:hi]
+            if weights_plus_one:
+                values = data + 1.0
+            else:
+                rows = np.repeat(np.arange(start, stop), np.diff(indptr))
+                Yg = gathered.get(start)
+                if Yg is None:
+                    Yg = Y[cols]
+                    if cache:
+                        gathered[start] = Yg
+                values = np.einsum("ij,ij->i", V[rows], Yg) * data
+            block_matrix = sparse.csr_matrix((values.astype(Y.dtype), cols, indptr), shape=(stop - start, Y.shape[0]))
+            out[start:stop] += block_matrix @ Y
+        list(pool.map(run, blocks))
+
+    def apply(V: np.ndarray) -> np.ndarray:
+        out = V @ YtY
+        observed_product(V, out)
+        return out
+
+    b = np.zeros_like(X)
+    observed_product(None, b, weights_plus_one=True)
+
+    R = b - apply(X)
+    P = R.copy()
+    rs = np.einsum("ij,ij->i", R, R)
+    for _ in range(steps):
+        AP = apply(P)
+        denom = np.einsum("ij,ij->i", P, AP)
+        alpha = np.divide(rs, denom, out=np.zeros_like(rs), where=denom > 0)
+        X += alpha[:, None] * P
+        R -= alpha[:, None] * AP
+        rs_new = np.einsum("ij,ij->i", R, R)
+        beta = np.divide(rs_new, rs, out=np.zeros_like(rs), where=rs > 0)
+        P = R + beta[:, None] * P
+        rs = rs_new
+
+class ALSModel:
+    """Implicit-feedback matrix factorization (ALS) over the interaction matrix.
+
+    Trains user and item factor arrays from the shared `InteractionStore`
+    with confidence 1 + alpha * weight (Hu, Koren & Volinsky). Scoring a
+    user is one dot product per item. Users whose history changed since
+    training, or who are new, are folded in with one small least-squares
+    solve against the item factors. Factors are published under MODEL_DIR
+    and memory-mapped on load. Exposes the same scoring interface as
+    `ItemNeighborIndex`, so the recommender can use either.
+    """
+
+    artifact_name = "als"
+
+    def __init__(
+        self,
+        factors: int = ALS_FACTORS,
+        iterations: int = ALS_ITERATIONS,
+        regularization: float = ALS_REGULARIZATION,
+        alpha: float = ALS_ALPHA,
+        cg_steps: int = ALS_CG_STEPS,
+        threads: int = ALS_THREADS,
+        model_dir: str = MODEL_DIR,
+        seed: int = 42
+    ):
+        self.factors = factors
+        self.iterations = iterations
+        self.regularization = regularization
+        self.alpha = alpha
+        self.cg_steps = cg_steps
+        self.threads = threads or os.cpu_count() or 1
+        self.model_dir = model_dir
+        self.seed = seed
+        self.user_factors: Optional[np.ndarray] = None
+        self.item_factors: Optional[np.ndarray] = None
+        self.user_index: Dict[int, int] = {}
+        self.product_ids: List[int] = []
+        self.product_index: Dict[int, int] = {}
+        self.built_version = -1
+        self.trained_max_id = -1
+        self._trained_store: Optional[InteractionStore] = None
+        # Published version currently (or last) loaded, see model_artifacts
+        self.artifact_version: Optional[int] = None
+        self._gram: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+        self._rebuild_thread: Optional[threading.Thread] = None
+
+    @property
+    def built(self) -> bool:
+        return self.item_factors is not None
+
+    def fit(self, matrix: sparse.csr_matrix) -> Tuple[np.ndarray, np.ndarray]:
+        """Train on a user x item weight matrix; returns (user factors, item factors)"""
+        matrix = sparse.csr_matrix(matrix, dtype=np.float32)
+        confidence = matrix.copy()
+        confidence.data *= self.alpha
+        confidence_t = confidence.T.tocsr()
+
+        rng = np.random.default_rng(self.seed)
+        user_factors = (rng.standard_normal((matrix.shape[0], self.factors)) * 0.01).astype(np.float32)
+        item_factors = (rng.standard_normal((matrix.shape[1], self.factors)) * 0.01).astype(np.float32)
+
+        with ThreadPoolExecutor(max_workers=self.threads) as pool:
+            for _ in range(self.iterations):
+                _least_squares_cg(confidence, user_factors, item_factors, self.regularization, self.cg_steps, pool)
+                _least_squares_cg(confidence_t, item_factors, user_factors, self.regularization, self.cg_steps, pool)
+        return user_factors, item_factors
+
+    def build(self, store: InteractionStore):
+        """Retrain from the current interaction matrix"""
+        version, max_id = store.version, store.max_id
+        matrix = store.matrix
+        user_ids = list(store.user_ids[:matrix.shape[0]])
+        product_ids = list(store.product_ids[:matrix.shape[1]])
+
+        user_factors, item_factors = self.fit(matrix)
+        self._swap(user_factors, item_factors, user_ids, product_ids, version, max_id, store)
+
+    def _swap(self, user_factors, item_factors, user_ids, product_ids, version, max_id, trained_store=None):
+        gram = (item_factors.T @ item_factors).astype(np.float64)
+        with self._lock:
+            self.user_factors = user_factors
+            self.item_factors = item_factors
+            self.user_index = {uid: idx for idx, uid in enumerate(user_ids)}
+            self.product_ids = product_ids
+            self.product_index = {pid: idx for idx, pid in enumerate(product_ids)}
+            self.built_version = version
+            # Interactions up to max_id were trained on, in whichever process
+            # trained; trained_store is the store itself when it was this one
+            self.trained_max_id = max_id
+            self._trained_store = trained_store
+            self._gram = gram
+
+    def ensure_built(self, store: InteractionStore):
+        if not self.built:
+            self.build(store)
+
+    def save(self) -> int:
+        """Publish the factors and id maps so API workers can map them"""
+        with self._lock:
+            user_factors, item_factors = self.user_factors, self.item_factors
+            user_ids = sorted(self.user_index, key=self.user_index.get)
+            product_ids, version, max_id = self.product_ids, self.built_version, self.trained_max_id
+        self.artifact_version = publish(
+            self.artifact_name,
+            {
+                "user_factors": user_factors,
+                "item_factors": item_factors,
+                "user_ids": np.array(user_ids, dtype=np.int64),
+                "product_ids": np.array(product_ids, dtype=np.int64)
+            },
+            {
+                "built_version": version,
+                "max_id": max_id,
+                "factors": self.factors,
+                "regularization": self.regularization,
+                "alpha": self.alpha
+            },
+            self.model_dir
+        )
+        return self.artifact_version
+
+    def load(self, newer_only: bool = False) -> bool:
+        """Memory-map the published factors; returns False if none were swapped in.
+
+        With `newer_only`, factors trained in this process on more
+        interactions than the published ones are kept.
+        """
+        artifact = load_artifact(self.artifact_name, self.model_dir)
+        if artifact is None:
+            return False
+        if newer_only and artifact.meta["built_version"] < self.built_version:
+            self.artifact_version = artifact.version
+            return False
+
+        self._swap(
+            artifact["user_factors"],
+            artifact["item_factors"],
+            artifact["user_ids"].tolist(),
+            artifact["product_ids"].tolist(),
+            artifact.meta["built_version"],
+            # Unknown for older artifacts: every user with history is folded in
+            artifact.meta.get("max_id", -1)
+        )
+        self.artifact_version = artifact.version
+        return True
+
+    def refresh(self) -> bool:
+        return self.load(newer_only=True)
+
+    def is_stale(self, store: InteractionStore, rebuild_every: int = ALS_REBUILD_EVERY) -> bool:
+        return store.version - self.built_version >= rebuild_every
+
+    def rebuild_in_background(self, store: InteractionStore):
+        """Start a retraining thread unless one is already running"""
+        with self._lock:
+            if self._rebuild_thread is not None and self._rebuild_thread.is_alive():
+                return
+            self._rebuild_thread = threading.Thread(target=self.build, args=(store,), daemon=True)
+            self._rebuild_thread.start()
+
+    def _history(self, store: InteractionStore, user_id: int, product_index: Dict[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+        """The user's interacted item columns (model space) and weights"""
+        user_row = store.user_row(user_id)
+        columns, weights = [], []
+        if user_row is not None:
+            for col, weight in zip(user_row.indices, user_row.data):
+                idx = product_index.get(store.product_ids[col])
+                if idx is not None:
+                    columns.append(idx)
+                    weights.append(weight)
+        return np.array(columns, dtype=np.int64), np.array(weights, dtype=np.float64)
+
+    def _fold_in(self, item_factors: np.ndarray, gram: np.ndarray, columns: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """Exact user solve with items fixed: O(history * f^2 + f^3)"""
+        Yu = np.asarray(item_factors[columns], dtype=np.float64)
+        confidence = 1.0 + self.alpha * weights
+        A = gram + (Yu.T * (confidence - 1.0)) @ Yu + self.regularization * np.eye(self.factors)
+        b = Yu.T @ confidence
+        return np.linalg.solve(A, b)
+
+    def _trained_on_history(self, store: InteractionStore, user_id: int, version: int, max_id: int, trained_store) -> bool:
+        """Whether training saw every interaction of the user that `store` holds"""
+        # Loaded history is compared by interaction id, which every process shares
+        if store.user_last_id(user_id) > max_id:
+            return False
+        # Events recorded since the load carry only this store's versions
+        user_version = store.user_version(user_id)
+        return user_version == 0 or (trained_store is store and user_version <= version)
+
+    def _user_vector(self, store, user_id, user_factors, user_index, item_factors, gram, product_index, version, max_id, trained_store):
+        columns, weights = self._history(store, user_id, product_index)
+        if len(columns) == 0:
+            return None, columns
+        idx = user_index.get(user_id)
+        if idx is not None and self._trained_on_history(store, user_id, version, max_id, trained_store):
+            # History unchanged since training: use the stored factors
+            return np.asarray(user_factors[idx], dtype=np.float32), columns
+        return self._fold_in(item_factors, gram, columns, weights).astype(np.float32), columns
+
+    def _snapshot(self):
+        with self._lock:
+            return (
+                self.user_factors, self.user_index, self.item_factors, self._gram, self.product_ids,
+                self.product_index, self.built_version, self.trained_max_id, self._trained_store
+            )
+
+    def score(self, store: InteractionStore, user_id: int) -> Tuple[np.ndarray, np.ndarray, List[int]]:
+        """Score every modeled product for a user.
+
+        Returns (scores, interacted column indices, product ids) in model space.
+        """
+        user_factors, user_index, item_factors, gram, product_ids, product_index, version, max_id, trained_store = self._snapshot()
+        if item_factors is None:
+            return np.array([]), np.array([], dtype=np.int64), []
+
+        vector, interacted = self._user_vector(
+            store, user_id, user_factors, user_index, item_factors, gram, product_index, version, max_id, trained_store
+        )
+        if vector is None:
+            return np.array([]), interacted, product_ids
+        return np.asarray(item_factors @ vector).ravel(), interacted, product_ids
+
+    def score_batch(self, store: InteractionStore, user_ids: List[int]) -> Tuple[np.ndarray, sparse.csr_matrix, List[int]]:
+        """Score a block of users with one factor matrix product.
+
+        Returns (B x P scores, B x P interaction indicator, product ids) in
+        model space; users without history get all-zero rows.
+        """
+        user_factors, user_index, item_factors, gram, product_ids, product_index, version, max_id, trained_store = self._snapshot()
+        num_products = len(product_ids)
+        vectors = np.zeros((len(user_ids), self.factors), dtype=np.float32)
+        rows, cols = [], []
+
+        if item_factors is not None:
+            for row, user_id in enumerate(user_ids):
+                vector, interacted = self._user_vector(
+                    store, user_id, user_factors, user_index, item_factors, gram, product_index, version, max_id, trained_store
+                )
+                if vector is not None:
+                    vectors[row] = vector
+                    rows.extend([row] * len(interacted))
+                    cols.extend(interacted.tolist())
+
+        interacted_rows = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(len(user_ids), num_products)
+        )
+        if item_factors is None:
+            return np.zeros((len(user_ids), 0), dtype=np.float32), interacted_rows, product_ids
+
+        scores = vectors @ np.asarray(item_factors).T
+        return scores, interacted_rows, product_ids
+
+# Shared by every request handled by this process
+als_model = ALSModel()
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        interaction_store.load(db)
+        als_model.build(interaction_store)
+        version = als_model.save()
+        elapsed = time.perf_counter() - start
+    finally:
+        db.close()
+
+    print(
+        f"Trained ALS model: {len(als_model.user_index)} users x {len(als_model.product_ids)} products, "
+        f"{als_model.factors} factors, {als_model.iterations} iterations in {elapsed:.2f}s, published v{version}"
+    )
@@ -0,0 +1,177 @@
+import os
+import numpy as np
+from typing import Optional, Tuple
+from dotenv import load_dotenv
+from ranking import top_k
+
+try:
+    import hnswlib
+except ImportError:  # optional backend
+    hnswlib = None
+
+load_dotenv()
+
+ANN_BACKEND = os.getenv("ANN_BACKEND", "exact")
+ANN_NLIST = int(os.getenv("ANN_NLIST", "0"))  # 0 = sqrt(catalog size)
+ANN_NPROBE = int(os.getenv("ANN_NPROBE", "8"))
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+class ExactIndex:
+    """Brute-force inner-product search over L2-normalized vectors"""
+
+    def __init__(self):
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def build(self, vectors: np.ndarray):
+        self.vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+
+    def add(self, vector: np.ndarray):
+        vector = _normalize(np.asarray(vector, dtype=np.float32).reshape(1, -1))
+        self.vectors = np.vstack([self.vectors, vector]) if len(self.vectors) else vector
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (row indices, cosine scores) of the k best matches"""
+        scores = self.vectors @ _normalize(np.asarray(query, dtype=np.float32).ravel())
+        top = top_k(scores, k)
+        return top, scores[top]
+
+class IVFIndex:
+    """Inverted-file index: spherical k-means cells, probe the nearest few.
+
+    Vectors are clustered into `nlist` cells at build time; a query only
+    scores the members of its `nprobe` closest cells. Rows added after the
+    build are kept in an overflow list that is always scanned.
+    """
+
+    def __init__(self, nlist: int = ANN_NLIST, nprobe: int = ANN_NPROBE, train_size: int = 100000, iterations: int = 10, seed: int = 42):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_size = train_size
+        self.iterations = iterations
+        self.seed = seed
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.centroids = np.zeros((0, 0), dtype=np.float32)
+        self.order = np.array([], dtype=np.int64)
+        self.offsets = np.array([0], dtype=np.int64)
+        self.overflow = []
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def _assign(self, vectors: np.ndarray, chunk_size: int = 65536) -> np.ndarray:
+        assignments = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), chunk_size):
+            chunk = vectors[start:start + chunk_size]
+            assignments[start:start + chunk_size] = np.argmax(chunk @ self.centroids.T, axis=1)
+        return assignments
+
+    def build(self, vectors: np.ndarray):
+        self.vectors = _normalize(np.asarray(vectors, dtype=np.float32))
+        self.overflow = []
+        num_vectors = len(self.vectors)
+        if num_vectors == 0:
+            return
+
+        nlist = self.nlist or int(np.sqrt(num_vectors))
+        nlist = max(1, min(nlist, num_vectors))
+
+        # Train centroids on a sample
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(self.train_size, num_vectors)
+        sample = self.vectors[rng.choice(num_vectors, size=sample_size, replace=False)]
+        self.centroids = sample[rng.choice(sample_size, size=nlist, replace=False)].copy()
+
+        for _ in range(self.iterations):
+            assignments = np.argmax(sample @ self.centroids.T, axis=1)
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, assignments, sample)
+            empty = np.bincount(assignments, minlength=nlist) == 0
+            # Re-seed empty cells from random sample points
+            sums[empty] = sample[rng.choice(sample_size, size=int(empty.sum()))]
+            self.centroids = _normalize(sums)
+
+        # Inverted lists stored CSR-style: members of cell c are order[offsets[c]:offsets[c + 1]]
+        assignments = self._assign(self.vectors)
+        self.order = np.argsort(assignments, kind="stable")
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(assignments, minlength=nlist))])
+
+    def add(self, vector: np.ndarray):
+        vector = _normalize(np.asarray(vector, dtype=np.float32).reshape(1, -1))
+        self.overflow.append(len(self.vectors))
+        self.vectors = np.vstack([self.vectors, vector]) if len(self.vectors) else vector
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return (row indices, approximate top-k cosine scores)"""
+        query = _normalize(np.asarray(query, dtype=np.float32).ravel())
+        if len(self.centroids) == 0:
+            candidates = np.array(self.overflow, dtype=np.int64)
+        else:
+            nprobe = min(self.nprobe, len(self.centroids))
+            cells = np.argpartition(self.centroids @ query, -nprobe)[-nprobe:]
+            candidates = np.concatenate(
+                [self.order[self.offsets[c]:self.offsets[c + 1]] for c in cells]
+                + [np.array(self.overflow, dtype=np.int64)]
+            )
+
+        if len(candidates) == 0:
+            return candidates, np.array([], dtype=np.float32)
+
+        scores = self.vectors[candidates] @ query
+        top = top_k(scores, k)
+        return candidates[top], scores[top]
+
+class HNSWIndex:
+    """Graph index backed by the optional `hnswlib` package"""
+
+    def __init__(self, m: int = 16, ef_construction: int = 200, ef_search: int = 64):
+        if hnswlib is None:
+            raise ImportError("hnswlib is not installed; pip install hnswlib or use ANN_BACKEND=ivf")
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.index = None
+        self.count = 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def build(self, vectors: np.ndarray):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self.index = hnswlib.Index(space="cosine", dim=vectors.shape[1])
+        self.index.init_index(max_elements=max(len(vectors), 1), ef_construction=self.ef_construction, M=self.m)
+        if len(vectors):
+            self.index.add_items(vectors, np.arange(len(vectors)))
+        self.index.set_ef(self.ef_search)
+        self.count = len(vectors)
+
+    def add(self, vector: np.ndarray):
+        if self.count >= self.index.get_max_elements():
+            self.index.resize_index(self.count * 2)
+        self.index.add_items(np.asarray(vector, dtype=np.float32).reshape(1, -1), [self.count])
+        self.count += 1
+
+    def search(self, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        k = min(k, self.count)
+        if k == 0:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+        self.index.set_ef(max(self.ef_search, k))
+        labels, distances = self.index.knn_query(np.asarray(query, dtype=np.float32).reshape(1, -1), k=k)
+        return labels[0].astype(np.int64), 1.0 - distances[0]
+
+def create_index(backend: Optional[str] = None):
+    """Build an empty index for the configured backend (exact, ivf or hnsw)"""
+    backend = (backend or ANN_BACKEND).lower()
+    if backend == "ivf":
+        return IVFIndex()
+    if backend == "hnsw":
+        return HNSWIndex()
+    if backend == "exact":
+        return ExactIndex()
+    raise ValueError(f"Unknown ANN backend: {backend}")
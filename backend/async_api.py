@@ -0,0 +1,224 @@
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.routing import APIRoute
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+import models
+import schemas
+from database import SessionLocal, async_engine, get_async_db
+from pagination import keyset_page, set_next_cursor
+from response_cache import cached_recommendations
+from recommender import (
+    ProductRecommender,
+    fresh_precomputed,
+    model_version,
+    record_interaction,
+    record_product,
+    summarize_behavior
+)
+
+# Async-engine versions of the CRUD and recommendation endpoints in main.py
+router = APIRouter()
+
+# Product endpoints
+@router.get("/products", response_model=List[schemas.Product])
+async def get_products(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    result = await db.execute(keyset_page(select(models.Product), models.Product.id, after_id, skip, limit))
+    products = result.scalars().all()
+    set_next_cursor(response, products, limit)
+    return products
+
+@router.get("/products/{product_id}", response_model=schemas.Product)
+async def get_product(product_id: int, db: AsyncSession = Depends(get_async_db)):
+    product = await db.get(models.Product, product_id)
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return product
+
+@router.post("/products", response_model=schemas.Product)
+async def create_product(product: schemas.ProductCreate, db: AsyncSession = Depends(get_async_db)):
+    db_product = models.Product(**product.dict())
+    db.add(db_product)
+    await db.commit()
+    await db.refresh(db_product)
+
+    # Appending to the content matrix copies it, so run it off the event loop
+    await run_in_threadpool(record_product, db_product)
+    return db_product
+
+# User endpoints
+@router.get("/users", response_model=List[schemas.User])
+async def get_users(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    result = await db.execute(keyset_page(select(models.User), models.User.id, after_id, skip, limit))
+    users = result.scalars().all()
+    set_next_cursor(response, users, limit)
+    return users
+
+@router.get("/users/{user_id}", response_model=schemas.User)
+async def get_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    user = await db.get(models.User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
+@router.post("/users", response_model=schemas.User)
+async def create_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    db_user = models.User(**user.dict())
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+# Interaction endpoints
+@router.get("/interactions", response_model=List[schemas.UserInteraction])
+async def get_interactions(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    result = await db.execute(keyset_page(select(models.UserInteraction), models.UserInteraction.id, after_id, skip, limit))
+    interactions = result.scalars().all()
+    set_next_cursor(response, interactions, limit)
+    return interactions
+
+@router.post("/interactions", response_model=schemas.UserInteraction)
+async def create_interaction(interaction: schemas.UserInteractionCreate, db: AsyncSession = Depends(get_async_db)):
+    db_interaction = models.UserInteraction(**interaction.dict())
+    db.add(db_interaction)
+    await db.commit()
+    await db.refresh(db_interaction)
+
+    # Takes the model locks and may compact the store, so run it off the event loop
+    await run_in_threadpool(record_interaction, db_interaction)
+    return db_interaction
+
+@router.get("/interactions/user/{user_id}", response_model=List[schemas.UserInteraction])
+async def get_user_interactions(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    result = await db.execute(
+        select(models.UserInteraction).filter(models.UserInteraction.user_id == user_id)
+    )
+    return result.scalars().all()
+
+# Recommendation endpoints
+def _hybrid_recommendations(user_id: int, num_recommendations: int):
+    """Scoring uses the in-memory models; the sync session is only touched on cold start"""
+    db = SessionLocal()
+    try:
+        return ProductRecommender(db).hybrid_recommendations(user_id, num_recommendations)
+    finally:
+        db.close()
+
+async def score_recommendations(user_id: int, num_recommendations: int, db: AsyncSession):
+    """Async counterpart of main.score_recommendations"""
+    # Check if user exists
+    user = await db.get(models.User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    # Load the user's interactions once for the whole request
+    result = await db.execute(
+        select(models.UserInteraction).filter(models.UserInteraction.user_id == user_id)
+    )
+    interactions = result.scalars().all()
+
+    # Get recommendations, preferring the offline precomputed set when fresh
+    result = await db.execute(
+        select(models.PrecomputedRecommendation)
+        .filter(models.PrecomputedRecommendation.user_id == user_id)
+        .order_by(models.PrecomputedRecommendation.rank)
+        .limit(num_recommendations)
+    )
+    latest_interaction = max((i.timestamp for i in interactions), default=None)
+    recommendations = fresh_precomputed(result.scalars().all(), num_recommendations, latest_interaction)
+    if recommendations is None:
+        recommendations = await run_in_threadpool(_hybrid_recommendations, user_id, num_recommendations)
+
+    # One IN query for both the recommended products and the behavior summary
+    recent = sorted(interactions, key=lambda x: x.timestamp, reverse=True)[:5]
+    product_ids = {product_id for product_id, _, _ in recommendations} | {i.product_id for i in recent}
+    product_map = {}
+    if product_ids:
+        result = await db.execute(select(models.Product).filter(models.Product.id.in_(product_ids)))
+        product_map = {p.id: p for p in result.scalars().all()}
+
+    # Get user behavior for LLM context
+    user_behavior = summarize_behavior(interactions, product_map)
+
+    scored = [
+        (product_map[product_id], score, reason)
+        for product_id, score, reason in recommendations
+        if product_id in product_map
+    ]
+
+    return scored, user_behavior
+
+@router.get("/recommendations/{user_id}", response_model=List[schemas.RecommendationResponse])
+async def get_recommendations(
+    request: Request,
+    user_id: int,
+    num_recommendations: int = Query(5, ge=1),
+    db: AsyncSession = Depends(get_async_db)
+):
+    async def compute():
+        scored, user_behavior = await score_recommendations(user_id, num_recommendations, db)
+
+        # Generate all LLM explanations for the response at once
+        explanations = await request.app.state.llm_service.explain_all(
+            [(product, reason) for product, _, reason in scored],
+            user_behavior
+        )
+
+        return [
+            schemas.RecommendationResponse(
+                product=product,
+                score=float(score),
+                explanation=explanation
+            )
+            for (product, score, _), explanation in zip(scored, explanations)
+        ]
+
+    return await cached_recommendations(user_id, num_recommendations, model_version, compute)
+
+@router.post("/recommendations/request", response_model=List[schemas.RecommendationResponse])
+async def request_recommendations(
+    request: Request,
+    body: schemas.RecommendationRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await get_recommendations(request, body.user_id, body.num_recommendations, db)
+
+def replace_routes(app: FastAPI):
+    """Swap the sync routes of `app` for the async ones defined here"""
+    replaced = {
+        (route.path, method)
+        for route in router.routes
+        for method in route.methods
+    }
+    app.router.routes[:] = [
+        route for route in app.router.routes
+        if not (
+            isinstance(route, APIRoute)
+            and any((route.path, method) in replaced for method in route.methods)
+        )
+    ]
+    app.include_router(router)
+
+    # aiosqlite connections run in their own threads; close them on shutdown
+    @app.on_event("shutdown")
+    async def dispose_async_engine():
+        await async_engine.dispose()
@@ -0,0 +1,81 @@
+"""ALS training time by thread count, and request latency and hit rate vs. the item neighbor index.
+
+Hit rate holds out one interaction per sampled user, trains on the rest and
+checks whether the held-out product is in that user's top-k.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_als --users 20000 --products 5000 --threads 1 2 4
+"""
+import argparse
+import time
+import numpy as np
+from als_model import ALSModel
+from interaction_store import InteractionStore
+from neighbor_index import ItemNeighborIndex
+from ranking import top_k
+from benchmarks.synthetic import random_interaction_matrix
+
+def hold_out(matrix, user_indices, rng):
+    """Zero one stored entry per sampled user; returns (train matrix, held-out columns)"""
+    train = matrix.tolil(copy=True)
+    held_out = []
+    for user_idx in user_indices:
+        cols = matrix[user_idx].indices
+        col = int(rng.choice(cols))
+        train[user_idx, col] = 0
+        held_out.append(col)
+    train = train.tocsr()
+    train.eliminate_zeros()
+    return train, held_out
+
+def evaluate(model, store, user_indices, held_out, k):
+    latencies, hits = [], 0
+    for user_idx, col in zip(user_indices, held_out):
+        start = time.perf_counter()
+        scores, interacted, product_ids = model.score(store, store.user_ids[user_idx])
+        latencies.append(time.perf_counter() - start)
+        if len(scores) == 0:
+            continue
+        top = {product_ids[idx] for idx in top_k(scores, k, exclude=interacted)}
+        hits += store.product_ids[col] in top
+    latencies = np.array(latencies) * 1000
+    return np.percentile(latencies, 50), np.percentile(latencies, 95), hits / len(user_indices)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--products", type=int, default=5_000)
+    parser.add_argument("--avg-interactions", type=int, default=20)
+    parser.add_argument("--factors", type=int, default=64)
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    matrix = random_interaction_matrix(args.users, args.products, args.avg_interactions)
+    user_indices = rng.choice(args.users, size=args.requests, replace=False)
+    train, held_out = hold_out(matrix, user_indices, rng)
+    store = InteractionStore.from_matrix(train)
+    print(f"matrix: {args.users} users x {args.products} products, nnz={train.nnz}, {args.factors} factors")
+
+    for threads in args.threads:
+        als = ALSModel(factors=args.factors, iterations=args.iterations, threads=threads)
+        start = time.perf_counter()
+        als.build(store)
+        elapsed = time.perf_counter() - start
+        print(f"ALS {threads} thread(s): {elapsed:.2f}s total, {elapsed / args.iterations * 1000:.0f} ms/iteration")
+
+    index = ItemNeighborIndex()
+    start = time.perf_counter()
+    index.build(store)
+    print(f"neighbor index build: {time.perf_counter() - start:.2f}s")
+
+    print(f"{'model':>16} {'p50 (ms)':>10} {'p95 (ms)':>10} {'hit@' + str(args.k):>8}")
+    for name, model in (("neighbor index", index), ("als", als)):
+        p50, p95, hit_rate = evaluate(model, store, user_indices, held_out, args.k)
+        print(f"{name:>16} {p50:>10.3f} {p95:>10.3f} {hit_rate:>8.3f}")
+
+if __name__ == "__main__":
+    main()
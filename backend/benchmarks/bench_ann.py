@@ -0,0 +1,85 @@
+"""Recall vs. latency of the ANN backends against exact content search.
+
+Builds TF-IDF vectors for a synthetic catalog generated from the
+seed_data.py templates, then compares each backend's top-k with the exact
+top-k for random user profiles.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_ann --products 1000000
+"""
+import argparse
+import time
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from ann_index import ExactIndex, IVFIndex, HNSWIndex, hnswlib
+from content_model import product_text
+from benchmarks.synthetic import iter_synthetic_products
+
+def run_queries(index, queries, k):
+    results, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        indices, _ = index.search(query, k)
+        latencies.append(time.perf_counter() - start)
+        results.append(indices)
+    return results, np.array(latencies) * 1000
+
+def recall(results, truth):
+    hits = sum(len(set(r.tolist()) & set(t.tolist())) for r, t in zip(results, truth))
+    return hits / sum(len(t) for t in truth)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    texts = [
+        product_text(p["name"], p["description"], p["category"], p["tags"])
+        for p in iter_synthetic_products(args.products)
+    ]
+    vectors = TfidfVectorizer(max_features=100, stop_words='english').fit_transform(texts).astype(np.float32).toarray()
+    del texts
+    print(f"Vectorized {args.products} products in {time.perf_counter() - start:.1f}s")
+
+    # User profiles are means of a few random products, as in content_based_filtering
+    rng = np.random.default_rng(0)
+    queries = [vectors[rng.integers(0, len(vectors), size=5)].mean(axis=0) for _ in range(args.queries)]
+
+    exact = ExactIndex()
+    exact.build(vectors)
+    truth, exact_latency = run_queries(exact, queries, args.k)
+
+    print(f"{'backend':<20} {'build (s)':>10} {'recall@' + str(args.k):>10} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+    print(f"{'exact':<20} {'-':>10} {1.0:>10.3f} {np.percentile(exact_latency, 50):>10.2f} {np.percentile(exact_latency, 95):>10.2f}")
+
+    ivf = IVFIndex()
+    start = time.perf_counter()
+    ivf.build(vectors)
+    build_time = time.perf_counter() - start
+    for nprobe in args.nprobe:
+        ivf.nprobe = nprobe
+        results, latency = run_queries(ivf, queries, args.k)
+        print(
+            f"{'ivf nprobe=' + str(nprobe):<20} {build_time:>10.1f} {recall(results, truth):>10.3f} "
+            f"{np.percentile(latency, 50):>10.2f} {np.percentile(latency, 95):>10.2f}"
+        )
+
+    if hnswlib is not None:
+        hnsw = HNSWIndex()
+        start = time.perf_counter()
+        hnsw.build(vectors)
+        build_time = time.perf_counter() - start
+        results, latency = run_queries(hnsw, queries, args.k)
+        print(
+            f"{'hnsw':<20} {build_time:>10.1f} {recall(results, truth):>10.3f} "
+            f"{np.percentile(latency, 50):>10.2f} {np.percentile(latency, 95):>10.2f}"
+        )
+    else:
+        print("hnsw                 skipped (pip install hnswlib)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Worker startup time and memory: copying .npz artifacts vs. memory-mapped versions.
+
+Publishes synthetic ALS factors and a neighbor index, then starts several
+worker processes that each load them and touch every page (as scoring
+would). Reports load time and each worker's private vs. shared resident
+memory from /proc/self/smaps_rollup (Linux).
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_artifacts --users 500000 --products 50000 --workers 4
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+import numpy as np
+from scipy import sparse
+from als_model import ALSModel
+from neighbor_index import ItemNeighborIndex
+from model_artifacts import load_artifact, publish
+
+def memory_kb():
+    """(private, shared) resident kB of this process"""
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    private = fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)
+    shared = fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)
+    return private, shared
+
+def load_copy(model_dir):
+    """Previous format: one .npz per model, read fully into each process"""
+    with np.load(os.path.join(model_dir, "item_neighbors.npz")) as saved:
+        similarity = sparse.csr_matrix((saved["data"], saved["indices"], saved["indptr"]), shape=tuple(saved["shape"]))
+    with np.load(os.path.join(model_dir, "als.npz")) as saved:
+        factors = (saved["user_factors"], saved["item_factors"])
+    return similarity, factors
+
+def load_mapped(model_dir):
+    neighbors = load_artifact(ItemNeighborIndex.artifact_name, model_dir)
+    als = load_artifact(ALSModel.artifact_name, model_dir)
+    similarity = sparse.csr_matrix((neighbors["data"], neighbors["indices"], neighbors["indptr"]), shape=tuple(neighbors.meta["shape"]))
+    return similarity, (als["user_factors"], als["item_factors"])
+
+def worker(mode, model_dir, barrier, results):
+    start = time.perf_counter()
+    similarity, (user_factors, item_factors) = (load_mapped if mode == "mmap" else load_copy)(model_dir)
+    load_time = time.perf_counter() - start
+    # Touch every page, as a long-running worker eventually does
+    checksum = float(similarity.data.sum()) + float(user_factors.sum()) + float(item_factors.sum())
+    barrier.wait()
+    private, shared = memory_kb()
+    results.put((load_time, private, shared, checksum))
+    barrier.wait()
+
+def run(mode, model_dir, workers):
+    barrier = multiprocessing.Barrier(workers)
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=worker, args=(mode, model_dir, barrier, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    stats = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=500_000)
+    parser.add_argument("--products", type=int, default=50_000)
+    parser.add_argument("--factors", type=int, default=64)
+    parser.add_argument("--neighbors", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    user_factors = rng.standard_normal((args.users, args.factors), dtype=np.float32)
+    item_factors = rng.standard_normal((args.products, args.factors), dtype=np.float32)
+    nnz = args.products * args.neighbors
+    similarity = sparse.csr_matrix(
+        (rng.random(nnz, dtype=np.float32), rng.integers(0, args.products, nnz).astype(np.int32), np.arange(0, nnz + 1, args.neighbors, dtype=np.int32)),
+        shape=(args.products, args.products)
+    )
+    size_mb = (user_factors.nbytes + item_factors.nbytes + similarity.data.nbytes + similarity.indices.nbytes) / 1e6
+
+    with tempfile.TemporaryDirectory() as model_dir:
+        np.savez(os.path.join(model_dir, "item_neighbors.npz"), data=similarity.data, indices=similarity.indices, indptr=similarity.indptr, shape=np.array(similarity.shape))
+        np.savez(os.path.join(model_dir, "als.npz"), user_factors=user_factors, item_factors=item_factors)
+        publish(ItemNeighborIndex.artifact_name, {"data": similarity.data, "indices": similarity.indices, "indptr": similarity.indptr}, {"shape": list(similarity.shape)}, model_dir)
+        publish(ALSModel.artifact_name, {"user_factors": user_factors, "item_factors": item_factors}, {}, model_dir)
+
+        print(f"artifacts: {size_mb:.0f} MB, {args.workers} workers")
+        print(f"{'mode':>6} {'load p50 (ms)':>14} {'private MB/worker':>18} {'shared MB/worker':>17}")
+        for mode in ("copy", "mmap"):
+            stats = run(mode, model_dir, args.workers)
+            load_ms = np.median([s[0] for s in stats]) * 1000
+            private = np.mean([s[1] for s in stats]) / 1024
+            shared = np.mean([s[2] for s in stats]) / 1024
+            print(f"{mode:>6} {load_ms:>14.1f} {private:>18.0f} {shared:>17.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Request latency of user-user cosine scoring vs. the item neighbor index.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_collaborative --users 10000 100000 1000000
+"""
+import argparse
+import time
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+from interaction_store import InteractionStore
+from neighbor_index import ItemNeighborIndex
+from benchmarks.synthetic import random_interaction_matrix
+
+def user_user_scores(matrix, user_idx):
+    """Previous per-request path: cosine against every user, then project"""
+    user_row = matrix[user_idx]
+    similar_users = cosine_similarity(user_row, matrix)
+    return np.asarray(similar_users @ matrix).ravel()
+
+def time_requests(fn, user_indices):
+    latencies = []
+    for user_idx in user_indices:
+        start = time.perf_counter()
+        fn(user_idx)
+        latencies.append(time.perf_counter() - start)
+    latencies = np.array(latencies) * 1000
+    return np.percentile(latencies, 50), np.percentile(latencies, 95)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--avg-interactions", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'users':>10} {'build (s)':>10} {'user-user p50/p95 (ms)':>24} {'item index p50/p95 (ms)':>24}")
+
+    for num_users in args.users:
+        matrix = random_interaction_matrix(num_users, args.products, args.avg_interactions)
+        store = InteractionStore.from_matrix(matrix)
+
+        index = ItemNeighborIndex()
+        start = time.perf_counter()
+        index.build(store)
+        build_time = time.perf_counter() - start
+
+        user_indices = rng.integers(0, num_users, size=args.requests)
+        baseline = time_requests(lambda idx: user_user_scores(matrix, idx), user_indices)
+        indexed = time_requests(lambda idx: index.score(store, store.user_ids[idx]), user_indices)
+
+        print(
+            f"{num_users:>10} {build_time:>10.2f} "
+            f"{baseline[0]:>11.2f} / {baseline[1]:<10.2f} {indexed[0]:>11.2f} / {indexed[1]:<10.2f}"
+        )
+
+if __name__ == "__main__":
+    main()
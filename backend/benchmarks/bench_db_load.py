@@ -0,0 +1,60 @@
+"""Load test: concurrent requests against a running API server.
+
+Start the server once per database mode and run this against each:
+    USE_ASYNC_DB=false uvicorn main:app --workers 1 --port 8000
+    USE_ASYNC_DB=true  uvicorn main:app --workers 1 --port 8000
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_db_load --url http://localhost:8000 --concurrency 1 16 64
+"""
+import argparse
+import asyncio
+import random
+import time
+import httpx
+import numpy as np
+
+async def _worker(client, paths, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        path = random.choice(paths)
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+        except httpx.HTTPError:
+            errors.append(path)
+
+async def run(url, concurrency, duration, paths):
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*[
+            _worker(client, paths, deadline, latencies, errors)
+            for _ in range(concurrency)
+        ])
+    return np.array(latencies) * 1000, len(errors)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--users", type=int, default=3, help="recommendation requests go to users 1..N")
+    args = parser.parse_args()
+
+    paths = ["/products", "/users", "/interactions"]
+    paths += [f"/recommendations/{user_id}" for user_id in range(1, args.users + 1)]
+    print(f"{'clients':>8} {'req/s':>9} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10} {'errors':>7}")
+
+    for concurrency in args.concurrency:
+        latencies, errors = asyncio.run(run(args.url, concurrency, args.duration, paths))
+        if len(latencies) == 0:
+            print(f"{concurrency:>8} {'-':>9} {'-':>10} {'-':>10} {'-':>10} {errors:>7}")
+            continue
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        print(f"{concurrency:>8} {len(latencies) / args.duration:>9.1f} {p50:>10.2f} {p95:>10.2f} {p99:>10.2f} {errors:>7}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Bulk import throughput: ORM objects vs. Core executemany vs. bulk_import.
+
+Each mode loads the same synthetic clickstream into the interactions table of
+a fresh, migrated SQLite file and reports rows/second. The bulk_import modes
+read the rows from CSV and JSON Lines files, so their numbers include
+parsing; ORM and Core modes start from in-memory dicts.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_import --users 50000 --products 10000
+"""
+import argparse
+import os
+import tempfile
+import time
+import pandas as pd
+from sqlalchemy import create_engine, event, func, insert, select
+from sqlalchemy.orm import sessionmaker
+import models
+from bulk_import import import_file
+from database import Base, _apply_sqlite_pragmas
+from migrations import run_migrations
+from benchmarks.synthetic import SyntheticDataset
+
+def fresh_engine(directory, name):
+    engine = create_engine(f"sqlite:///{os.path.join(directory, name)}.db")
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    return engine
+
+def orm_objects(engine, rows):
+    """Previous seed_database path: one ORM object per row, a single commit"""
+    db = sessionmaker(bind=engine)()
+    for row in rows:
+        db.add(models.UserInteraction(**row))
+    db.commit()
+    db.close()
+
+def core_executemany(engine, rows, chunk_size):
+    """Previous synthetic loader: Core insert of dict chunks in one transaction"""
+    with engine.begin() as connection:
+        for start in range(0, len(rows), chunk_size):
+            connection.execute(insert(models.UserInteraction), rows[start:start + chunk_size])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50_000)
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--avg-interactions", type=int, default=20)
+    parser.add_argument("--orm-limit", type=int, default=50_000, help="ORM inserts are slow; cap how many are timed")
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    args = parser.parse_args()
+
+    dataset = SyntheticDataset(args.users, args.products, args.avg_interactions)
+    rows = dataset.interaction_rows()
+    total = len(rows)
+
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, "interactions.csv")
+        jsonl_path = os.path.join(directory, "interactions.jsonl")
+        frame = pd.DataFrame(rows)
+        frame.to_csv(csv_path, index=False)
+        frame.to_json(jsonl_path, orient="records", lines=True, date_format="iso")
+        del frame
+
+        modes = [
+            ("orm objects", lambda engine: orm_objects(engine, rows[:args.orm_limit]), min(total, args.orm_limit)),
+            ("core executemany", lambda engine: core_executemany(engine, rows, args.chunk_size), total),
+            ("bulk_import csv, indexes kept", lambda engine: import_file("interactions", csv_path, engine, chunk_size=args.chunk_size, defer_indexes=False), total),
+            ("bulk_import csv", lambda engine: import_file("interactions", csv_path, engine, chunk_size=args.chunk_size), total),
+            ("bulk_import jsonl", lambda engine: import_file("interactions", jsonl_path, engine, chunk_size=args.chunk_size), total)
+        ]
+
+        print(f"{'mode':<30} {'rows':>9} {'seconds':>9} {'rows/s':>10}")
+        for name, run, count in modes:
+            engine = fresh_engine(directory, name.replace(" ", "_").replace(",", ""))
+            start = time.perf_counter()
+            run(engine)
+            elapsed = time.perf_counter() - start
+
+            with engine.connect() as connection:
+                stored = connection.execute(select(func.count()).select_from(models.UserInteraction)).scalar()
+            engine.dispose()
+            assert stored == count, f"{name}: expected {count} rows, found {stored}"
+            print(f"{name:<30} {count:>9} {elapsed:>9.2f} {count / elapsed:>10.0f}")
+
+if __name__ == "__main__":
+    main()
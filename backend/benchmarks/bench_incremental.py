@@ -0,0 +1,46 @@
+"""Write-then-read latency: full CSR fold per read vs. the per-user delta.
+
+Simulates the request loop after POST /interactions: one event arrives,
+then the same user's row is read for scoring.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_incremental --users 100000 --products 50000
+"""
+import argparse
+import time
+import numpy as np
+from interaction_store import InteractionStore
+from benchmarks.synthetic import random_interaction_matrix
+
+def run(store, user_ids, product_ids, read):
+    start = time.perf_counter()
+    for user_id, product_id in zip(user_ids, product_ids):
+        store.add_interaction(user_id, product_id, "purchase", 5)
+        read(store, user_id)
+    return (time.perf_counter() - start) / len(user_ids)
+
+def fold_read(store, user_id):
+    """Previous path: fold every pending event into the CSR, then slice the row"""
+    return store.matrix[store.user_index[user_id]]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--products", type=int, default=50000)
+    parser.add_argument("--events", type=int, default=200)
+    args = parser.parse_args()
+
+    matrix = random_interaction_matrix(args.users, args.products)
+    rng = np.random.default_rng(0)
+    user_ids = (rng.integers(0, args.users, size=args.events) + 1).tolist()
+    product_ids = (rng.integers(0, args.products, size=args.events) + 1).tolist()
+
+    fold = run(InteractionStore.from_matrix(matrix), user_ids, product_ids, fold_read)
+    delta = run(InteractionStore.from_matrix(matrix), user_ids, product_ids, InteractionStore.user_row)
+
+    print(f"matrix: {args.users} users x {args.products} products, nnz={matrix.nnz}")
+    print(f"fold per read:  {fold * 1000:8.3f} ms/event")
+    print(f"per-user delta: {delta * 1000:8.3f} ms/event ({fold / delta:.0f}x)")
+
+if __name__ == "__main__":
+    main()
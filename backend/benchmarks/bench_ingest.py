@@ -0,0 +1,104 @@
+"""Ingestion throughput: per-event commits vs. bulk inserts vs. the write buffer.
+
+Each mode writes the same synthetic clickstream into a fresh SQLite file and
+reports events/second.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_ingest --events 20000 --batch-size 500
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from datetime import datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import models
+from database import Base
+from interaction_buffer import InteractionWriteBuffer, write_interactions
+
+# Clickstream mix: views and clicks dominate
+EVENT_TYPES = ["view", "click", "cart", "wishlist", "purchase"]
+EVENT_WEIGHTS = [0.70, 0.20, 0.05, 0.03, 0.02]
+
+def synthetic_events(num_events, num_users=1000, num_products=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    users = rng.integers(1, num_users + 1, size=num_events)
+    products = rng.integers(1, num_products + 1, size=num_events)
+    types = rng.choice(EVENT_TYPES, size=num_events, p=EVENT_WEIGHTS)
+    return [
+        {
+            "user_id": int(user_id),
+            "product_id": int(product_id),
+            "interaction_type": str(interaction_type),
+            "rating": 5.0 if interaction_type == "purchase" else None,
+            "timestamp": datetime.utcnow()
+        }
+        for user_id, product_id, interaction_type in zip(users, products, types)
+    ]
+
+def fresh_session_factory(directory, name):
+    engine = create_engine(f"sqlite:///{os.path.join(directory, name)}.db")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def per_event(session_factory, events):
+    """Previous POST /interactions path: insert, commit and refresh each event"""
+    db = session_factory()
+    for event in events:
+        interaction = models.UserInteraction(**event)
+        db.add(interaction)
+        db.commit()
+        db.refresh(interaction)
+    db.close()
+
+def bulk(session_factory, events, batch_size):
+    """POST /interactions/bulk: one bulk insert per request of batch_size events"""
+    db = session_factory()
+    for start in range(0, len(events), batch_size):
+        write_interactions(db, events[start:start + batch_size], on_commit=None)
+    db.close()
+
+def buffered(session_factory, events, batch_size):
+    """POST /interactions/events: single submits coalesced by the write buffer"""
+    buffer = InteractionWriteBuffer(
+        session_factory=session_factory,
+        batch_size=batch_size,
+        max_pending=len(events),
+        on_commit=None
+    )
+    for event in events:
+        buffer.submit(event)
+    buffer.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--per-event-limit", type=int, default=2000, help="per-event commits are slow; cap how many are timed")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    events = synthetic_events(args.events)
+    modes = [
+        ("per-event commit", lambda factory: per_event(factory, events[:args.per_event_limit]), min(args.events, args.per_event_limit)),
+        ("bulk insert", lambda factory: bulk(factory, events, args.batch_size), args.events),
+        ("write buffer", lambda factory: buffered(factory, events, args.batch_size), args.events)
+    ]
+
+    print(f"{'mode':<18} {'events':>8} {'seconds':>9} {'events/s':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, run, count in modes:
+            session_factory = fresh_session_factory(directory, name.replace(" ", "_"))
+            start = time.perf_counter()
+            run(session_factory)
+            elapsed = time.perf_counter() - start
+
+            db = session_factory()
+            stored = db.query(models.UserInteraction).count()
+            db.close()
+            assert stored == count, f"{name}: expected {count} rows, found {stored}"
+            print(f"{name:<18} {count:>8} {elapsed:>9.2f} {count / elapsed:>10.0f}")
+
+if __name__ == "__main__":
+    main()
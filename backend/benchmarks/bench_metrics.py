@@ -0,0 +1,96 @@
+"""Cost of the latency instrumentation: per-hook overhead and end-to-end request latency.
+
+Times one stage timer and one counter increment with metrics enabled and
+disabled, then replays GET /recommendations/{user_id} (response cache off,
+template explanations) in a fresh process per mode, so the disabled run
+has no request middleware installed, just as with METRICS_ENABLED=false.
+Also reports how long rendering /metrics takes.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_metrics --requests 2000
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+import numpy as np
+from metrics import Metrics
+
+def hook_cost(enabled, repeat=200_000):
+    """Mean ns per `with metrics.time(...)` and per counter increment"""
+    metrics = Metrics(enabled=enabled)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        with metrics.time("fusion"):
+            pass
+    timer = (time.perf_counter() - start) / repeat * 1e9
+    start = time.perf_counter()
+    for _ in range(repeat):
+        metrics.count_fallback("disabled")
+    counter = (time.perf_counter() - start) / repeat * 1e9
+    return timer, counter
+
+def replay(enabled, database_url, model_dir, user_ids, results):
+    # Configure the app before it is imported
+    os.environ["METRICS_ENABLED"] = "true" if enabled else "false"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["MODEL_DIR"] = model_dir
+    os.environ["RESPONSE_CACHE_MAX_BYTES"] = "0"
+    from fastapi.testclient import TestClient
+    import main as app_module
+
+    with TestClient(app_module.app) as client:
+        for user_id in user_ids[:50]:
+            client.get(f"/recommendations/{user_id}")  # build the models, warm up
+        latencies = []
+        for user_id in user_ids:
+            start = time.perf_counter()
+            client.get(f"/recommendations/{user_id}").raise_for_status()
+            latencies.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        body = client.get("/metrics").text
+        render = time.perf_counter() - start
+    results.put((np.array(latencies) * 1000, render * 1000, len(body.splitlines())))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--interactions", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'metrics':>8} {'timer (ns)':>11} {'counter (ns)':>13}")
+    for enabled in (False, True):
+        timer, counter = hook_cost(enabled)
+        print(f"{'on' if enabled else 'off':>8} {timer:>11.0f} {counter:>13.0f}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = f"sqlite:///{tmp}/bench.db"
+        os.environ["DATABASE_URL"] = database_url
+        from database import engine
+        import models
+        from benchmarks.bench_queries import populate
+
+        models.Base.metadata.create_all(bind=engine)
+        populate(engine, args.users, args.products, args.interactions)
+        user_ids = (np.random.default_rng(0).integers(1, args.users + 1, size=args.requests)).tolist()
+
+        context = multiprocessing.get_context("spawn")
+        print(f"\nGET /recommendations/{{user_id}}, {args.requests} requests, response cache off")
+        print(f"{'metrics':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'mean (ms)':>10}")
+        rendered = None
+        for enabled in (False, True):
+            results = context.Queue()
+            process = context.Process(target=replay, args=(enabled, database_url, os.path.join(tmp, "models"), user_ids, results))
+            process.start()
+            latencies, render_ms, lines = results.get()
+            process.join()
+            print(f"{'on' if enabled else 'off':>8} {np.percentile(latencies, 50):>9.2f} {np.percentile(latencies, 95):>9.2f} {latencies.mean():>10.2f}")
+            if enabled:
+                rendered = (render_ms, lines)
+        print(f"/metrics: {rendered[1]} lines rendered in {rendered[0]:.2f} ms")
+
+if __name__ == "__main__":
+    main()
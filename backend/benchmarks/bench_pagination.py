@@ -0,0 +1,60 @@
+"""Deep-page latency of offset vs. keyset pagination, and streaming export cost.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_pagination --interactions 1000000
+"""
+import argparse
+import os
+import tempfile
+import time
+import timeit
+import tracemalloc
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import models
+from database import Base
+from interaction_export import export_interactions
+from pagination import keyset_page
+from benchmarks.bench_queries import populate
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--interactions", type=int, default=1000000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        populate(engine, 10000, 20000, args.interactions)
+        db = sessionmaker(bind=engine)()
+        query = db.query(models.UserInteraction)
+        column = models.UserInteraction.id
+
+        print(f"{'depth':>10} {'offset (ms)':>12} {'keyset (ms)':>12}")
+        for depth in [0, args.interactions // 100, args.interactions // 10, args.interactions // 2, args.interactions - args.limit]:
+            offset = min(timeit.repeat(lambda: keyset_page(query, column, None, depth, args.limit).all(), number=1, repeat=args.repeat))
+            # Ids are dense here, so the row at `depth` has id depth + 1
+            keyset = min(timeit.repeat(lambda: keyset_page(query, column, depth, 0, args.limit).all(), number=1, repeat=args.repeat))
+            db.expunge_all()
+            print(f"{depth:>10} {offset * 1000:>12.2f} {keyset * 1000:>12.2f}")
+
+        for format in ("ndjson", "csv"):
+            start = time.perf_counter()
+            size = sum(len(chunk) for chunk in export_interactions(db, format))
+            elapsed = time.perf_counter() - start
+
+            # Separate pass: tracemalloc slows allocation-heavy code down a lot
+            tracemalloc.start()
+            for _ in export_interactions(db, format):
+                pass
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"export {format}: {size / 1e6:.1f} MB in {elapsed:.2f}s, "
+                  f"{args.interactions / elapsed:.0f} rows/s, peak Python memory {peak / 1e6:.1f} MB")
+        db.close()
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Cold-start latency: rating query vs. the in-memory time-decayed popularity model.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_popularity --interactions 1000000
+"""
+import argparse
+import os
+import tempfile
+import timeit
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+import models
+from database import Base
+from popularity_model import PopularityModel
+from benchmarks.bench_queries import populate
+
+def rating_query(db, n):
+    """Previous get_popular_products: static rating, queried per request"""
+    products = db.query(models.Product).order_by(models.Product.rating.desc()).limit(n).all()
+    return [(p.id, p.rating, "popular") for p in products]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--interactions", type=int, default=1000000)
+    parser.add_argument("--n", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        populate(engine, 10000, args.products, args.interactions)
+        db = sessionmaker(bind=engine)()
+
+        model = PopularityModel()
+        fit_seconds = timeit.timeit(lambda: model.fit(db), number=1)
+
+        baseline = min(timeit.repeat(lambda: rating_query(db, args.n), number=1, repeat=args.repeat))
+        cached = min(timeit.repeat(lambda: model.top(args.n), number=1, repeat=args.repeat))
+        category = min(timeit.repeat(lambda: model.top(args.n, "c"), number=1, repeat=args.repeat))
+        updates = 100000
+        update_seconds = timeit.timeit(lambda: model.add_interaction(1, "click"), number=updates)
+
+        print(f"fit over {args.interactions} interactions: {fit_seconds:.2f}s")
+        print(f"rating query:         {baseline * 1e6:9.1f} us")
+        print(f"popularity top-{args.n}:     {cached * 1e6:9.1f} us")
+        print(f"category top-{args.n}:       {category * 1e6:9.1f} us")
+        print(f"incremental updates:  {updates / update_seconds:9.0f}/s")
+        db.close()
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
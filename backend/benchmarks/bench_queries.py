@@ -0,0 +1,136 @@
+"""Query plans and latency of the interaction hot paths, before and after migrations.
+
+Builds a synthetic SQLite database without the migration indexes and with
+default pragmas, measures the hot-path queries, then applies `run_migrations`
+and the connection pragmas from `database.py` and measures again.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_queries --interactions 1000000
+"""
+import argparse
+import os
+import tempfile
+import timeit
+import numpy as np
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, event, insert, text
+import models
+from database import Base, _apply_sqlite_pragmas
+from migrations import run_migrations
+
+QUERIES = {
+    "user interactions": (
+        "SELECT * FROM user_interactions WHERE user_id = :user_id ORDER BY timestamp DESC",
+        "user_id"
+    ),
+    "latest interaction": (
+        "SELECT max(timestamp) FROM user_interactions WHERE user_id = :user_id",
+        "user_id"
+    ),
+    "product interactions": (
+        "SELECT count(*) FROM user_interactions WHERE product_id = :product_id",
+        "product_id"
+    ),
+    "popular products": (
+        "SELECT * FROM products ORDER BY rating DESC LIMIT 5",
+        None
+    )
+}
+
+MIGRATION_INDEXES = [
+    "ix_user_interactions_user_id_timestamp",
+    "ix_user_interactions_product_id",
+    "ix_products_rating"
+]
+
+def populate(bind, num_users, num_products, num_interactions, seed=0):
+    rng = np.random.default_rng(seed)
+    start = datetime(2024, 1, 1)
+    with bind.begin() as connection:
+        connection.execute(insert(models.Product), [
+            {"id": pid, "name": f"Product {pid}", "description": "", "category": "c", "price": 1.0,
+             "image_url": "", "rating": float(rng.uniform(1, 5)), "tags": ""}
+            for pid in range(1, num_products + 1)
+        ])
+        connection.execute(insert(models.User), [
+            {"id": uid, "username": f"user{uid}", "email": f"user{uid}@example.com", "preferences": ""}
+            for uid in range(1, num_users + 1)
+        ])
+        for chunk_start in range(0, num_interactions, 100000):
+            size = min(100000, num_interactions - chunk_start)
+            users = rng.integers(1, num_users + 1, size=size)
+            products = rng.integers(1, num_products + 1, size=size)
+            offsets = rng.integers(0, 365 * 24 * 3600, size=size)
+            connection.execute(insert(models.UserInteraction), [
+                {"user_id": int(u), "product_id": int(p), "interaction_type": "view", "rating": None,
+                 "timestamp": start + timedelta(seconds=int(s))}
+                for u, p, s in zip(users, products, offsets)
+            ])
+
+def measure(bind, num_users, num_products, repeat):
+    rng = np.random.default_rng(1)
+    results = {}
+    with bind.connect() as connection:
+        for name, (sql, param) in QUERIES.items():
+            params = {}
+            if param == "user_id":
+                params = {"user_id": int(rng.integers(1, num_users + 1))}
+            elif param == "product_id":
+                params = {"product_id": int(rng.integers(1, num_products + 1))}
+
+            plan = connection.execute(text("EXPLAIN QUERY PLAN " + sql), params).fetchall()
+            seconds = min(timeit.repeat(lambda: connection.execute(text(sql), params).fetchall(), number=1, repeat=repeat))
+            results[name] = (" | ".join(row[-1] for row in plan), seconds * 1000)
+    return results
+
+def measure_writes(bind, count):
+    """Per-event insert + commit, the POST /interactions pattern"""
+    def write():
+        with bind.connect() as connection:
+            for i in range(count):
+                connection.execute(insert(models.UserInteraction), {
+                    "user_id": 1, "product_id": 1, "interaction_type": "click",
+                    "rating": None, "timestamp": datetime.utcnow()
+                })
+                connection.commit()
+    seconds = timeit.timeit(write, number=1)
+    return count / seconds
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--interactions", type=int, default=1000000)
+    parser.add_argument("--writes", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+
+        # Baseline: schema without the migration indexes, default pragmas
+        before_engine = create_engine(url)
+        Base.metadata.create_all(bind=before_engine)
+        with before_engine.begin() as connection:
+            for name in MIGRATION_INDEXES:
+                connection.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        populate(before_engine, args.users, args.products, args.interactions)
+        before = measure(before_engine, args.users, args.products, args.repeat)
+        before_writes = measure_writes(before_engine, args.writes)
+        before_engine.dispose()
+
+        after_engine = create_engine(url)
+        event.listen(after_engine, "connect", _apply_sqlite_pragmas)
+        run_migrations(after_engine)
+        after = measure(after_engine, args.users, args.products, args.repeat)
+        after_writes = measure_writes(after_engine, args.writes)
+        after_engine.dispose()
+
+    for name in QUERIES:
+        print(f"{name}:")
+        print(f"  before {before[name][1]:9.3f} ms  {before[name][0]}")
+        print(f"  after  {after[name][1]:9.3f} ms  {after[name][0]}")
+    print(f"per-event commits: {before_writes:.0f}/s before, {after_writes:.0f}/s after (WAL, synchronous=NORMAL)")
+
+if __name__ == "__main__":
+    main()
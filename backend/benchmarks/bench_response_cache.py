@@ -0,0 +1,72 @@
+"""GET /recommendations/{user_id} with and without the per-user response cache.
+
+Replays a skewed request mix (a few users reload often, as page reloads and
+re-renders do) with some interaction posts mixed in, in-process via
+TestClient against a synthetic SQLite database. Explanations use the
+template fallback, so uncached latency excludes real LLM calls.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_response_cache --requests 2000 --event-ratio 0.05
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+
+def replay(client, cache, user_ids, events, max_bytes):
+    cache.clear()
+    cache.max_bytes = max_bytes
+    cache.hits = cache.misses = 0
+    latencies = []
+    for user_id, is_event in zip(user_ids.tolist(), events.tolist()):
+        if is_event:
+            client.post("/interactions", json={"user_id": user_id, "product_id": 1, "interaction_type": "view"})
+            continue
+        start = time.perf_counter()
+        client.get(f"/recommendations/{user_id}").raise_for_status()
+        latencies.append(time.perf_counter() - start)
+    return np.array(latencies) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--interactions", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--event-ratio", type=float, default=0.05)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Configure the app before it is imported
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/bench.db"
+        os.environ["MODEL_DIR"] = os.path.join(tmp, "models")
+        from fastapi.testclient import TestClient
+        from database import engine
+        import main as app_module
+        from response_cache import recommendation_cache
+        from benchmarks.bench_queries import populate
+
+        app_module.models.Base.metadata.create_all(bind=engine)
+        populate(engine, args.users, args.products, args.interactions)
+
+        rng = np.random.default_rng(0)
+        user_ids = np.minimum(rng.zipf(1.3, size=args.requests), args.users)
+        events = rng.random(args.requests) < args.event_ratio
+        max_bytes = recommendation_cache.max_bytes
+
+        with TestClient(app_module.app) as client:
+            client.get("/recommendations/1")  # build the models once
+            print(f"{args.requests} requests over {len(set(user_ids.tolist()))} distinct users, {events.sum()} interaction posts")
+            print(f"{'cache':>6} {'p50 (ms)':>9} {'p95 (ms)':>9} {'mean (ms)':>10} {'hit rate':>9}")
+            for enabled in (False, True):
+                latencies = replay(client, recommendation_cache, user_ids, events, max_bytes if enabled else 0)
+                stats = recommendation_cache.stats()
+                print(
+                    f"{'on' if enabled else 'off':>6} {np.percentile(latencies, 50):>9.2f} "
+                    f"{np.percentile(latencies, 95):>9.2f} {latencies.mean():>10.2f} {stats['hit_rate']:>9.2f}"
+                )
+            print(f"cache: {stats['entries']} entries, {stats['bytes_used'] / 1024:.0f} KiB, {stats['invalidations']} invalidations")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Micro-benchmark: full argsort vs. ranking.top_k for picking the top few.
+
+Usage (from the backend directory):
+    python -m benchmarks.bench_topk --sizes 10000 100000 1000000 10000000
+"""
+import argparse
+import timeit
+import numpy as np
+from ranking import top_k
+
+def argsort_top(scores, exclude, n):
+    """Previous path: mask in place, full sort, then slice"""
+    scores = scores.copy()
+    scores[exclude] = -1
+    top = np.argsort(scores)[::-1][:n]
+    return [idx for idx in top if scores[idx] > 0]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--n", type=int, default=10)
+    parser.add_argument("--excluded", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'catalog':>10} {'argsort (ms)':>14} {'top_k (ms)':>12} {'speedup':>9}")
+
+    for size in args.sizes:
+        scores = rng.random(size).astype(np.float32)
+        exclude = rng.choice(size, size=min(args.excluded, size), replace=False)
+
+        assert set(argsort_top(scores, exclude, args.n)) == set(top_k(scores, args.n, exclude=exclude, min_score=0).tolist())
+
+        baseline = min(timeit.repeat(lambda: argsort_top(scores, exclude, args.n), number=1, repeat=args.repeat)) * 1000
+        fast = min(timeit.repeat(lambda: top_k(scores, args.n, exclude=exclude, min_score=0), number=1, repeat=args.repeat)) * 1000
+        print(f"{size:>10} {baseline:>14.2f} {fast:>12.2f} {baseline / fast:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+"""Reproducible benchmark suite over a synthetic dataset, with JSON results.
+
+Generates a SyntheticDataset at the chosen scale into a fresh SQLite
+database and times every layer of the recommender:
+
+- matrix: interaction matrix load, neighbor index, ALS, TF-IDF and popularity builds
+- scorers: per-user and per-block scoring of each model
+- fusion: ScoreFusion and the hybrid recommender, single user and per block
+- http: the recommendation endpoints through TestClient (response cache off and on)
+- ingestion: dataset load, POST /interactions, POST /interactions/bulk, write_interactions
+
+Every case reports median/p95/min/mean milliseconds over --repeat runs (per
+call for per-user cases) and rows/s where rows are written. The results
+and the run's environment are saved as JSON; --compare lists each case
+against an earlier results file and exits non-zero if a median regressed
+by more than --tolerance.
+
+Usage (from the backend directory):
+    python -m benchmarks.suite --scale small --output baseline.json
+    python -m benchmarks.suite --scale small --suites scorers fusion --compare baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from benchmarks.synthetic import SyntheticDataset, write_dataset
+
+SCALES = {
+    "small": {"num_users": 2_000, "num_products": 1_000, "avg_interactions": 20},
+    "medium": {"num_users": 20_000, "num_products": 5_000, "avg_interactions": 20},
+    "large": {"num_users": 100_000, "num_products": 20_000, "avg_interactions": 30}
+}
+
+Result = Dict[str, float]
+
+# Slowdowns smaller than this are timer noise, whatever the ratio
+MIN_REGRESSION_MS = 0.01
+
+def summarize(samples_ms: List[float], per_run: int = 1, rows: Optional[int] = None) -> Result:
+    """Statistics of per-run timings, divided by `per_run` calls per run"""
+    samples = np.array(samples_ms) / per_run
+    result = {
+        "median_ms": float(np.median(samples)),
+        "p95_ms": float(np.percentile(samples, 95)),
+        "min_ms": float(samples.min()),
+        "mean_ms": float(samples.mean()),
+        "runs": len(samples),
+        "calls_per_run": per_run
+    }
+    if rows:
+        result["rows_per_s"] = rows / (result["median_ms"] / 1000)
+    return result
+
+def measure(fn: Callable[[], object], repeat: int, per_run: int = 1, rows: Optional[int] = None, warmup: int = 1) -> Result:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples, per_run, rows)
+
+class SuiteContext:
+    """Dataset, database and lazily built models shared by the suites"""
+
+    def __init__(self, dataset: SyntheticDataset, model_dir: str, repeat: int, sample: int, block: int, seed: int):
+        from database import SessionLocal
+
+        self.dataset = dataset
+        self.model_dir = model_dir
+        self.repeat = repeat
+        # Full model builds take seconds at larger scales
+        self.build_repeat = max(1, repeat // 2)
+        self.block = block
+        self.db = SessionLocal()
+        rng = np.random.default_rng(seed)
+        self.users = rng.choice(np.arange(1, dataset.num_users + 1), size=min(sample, dataset.num_users), replace=False).tolist()
+        self.block_users = self.users[:block]
+        self.load_seconds = 0.0
+        self._models = None
+        self._client = None
+
+    def models(self):
+        """(store, neighbor index, ALS, content, popularity), built once from the database"""
+        if self._models is None:
+            from interaction_store import InteractionStore
+            from neighbor_index import ItemNeighborIndex
+            from als_model import ALSModel
+            from content_model import ContentModel
+            from popularity_model import PopularityModel
+
+            store = InteractionStore()
+            store.load(self.db)
+            neighbors = ItemNeighborIndex(model_dir=self.model_dir)
+            neighbors.build(store)
+            als = ALSModel(model_dir=self.model_dir)
+            als.build(store)
+            content = ContentModel(model_dir=self.model_dir)
+            content.fit(self.db)
+            popularity = PopularityModel()
+            popularity.fit(self.db)
+            self._models = store, neighbors, als, content, popularity
+        return self._models
+
+    def client(self):
+        """TestClient over the app, started on first use"""
+        if self._client is None:
+            from fastapi.testclient import TestClient
+            import main as app_module
+
+            self._client = TestClient(app_module.app)
+            self._client.__enter__()
+        return self._client
+
+    def close(self):
+        if self._client is not None:
+            self._client.__exit__(None, None, None)
+        self.db.close()
+
+def suite_matrix(ctx: SuiteContext) -> Iterator[Tuple[str, Result]]:
+    from interaction_store import InteractionStore
+    from neighbor_index import ItemNeighborIndex
+    from als_model import ALSModel
+    from content_model import ContentModel
+    from popularity_model import PopularityModel
+
+    yield "matrix.interaction_store_load", measure(lambda: InteractionStore().load(ctx.db), ctx.build_repeat)
+    store = ctx.models()[0]
+    yield "matrix.neighbor_index_build", measure(lambda: ItemNeighborIndex(model_dir=ctx.model_dir).build(store), ctx.build_repeat)
+    yield "matrix.als_build", measure(lambda: ALSModel(model_dir=ctx.model_dir).build(store), ctx.build_repeat, warmup=0)
+    yield "matrix.content_fit", measure(lambda: ContentModel(model_dir=ctx.model_dir).fit(ctx.db), ctx.build_repeat)
+    yield "matrix.popularity_fit", measure(lambda: PopularityModel().fit(ctx.db), ctx.build_repeat)
+
+def suite_scorers(ctx: SuiteContext) -> Iterator[Tuple[str, Result]]:
+    store, neighbors, als, content, popularity = ctx.models()
+    users = ctx.users
+    interacted = {uid: store.user_product_ids(uid) for uid in users}
+    block_interacted = [interacted[uid] for uid in ctx.block_users]
+
+    def each_user(fn):
+        return lambda: [fn(uid) for uid in users]
+
+    yield "scorers.neighbors.score", measure(each_user(lambda uid: neighbors.score(store, uid)), ctx.repeat, len(users))
+    yield "scorers.als.score", measure(each_user(lambda uid: als.score(store, uid)), ctx.repeat, len(users))
+    yield "scorers.content.user_scores", measure(each_user(lambda uid: content.user_scores(interacted[uid])), ctx.repeat, len(users))
+    yield "scorers.content.search", measure(each_user(lambda uid: content.search(interacted[uid], 10)), ctx.repeat, len(users))
+    yield "scorers.popularity.top", measure(each_user(lambda uid: popularity.top(10)), ctx.repeat, len(users))
+    yield "scorers.neighbors.score_batch", measure(lambda: neighbors.score_batch(store, ctx.block_users), ctx.repeat)
+    yield "scorers.als.score_batch", measure(lambda: als.score_batch(store, ctx.block_users), ctx.repeat)
+    yield "scorers.content.user_scores_batch", measure(lambda: content.user_scores_batch(block_interacted), ctx.repeat)
+
+def suite_fusion(ctx: SuiteContext) -> Iterator[Tuple[str, Result]]:
+    from fusion import ScoreFusion
+    from recommender import ProductRecommender, _single_user
+
+    store, neighbors, als, content, popularity = ctx.models()
+    users = ctx.users
+    single = [
+        {
+            "collaborative": _single_user(*neighbors.score(store, uid)),
+            "content": _single_user(*content.user_scores(store.user_product_ids(uid)))
+        }
+        for uid in users
+    ]
+    block = {
+        "collaborative": neighbors.score_batch(store, ctx.block_users),
+        "content": content.user_scores_batch([store.user_product_ids(uid) for uid in ctx.block_users])
+    }
+
+    for method in ("weighted", "rrf"):
+        fusion = ScoreFusion(method=method)
+        yield f"fusion.{method}.single", measure(lambda: [fusion.fuse(sources, 10) for sources in single], ctx.repeat, len(users))
+        yield f"fusion.{method}.block", measure(lambda: fusion.fuse(block, 10), ctx.repeat)
+
+    for strategy in ("neighbors", "als"):
+        recommender = ProductRecommender(
+            ctx.db, store=store, neighbor_index=neighbors, content=content, popularity=popularity, als=als, strategy=strategy
+        )
+        yield f"hybrid.{strategy}.single", measure(lambda: [recommender.hybrid_recommendations(uid, 10) for uid in users], ctx.repeat, len(users))
+        yield f"hybrid.{strategy}.block", measure(lambda: list(recommender.hybrid_recommendations_batch(ctx.block_users, 10, ctx.block)), ctx.repeat)
+
+def suite_http(ctx: SuiteContext) -> Iterator[Tuple[str, Result]]:
+    from response_cache import recommendation_cache
+
+    client = ctx.client()
+    users = ctx.users
+
+    def get_all():
+        for uid in users:
+            client.get(f"/recommendations/{uid}").raise_for_status()
+
+    # Cache off: every request scores, fetches products and explains
+    max_bytes = recommendation_cache.max_bytes
+    recommendation_cache.max_bytes = 0
+    yield "http.recommendations.uncached", measure(get_all, ctx.repeat, len(users))
+    recommendation_cache.max_bytes = max_bytes
+    recommendation_cache.clear()
+    yield "http.recommendations.cached", measure(get_all, ctx.repeat, len(users))
+
+    def batch():
+        response = client.post("/recommendations/batch", json={"user_ids": ctx.block_users, "num_recommendations": 10})
+        response.raise_for_status()
+        return response.content
+
+    yield "http.recommendations_batch", measure(batch, ctx.repeat)
+    yield "http.products_page", measure(lambda: client.get("/products", params={"limit": 100, "after_id": 100}).raise_for_status(), ctx.repeat)
+
+def suite_ingestion(ctx: SuiteContext) -> Iterator[Tuple[str, Result]]:
+    from interaction_buffer import write_interactions
+
+    counts = ctx.dataset.num_products + ctx.dataset.num_users + ctx.dataset.num_interactions
+    yield "ingestion.dataset_load", summarize([ctx.load_seconds * 1000], rows=counts)
+
+    client = ctx.client()
+    # Replays the dataset's own events so rows stay realistic
+    events = ctx.dataset.interaction_rows(0, 5000)
+    for row in events:
+        row["timestamp"] = row["timestamp"].isoformat()
+
+    def post_each():
+        for row in events[:200]:
+            client.post("/interactions", json={key: row[key] for key in ("user_id", "product_id", "interaction_type", "rating")}).raise_for_status()
+
+    yield "ingestion.post_interaction", measure(post_each, ctx.repeat, 200, warmup=0)
+
+    body = "\n".join(
+        json.dumps({key: row[key] for key in ("user_id", "product_id", "interaction_type", "rating")})
+        for row in events
+    )
+    bulk = lambda: client.post("/interactions/bulk", content=body, headers={"Content-Type": "application/x-ndjson"}).raise_for_status()
+    yield "ingestion.bulk_endpoint", measure(bulk, ctx.repeat, rows=len(events), warmup=0)
+
+    rows = ctx.dataset.interaction_rows(0, 10000)
+    yield "ingestion.write_interactions", measure(lambda: write_interactions(ctx.db, [dict(row) for row in rows]), ctx.repeat, rows=len(rows), warmup=0)
+
+SUITES = {
+    "matrix": suite_matrix,
+    "scorers": suite_scorers,
+    "fusion": suite_fusion,
+    "http": suite_http,
+    "ingestion": suite_ingestion
+}
+
+def _version(module_name: str) -> Optional[str]:
+    try:
+        return __import__(module_name).__version__
+    except Exception:
+        return None
+
+def environment(args, dataset: SyntheticDataset) -> Dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "packages": {name: _version(name) for name in ("numpy", "scipy", "sklearn", "sqlalchemy", "fastapi")},
+        "scale": args.scale,
+        "dataset": dict(dataset.params, num_interactions=dataset.num_interactions),
+        "repeat": args.repeat,
+        "sample": args.sample,
+        "block": args.block
+    }
+
+def compare(baseline: Dict, results: Dict[str, Result], tolerance: float) -> List[str]:
+    """Print current vs. baseline medians; returns the cases that regressed"""
+    if baseline["meta"].get("dataset") != results["meta"]["dataset"]:
+        print("warning: baseline was generated with different dataset parameters")
+    regressions = []
+    print(f"\n{'case':<36} {'baseline (ms)':>14} {'current (ms)':>13} {'ratio':>7}")
+    for case, result in results["results"].items():
+        previous = baseline["results"].get(case)
+        if previous is None:
+            continue
+        ratio = result["median_ms"] / previous["median_ms"] if previous["median_ms"] else float("nan")
+        flag = ""
+        if ratio > 1 + tolerance and result["median_ms"] - previous["median_ms"] > MIN_REGRESSION_MS:
+            regressions.append(case)
+            flag = "  regressed"
+        print(f"{case:<36} {previous['median_ms']:>14.3f} {result['median_ms']:>13.3f} {ratio:>7.2f}{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--users", type=int, help="override the scale's number of users")
+    parser.add_argument("--products", type=int, help="override the scale's number of products")
+    parser.add_argument("--avg-interactions", type=float, help="override the scale's mean interactions per user")
+    parser.add_argument("--suites", nargs="+", choices=list(SUITES), default=list(SUITES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--sample", type=int, default=200, help="users timed by per-user cases")
+    parser.add_argument("--block", type=int, default=128, help="users per block in batch cases")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed median slowdown before a case counts as regressed")
+    args = parser.parse_args()
+
+    config = dict(SCALES[args.scale])
+    for key, value in (("num_users", args.users), ("num_products", args.products), ("avg_interactions", args.avg_interactions)):
+        if value is not None:
+            config[key] = value
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Configure the app before it is imported
+        os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/bench.db"
+        os.environ["MODEL_DIR"] = os.path.join(tmp, "models")
+        import models
+        from database import engine
+        from migrations import run_migrations
+
+        models.Base.metadata.create_all(bind=engine)
+        run_migrations(engine)
+        dataset = SyntheticDataset(seed=args.seed, **config)
+        start = time.perf_counter()
+        write_dataset(engine, dataset)
+        load_seconds = time.perf_counter() - start
+        print(
+            f"dataset: {dataset.num_users} users, {dataset.num_products} products, "
+            f"{dataset.num_interactions} interactions (loaded in {load_seconds:.1f}s)"
+        )
+
+        ctx = SuiteContext(dataset, os.environ["MODEL_DIR"], args.repeat, args.sample, args.block, args.seed)
+        ctx.load_seconds = load_seconds
+        results = {}
+        print(f"{'case':<36} {'median (ms)':>12} {'p95 (ms)':>10} {'rows/s':>10}")
+        try:
+            # Suites run in declaration order so the writes of ingestion come last
+            for name in [name for name in SUITES if name in args.suites]:
+                for case, result in SUITES[name](ctx):
+                    results[case] = result
+                    rows = f"{result['rows_per_s']:>10.0f}" if "rows_per_s" in result else f"{'':>10}"
+                    print(f"{case:<36} {result['median_ms']:>12.3f} {result['p95_ms']:>10.3f} {rows}")
+        finally:
+            ctx.close()
+
+    report = {"meta": environment(args, dataset), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"results written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} case(s) regressed by more than {args.tolerance:.0%}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+import numpy as np
+from datetime import datetime
+from scipy import sparse
+from typing import Dict, Iterator, List, Optional
+
+def random_interaction_matrix(
+    num_users: int,
+    num_products: int,
+    avg_interactions: int = 20,
+    popularity_exponent: float = 1.1,
+    seed: int = 42
+) -> sparse.csr_matrix:
+    """Random user-item weight matrix with power-law product popularity"""
+    rng = np.random.default_rng(seed)
+
+    # Zipf-like product popularity so a few items dominate, as in real catalogs
+    ranks = np.arange(1, num_products + 1)
+    popularity = 1.0 / ranks ** popularity_exponent
+    popularity /= popularity.sum()
+
+    counts = rng.poisson(avg_interactions, size=num_users).clip(min=1)
+    rows = np.repeat(np.arange(num_users, dtype=np.int32), counts)
+    cols = rng.choice(num_products, size=len(rows), p=popularity).astype(np.int32)
+    weights = rng.integers(1, 6, size=len(rows)).astype(np.float32)
+
+    return sparse.csr_matrix((weights, (rows, cols)), shape=(num_users, num_products))
+
+def iter_synthetic_products(num_products: int, extra_words: int = 6, seed: int = 42):
+    """Yield product dicts derived from the seed_data.py templates.
+
+    Each product is a template with a variant suffix plus a few words and
+    tags borrowed from other templates, so TF-IDF vectors overlap the way a
+    real catalog's would.
+    """
+    from seed_data import SAMPLE_PRODUCTS
+
+    rng = np.random.default_rng(seed)
+    words = sorted({
+        word.strip(",.").lower()
+        for template in SAMPLE_PRODUCTS
+        for word in template["description"].split() + template["tags"].split(",")
+        if len(word) > 3
+    })
+    tags = sorted({tag for template in SAMPLE_PRODUCTS for tag in template["tags"].split(",")})
+
+    template_choices = rng.integers(0, len(SAMPLE_PRODUCTS), size=num_products)
+    for i, template_idx in enumerate(template_choices):
+        template = SAMPLE_PRODUCTS[template_idx]
+        extra = " ".join(words[j] for j in rng.integers(0, len(words), size=extra_words))
+        extra_tags = ",".join(tags[j] for j in rng.integers(0, len(tags), size=2))
+        yield {
+            "name": f"{template['name']} {i}",
+            "description": f"{template['description']} {extra}",
+            "category": template["category"],
+            "price": round(float(template["price"] * rng.uniform(0.5, 1.5)), 2),
+            "image_url": template["image_url"],
+            "rating": round(float(rng.uniform(3.0, 5.0)), 1),
+            "tags": f"{template['tags']},{extra_tags}"
+        }
+
+# Clickstream mix: views and clicks dominate
+INTERACTION_TYPES = ["view", "click", "cart", "wishlist", "purchase"]
+INTERACTION_TYPE_WEIGHTS = [0.65, 0.20, 0.07, 0.04, 0.04]
+
+_SYLLABLES = [
+    "ka", "lo", "mi", "ren", "tor", "vel", "sa", "qui", "dan", "bor", "li", "mar",
+    "ne", "pol", "ru", "sen", "ta", "vor", "zel", "fi", "gan", "hol", "jin", "kor"
+]
+
+def _vocabulary(rng: np.random.Generator, size: int) -> List[str]:
+    """`size` distinct made-up words of 2-4 syllables"""
+    words: Dict[str, None] = {}
+    while len(words) < size:
+        lengths = rng.integers(2, 5, size=size)
+        for length in lengths:
+            words["".join(rng.choice(_SYLLABLES, size=length))] = None
+            if len(words) == size:
+                break
+    return list(words)
+
+def _zipf_weights(size: int, exponent: float) -> np.ndarray:
+    weights = 1.0 / np.arange(1, size + 1) ** exponent
+    return weights / weights.sum()
+
+class SyntheticDataset:
+    """Reproducible catalog, users and clickstream for benchmarks.
+
+    - products belong to one of `num_categories` categories; descriptions
+      and tags are drawn (Zipf) from word and tag vocabularies, with most
+      words coming from their category's own ranking so TF-IDF neighbors
+      cluster by category
+    - product popularity follows a power law (`popularity_exponent`)
+    - interactions per user follow a Pareto law with mean
+      `avg_interactions` (`activity_exponent`, lower = heavier tail)
+    - each user has a favorite category that `category_affinity` of their
+      interactions come from
+    - interaction types follow INTERACTION_TYPE_WEIGHTS; half of the
+      purchases carry a rating; timestamps span `days` days before `end`
+
+    Ids are 1-based and dense. Interactions are held as numpy columns in
+    timestamp order; `*_rows` produce insert mappings for `models`.
+    """
+
+    def __init__(
+        self,
+        num_users: int,
+        num_products: int,
+        avg_interactions: float = 20,
+        activity_exponent: float = 1.5,
+        popularity_exponent: float = 1.1,
+        num_categories: int = 12,
+        vocabulary_size: int = 5000,
+        words_per_product: int = 12,
+        num_tags: int = 300,
+        tags_per_product: int = 4,
+        category_affinity: float = 0.6,
+        days: int = 90,
+        end: datetime = datetime(2025, 1, 1),
+        seed: int = 42
+    ):
+        self.num_users = num_users
+        self.num_products = num_products
+        self.params = {
+            "num_users": num_users,
+            "num_products": num_products,
+            "avg_interactions": avg_interactions,
+            "activity_exponent": activity_exponent,
+            "popularity_exponent": popularity_exponent,
+            "num_categories": num_categories,
+            "vocabulary_size": vocabulary_size,
+            "words_per_product": words_per_product,
+            "num_tags": num_tags,
+            "tags_per_product": tags_per_product,
+            "category_affinity": category_affinity,
+            "days": days,
+            "end": end.isoformat(),
+            "seed": seed
+        }
+        rng = np.random.default_rng(seed)
+
+        self.categories = [f"Category {c}" for c in range(num_categories)]
+        self.words = _vocabulary(rng, vocabulary_size)
+        self.tags = _vocabulary(rng, num_tags)
+        self.product_categories = rng.integers(0, num_categories, size=num_products)
+
+        # Each category ranks the vocabularies differently; global draws use the identity ranking
+        word_rankings = [rng.permutation(vocabulary_size) for _ in range(num_categories)]
+        tag_rankings = [rng.permutation(num_tags) for _ in range(num_categories)]
+        word_ranks = rng.choice(vocabulary_size, size=(num_products, words_per_product), p=_zipf_weights(vocabulary_size, 1.0))
+        tag_ranks = rng.choice(num_tags, size=(num_products, tags_per_product), p=_zipf_weights(num_tags, 1.0))
+        from_category = rng.random(word_ranks.shape) < 0.8
+        self.product_words = np.where(
+            from_category,
+            np.stack(word_rankings)[self.product_categories[:, None], word_ranks],
+            word_ranks
+        )
+        self.product_tags = np.stack(tag_rankings)[self.product_categories[:, None], tag_ranks]
+        self.product_prices = np.round(rng.lognormal(3.5, 1.0, size=num_products), 2)
+        self.product_ratings = np.round(rng.uniform(1.0, 5.0, size=num_products), 1)
+
+        # Power-law popularity over a random order of the catalog
+        popularity = np.empty(num_products)
+        popularity[rng.permutation(num_products)] = _zipf_weights(num_products, popularity_exponent)
+
+        # Pareto activity: scale chosen so the mean is avg_interactions
+        scale = avg_interactions * (activity_exponent - 1) / activity_exponent
+        counts = np.ceil((rng.pareto(activity_exponent, size=num_users) + 1) * scale).astype(np.int64)
+        # Cap the heaviest users (bots, crawlers) like production data cleaning would
+        counts = counts.clip(1, max(1, min(num_products, int(50 * avg_interactions))))
+        users = np.repeat(np.arange(num_users), counts)
+        favorites = rng.integers(0, num_categories, size=num_users)
+
+        products = rng.choice(num_products, size=len(users), p=popularity)
+        in_favorite = rng.random(len(users)) < category_affinity
+        for category in range(num_categories):
+            members = np.flatnonzero(self.product_categories == category)
+            picks = np.flatnonzero(in_favorite & (favorites[users] == category))
+            if len(members) and len(picks):
+                weights = popularity[members] / popularity[members].sum()
+                products[picks] = rng.choice(members, size=len(picks), p=weights)
+
+        types = rng.choice(len(INTERACTION_TYPES), size=len(users), p=INTERACTION_TYPE_WEIGHTS)
+        rated = (types == INTERACTION_TYPES.index("purchase")) & (rng.random(len(users)) < 0.5)
+        ratings = np.where(rated, np.round(rng.uniform(1.0, 5.0, size=len(users)), 1), np.nan)
+        offsets = rng.integers(0, days * 24 * 3600, size=len(users))
+
+        order = np.argsort(offsets, kind="stable")
+        self.interaction_users = users[order] + 1
+        self.interaction_products = products[order] + 1
+        self.interaction_types = types[order]
+        self.interaction_ratings = ratings[order]
+        self.interaction_times = (
+            np.datetime64(end, "s") - np.timedelta64(days * 24 * 3600, "s") + offsets[order].astype("timedelta64[s]")
+        )
+
+    @property
+    def num_interactions(self) -> int:
+        return len(self.interaction_users)
+
+    def product_rows(self) -> Iterator[Dict]:
+        for i in range(self.num_products):
+            category = self.categories[self.product_categories[i]]
+            words = [self.words[w] for w in self.product_words[i]]
+            yield {
+                "id": i + 1,
+                "name": f"{words[0].title()} {words[1].title()} {i + 1}",
+                "description": " ".join(words),
+                "category": category,
+                "price": float(self.product_prices[i]),
+                "image_url": f"https://example.com/products/{i + 1}.jpg",
+                "rating": float(self.product_ratings[i]),
+                "tags": ",".join(dict.fromkeys(self.tags[t] for t in self.product_tags[i]))
+            }
+
+    def user_rows(self) -> Iterator[Dict]:
+        for i in range(self.num_users):
+            yield {"id": i + 1, "username": f"user{i + 1}", "email": f"user{i + 1}@example.com", "preferences": ""}
+
+    def interaction_rows(self, start: int = 0, stop: Optional[int] = None) -> List[Dict]:
+        """Insert mappings for interactions [start, stop) in timestamp order"""
+        stop = self.num_interactions if stop is None else min(stop, self.num_interactions)
+        ratings = self.interaction_ratings[start:stop]
+        return [
+            {
+                "user_id": user_id,
+                "product_id": product_id,
+                "interaction_type": INTERACTION_TYPES[type_index],
+                "rating": None if rating != rating else rating,  # NaN: not rated
+                "timestamp": timestamp
+            }
+            for user_id, product_id, type_index, rating, timestamp in zip(
+                self.interaction_users[start:stop].tolist(),
+                self.interaction_products[start:stop].tolist(),
+                self.interaction_types[start:stop].tolist(),
+                ratings.tolist(),
+                self.interaction_times[start:stop].tolist()
+            )
+        ]
+
+def write_dataset(bind, dataset: SyntheticDataset, chunk_size: int = 50_000) -> Dict[str, int]:
+    """Insert a dataset into empty tables through the bulk import path"""
+    import pandas as pd
+    import bulk_import
+
+    bulk_import.import_rows("products", dataset.product_rows(), bind, chunk_size)
+    bulk_import.import_rows("users", dataset.user_rows(), bind, chunk_size)
+    # Interactions go in straight from the generated columns
+    types = np.array(INTERACTION_TYPES, dtype=object)
+    frames = (
+        pd.DataFrame({
+            "user_id": dataset.interaction_users[start:start + chunk_size],
+            "product_id": dataset.interaction_products[start:start + chunk_size],
+            "interaction_type": types[dataset.interaction_types[start:start + chunk_size]],
+            "rating": dataset.interaction_ratings[start:start + chunk_size],
+            "timestamp": dataset.interaction_times[start:start + chunk_size]
+        })
+        for start in range(0, dataset.num_interactions, chunk_size)
+    )
+    bulk_import.import_frames("interactions", frames, bind)
+    return {"products": dataset.num_products, "users": dataset.num_users, "interactions": dataset.num_interactions}
@@ -0,0 +1,146 @@
+"""Check incrementally maintained models against a full rebuild.
+
+The interaction matrix and popularity scores are updated event by event
+(`record_interactions`). These checks rebuild both from the database and
+compare. `check_models` compares the live models of a running process
+(GET /models/consistency). `replay_check` loads a snapshot that leaves out
+the newest interactions, replays them through the incremental path, and
+compares that with a rebuild over every row.
+
+Usage (from the backend directory):
+    python consistency.py --holdout 1000
+"""
+import argparse
+import time
+import numpy as np
+from scipy import sparse
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import Dict
+import models
+from interaction_store import InteractionStore, interaction_store
+from popularity_model import PopularityModel, popularity_model
+
+def _aligned(store: InteractionStore, user_ids, product_ids) -> sparse.csr_matrix:
+    """`store.matrix` re-indexed to the given user/product id order"""
+    matrix = store.matrix.tocoo()
+    user_position = {uid: idx for idx, uid in enumerate(user_ids)}
+    product_position = {pid: idx for idx, pid in enumerate(product_ids)}
+    rows = np.array([user_position[store.user_ids[r]] for r in matrix.row.tolist()], dtype=np.int64)
+    cols = np.array([product_position[store.product_ids[c]] for c in matrix.col.tolist()], dtype=np.int64)
+    return sparse.csr_matrix((matrix.data, (rows, cols)), shape=(len(user_ids), len(product_ids)))
+
+def compare_stores(incremental: InteractionStore, rebuilt: InteractionStore, tolerance: float = 1e-4) -> Dict:
+    same_ids = set(incremental.user_ids) == set(rebuilt.user_ids) and set(incremental.product_ids) == set(rebuilt.product_ids)
+    report = {
+        "users": [len(incremental.user_ids), len(rebuilt.user_ids)],
+        "products": [len(incremental.product_ids), len(rebuilt.product_ids)],
+        "same_ids": same_ids
+    }
+    if not same_ids:
+        report["consistent"] = False
+        return report
+
+    a = _aligned(incremental, rebuilt.user_ids, rebuilt.product_ids)
+    b = rebuilt.matrix
+    diff = abs(a - b)
+    max_diff = float(diff.max()) if diff.nnz else 0.0
+    report.update(
+        nnz=[int(a.nnz), int(b.nnz)],
+        max_abs_diff=max_diff,
+        consistent=max_diff <= tolerance
+    )
+    return report
+
+def compare_popularity(incremental: PopularityModel, rebuilt: PopularityModel, rtol: float = 1e-6) -> Dict:
+    now = time.time()
+    a = incremental.product_scores(now)
+    b = rebuilt.product_scores(now)
+    product_ids = sorted(set(a) | set(b))
+    a_scores = np.array([a.get(pid, 0.0) for pid in product_ids])
+    b_scores = np.array([b.get(pid, 0.0) for pid in product_ids])
+    max_diff = float(np.max(np.abs(a_scores - b_scores))) if product_ids else 0.0
+    return {
+        "products": [len(a), len(b)],
+        "max_abs_diff": max_diff,
+        "consistent": bool(np.allclose(a_scores, b_scores, rtol=rtol, atol=1e-9))
+    }
+
+def _half_life_days(model: PopularityModel) -> float:
+    return np.log(2) / model.decay / 86400
+
+def check_models(db: Session, store: InteractionStore = interaction_store, popularity: PopularityModel = popularity_model) -> Dict:
+    """Compare this process's live models with a rebuild from the database.
+
+    Interactions committed while the check runs can show up as a transient
+    difference, as can buffered events that have not been flushed yet.
+    """
+    report = {}
+    if store.loaded:
+        rebuilt = InteractionStore()
+        rebuilt.load(db)
+        report["interaction_matrix"] = compare_stores(store, rebuilt)
+    if popularity.fitted:
+        rebuilt_popularity = PopularityModel(half_life_days=_half_life_days(popularity))
+        rebuilt_popularity.fit(db)
+        report["popularity"] = compare_popularity(popularity, rebuilt_popularity)
+    report["consistent"] = all(section["consistent"] for section in report.values())
+    return report
+
+def replay_check(db: Session, holdout: int = 1000) -> Dict:
+    """Load all but the newest `holdout` rows, replay them incrementally, compare"""
+    max_id = db.query(func.max(models.UserInteraction.id)).scalar() or 0
+    cutoff = max(max_id - holdout, 0)
+
+    store = InteractionStore()
+    store.load(db, max_id=cutoff)
+    popularity = PopularityModel()
+    popularity.fit(db, max_id=cutoff)
+
+    replayed = db.query(models.UserInteraction).filter(
+        models.UserInteraction.id > cutoff
+    ).order_by(models.UserInteraction.id).all()
+    for interaction in replayed:
+        store.add_interaction(interaction.user_id, interaction.product_id, interaction.interaction_type, interaction.rating)
+        # Read a row mid-replay so the per-user delta path is exercised too
+        store.user_row(interaction.user_id)
+        popularity.add_interaction(interaction.product_id, interaction.interaction_type, interaction.rating, interaction.timestamp)
+
+    rebuilt = InteractionStore()
+    rebuilt.load(db)
+    rebuilt_popularity = PopularityModel()
+    rebuilt_popularity.fit(db)
+
+    # Every replayed user's merged row must match their rebuilt row
+    row_mismatches = 0
+    for user_id in {interaction.user_id for interaction in replayed}:
+        a, b = store.user_row(user_id), rebuilt.user_row(user_id)
+        a_weights = dict(zip((store.product_ids[c] for c in a.indices), a.data))
+        b_weights = dict(zip((rebuilt.product_ids[c] for c in b.indices), b.data))
+        if a_weights.keys() != b_weights.keys() or any(abs(a_weights[p] - b_weights[p]) > 1e-4 for p in a_weights):
+            row_mismatches += 1
+
+    report = {
+        "replayed": len(replayed),
+        "user_rows": {"mismatches": row_mismatches, "consistent": row_mismatches == 0},
+        "interaction_matrix": compare_stores(store, rebuilt),
+        "popularity": compare_popularity(popularity, rebuilt_popularity)
+    }
+    report["consistent"] = all(section["consistent"] for key, section in report.items() if key != "replayed")
+    return report
+
+if __name__ == "__main__":
+    import json
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--holdout", type=int, default=1000, help="newest interactions to replay incrementally")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        report = replay_check(db, args.holdout)
+    finally:
+        db.close()
+    print(json.dumps(report, indent=2))
+    raise SystemExit(0 if report["consistent"] else 1)
@@ -0,0 +1,418 @@
+import os
+import threading
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+import models
+from ann_index import create_index
+from database import SessionLocal
+from model_artifacts import MODEL_DIR, load_artifact, publish
+
+load_dotenv()
+
+CONTENT_MAX_FEATURES = int(os.getenv("CONTENT_MAX_FEATURES", "100"))
+CONTENT_REFIT_EVERY = int(os.getenv("CONTENT_REFIT_EVERY", "100"))
+# Products added within this many seconds are published together; 0 publishes each one
+CONTENT_PUBLISH_DELAY = float(os.getenv("CONTENT_PUBLISH_DELAY", "30"))
+
+def product_text(name: str, description: str, category: str, tags: str) -> str:
+    """Text used as a product's content features"""
+    return f"{name} {description} {category} {tags}"
+
+class ContentModel:
+    """TF-IDF product feature model shared across requests.
+
+    The vectorizer and its L2-normalized feature matrix are fitted once,
+    published under MODEL_DIR and memory-mapped at startup. New products are
+    transformed with the existing vocabulary and appended in memory; they are
+    published together CONTENT_PUBLISH_DELAY seconds after the first one, and
+    the model is refit from the catalog in the background after
+    CONTENT_REFIT_EVERY additions so IDF weights don't drift.
+    Nearest-product search goes through a pluggable index (see `ann_index`),
+    built from a dense copy of the matrix on the first `search`; the hybrid
+    recommender uses it for content candidate generation.
+    """
+
+    artifact_name = "content"
+
+    def __init__(
+        self,
+        max_features: int = CONTENT_MAX_FEATURES,
+        model_dir: str = MODEL_DIR,
+        ann_backend: Optional[str] = None,
+        publish_delay: float = CONTENT_PUBLISH_DELAY
+    ):
+        self.max_features = max_features
+        self.model_dir = model_dir
+        self.publish_delay = publish_delay
+        # Published version currently (or last) loaded, see model_artifacts
+        self.artifact_version: Optional[int] = None
+        self.ann_backend = ann_backend
+        # Built lazily by `search`; None until then or after the vectors are replaced
+        self.ann = None
+        self.vectorizer: Optional[TfidfVectorizer] = None
+        self.feature_matrix: Optional[sparse.csr_matrix] = None
+        self.product_ids: List[int] = []
+        self.product_index: Dict[int, int] = {}
+        self.added_since_fit = 0
+        # Bumped whenever the product vectors or the catalog change (fit, load,
+        # new product), which also retires cached responses (model_version)
+        self.version = 0
+        # Products appended here but not yet in a published version: id -> text
+        self._unpublished: Dict[int, str] = {}
+        self._publish_timer: Optional[threading.Timer] = None
+        self._refit_thread: Optional[threading.Thread] = None
+        self._lock = threading.RLock()
+
+    @property
+    def fitted(self) -> bool:
+        return self.feature_matrix is not None
+
+    def fit(self, db: Session):
+        """Fit the vectorizer over the whole catalog"""
+        rows = db.query(
+            models.Product.id,
+            models.Product.name,
+            models.Product.description,
+            models.Product.category,
+            models.Product.tags
+        ).order_by(models.Product.id).all()
+
+        product_ids = [row[0] for row in rows]
+        texts = [product_text(*row[1:]) for row in rows]
+
+        vectorizer = TfidfVectorizer(max_features=self.max_features, stop_words='english')
+        if texts:
+            feature_matrix = vectorizer.fit_transform(texts).astype(np.float32).tocsr()
+        else:
+            vectorizer = None
+            feature_matrix = sparse.csr_matrix((0, 0), dtype=np.float32)
+
+        with self._lock:
+            self.vectorizer = vectorizer
+            self.feature_matrix = feature_matrix
+            self.product_ids = product_ids
+            self.product_index = {pid: idx for idx, pid in enumerate(product_ids)}
+            self.added_since_fit = 0
+            self.ann = None
+            self.version += 1
+            self._reapply_unpublished()
+
+    def _build_ann(self, feature_matrix: sparse.csr_matrix):
+        ann = create_index(self.ann_backend)
+        if feature_matrix.shape[0] > 0:
+            ann.build(feature_matrix.toarray())
+        return ann
+
+    def ensure_fitted(self, db: Session):
+        if not self.fitted:
+            with self._lock:
+                if not self.fitted and not self.load(db):
+                    self.fit(db)
+                    self.save()
+
+    def _append(self, texts: Dict[int, str]):
+        """Transform products with the current vocabulary and append their rows (lock held)"""
+        product_ids = list(texts)
+        rows = self.vectorizer.transform([texts[pid] for pid in product_ids]).astype(np.float32)
+        self.feature_matrix = sparse.vstack([self.feature_matrix, rows]).tocsr()
+        if self.ann is not None:
+            for row in rows:
+                self.ann.add(row.toarray())
+        offset = len(self.product_ids)
+        for i, pid in enumerate(product_ids):
+            self.product_index[pid] = offset + i
+        # A new list, so readers holding the old one (and fusion's alignment cache) are unaffected
+        self.product_ids = self.product_ids + product_ids
+        self.added_since_fit += len(product_ids)
+
+    def _reapply_unpublished(self):
+        """Re-append local products missing from freshly swapped-in vectors (lock held)"""
+        missing = {pid: text for pid, text in self._unpublished.items() if pid not in self.product_index}
+        if missing and self.vectorizer is not None:
+            self._append(missing)
+
+    def add_product(self, product: models.Product):
+        """Reflect a newly created product in memory; publishing happens later, in the background"""
+        self._add({product.id: product_text(product.name, product.description, product.category, product.tags)})
+
+    def _add(self, texts: Dict[int, str]):
+        with self._lock:
+            if not self.fitted:
+                # Nothing cached yet; the first fit will include the products
+                return
+
+            texts = {pid: text for pid, text in texts.items() if pid not in self.product_index}
+            if not texts:
+                return
+            self._unpublished.update(texts)
+            if self.vectorizer is not None:
+                self._append(texts)
+            self.version += 1
+
+            if self.vectorizer is None or self.added_since_fit >= CONTENT_REFIT_EVERY:
+                self.refit_in_background()
+            else:
+                self._schedule_publish()
+
+    def catch_up(self, db: Session) -> int:
+        """Add catalog products missing from the loaded vectors; returns how many were added.
+
+        A process that exits before publishing loses the products it only
+        held in memory, so a loaded version can lag behind the table.
+        """
+        count, max_id = db.query(func.count(models.Product.id), func.max(models.Product.id)).one()
+        with self._lock:
+            product_index = self.product_index
+        if count == len(product_index) and (max_id is None or max_id in product_index):
+            return 0
+
+        rows = db.query(
+            models.Product.id,
+            models.Product.name,
+            models.Product.description,
+            models.Product.category,
+            models.Product.tags
+        ).order_by(models.Product.id)
+        texts = {row[0]: product_text(*row[1:]) for row in rows if row[0] not in product_index}
+        self._add(texts)
+        return len(texts)
+
+    def _schedule_publish(self):
+        if self.publish_delay <= 0:
+            self.save()
+            return
+        with self._lock:
+            # Later additions ride along with the pending publish
+            if self._publish_timer is None:
+                self._publish_timer = threading.Timer(self.publish_delay, self._publish_pending)
+                self._publish_timer.daemon = True
+                self._publish_timer.start()
+
+    def _publish_pending(self):
+        with self._lock:
+            self._publish_timer = None
+        self.save()
+
+    def flush(self):
+        """Publish pending additions now, e.g. at shutdown"""
+        with self._lock:
+            timer, self._publish_timer = self._publish_timer, None
+            pending = bool(self._unpublished)
+        if timer is not None:
+            timer.cancel()
+        if pending:
+            self.save()
+
+    def refit_in_background(self):
+        """Refit from the catalog and publish in a thread, unless one is already running"""
+        with self._lock:
+            if self._refit_thread is not None and self._refit_thread.is_alive():
+                return
+            self._refit_thread = threading.Thread(target=self._refit, daemon=True)
+            self._refit_thread.start()
+
+    def _refit(self):
+        db = SessionLocal()
+        try:
+            self.fit(db)
+            self.save()
+        except Exception as e:
+            print(f"Error refitting content model: {e}")
+        finally:
+            db.close()
+
+    def save(self):
+        """Publish the feature matrix, IDF weights and vocabulary"""
+        with self._lock:
+            if self.vectorizer is None:
+                return
+            vectorizer, feature_matrix = self.vectorizer, self.feature_matrix
+            product_ids, added_since_fit = self.product_ids, self.added_since_fit
+            published = [pid for pid in self._unpublished if pid in self.product_index]
+
+        # Written outside the lock so requests keep scoring meanwhile
+        vocabulary = {term: int(idx) for term, idx in vectorizer.vocabulary_.items()}
+        version = publish(
+            self.artifact_name,
+            {
+                "data": feature_matrix.data,
+                "indices": feature_matrix.indices,
+                "indptr": feature_matrix.indptr,
+                "idf": vectorizer.idf_,
+                "product_ids": np.array(product_ids, dtype=np.int64)
+            },
+            {
+                "shape": list(feature_matrix.shape),
+                "vocabulary": vocabulary,
+                "added_since_fit": added_since_fit
+            },
+            self.model_dir
+        )
+        with self._lock:
+            self.artifact_version = version
+            for pid in published:
+                self._unpublished.pop(pid, None)
+
+    def load(self, db: Optional[Session] = None) -> bool:
+        """Memory-map the published model; returns False if none exists.
+
+        Given a session, products missing from the published version are
+        added as well (see `catch_up`).
+        """
+        artifact = load_artifact(self.artifact_name, self.model_dir)
+        if artifact is None:
+            return False
+
+        vectorizer = TfidfVectorizer(vocabulary=artifact.meta["vocabulary"], stop_words='english')
+        vectorizer.idf_ = np.asarray(artifact["idf"])
+        product_ids = artifact["product_ids"].tolist()
+        feature_matrix = sparse.csr_matrix(
+            (artifact["data"], artifact["indices"], artifact["indptr"]),
+            shape=tuple(artifact.meta["shape"])
+        )
+        with self._lock:
+            self.vectorizer = vectorizer
+            self.feature_matrix = feature_matrix
+            self.product_ids = product_ids
+            self.product_index = {pid: idx for idx, pid in enumerate(product_ids)}
+            self.added_since_fit = artifact.meta.get("added_since_fit", 0)
+            self.ann = None
+            self.artifact_version = artifact.version
+            self.version += 1
+            # Another worker's version may not have this process's newest products yet
+            self._reapply_unpublished()
+        if db is not None:
+            self.catch_up(db)
+        return True
+
+    def refresh(self) -> bool:
+        return self.load()
+
+    def _user_profile(self, feature_matrix: sparse.csr_matrix, interacted_indices: np.ndarray) -> Optional[np.ndarray]:
+        """Unit-length mean of the user's product vectors"""
+        if feature_matrix is None or len(interacted_indices) == 0:
+            return None
+
+        user_profile = np.asarray(feature_matrix[interacted_indices].mean(axis=0)).ravel()
+        norm = np.linalg.norm(user_profile)
+        if norm == 0:
+            return None
+        return user_profile / norm
+
+    def _interacted_indices(self, product_index: Dict[int, int], interacted_product_ids: List[int]) -> np.ndarray:
+        return np.array(
+            [product_index[pid] for pid in interacted_product_ids if pid in product_index],
+            dtype=np.int64
+        )
+
+    def user_scores(self, interacted_product_ids: List[int]):
+        """Cosine similarity of every product to the mean of the user's products.
+
+        Returns (scores, interacted row indices, product ids), or empty
+        arrays if none of the products are in the model.
+        """
+        with self._lock:
+            feature_matrix = self.feature_matrix
+            product_ids = self.product_ids
+            product_index = self.product_index
+
+        interacted_indices = self._interacted_indices(product_index, interacted_product_ids)
+        user_profile = self._user_profile(feature_matrix, interacted_indices)
+        if user_profile is None:
+            return np.array([]), interacted_indices, product_ids
+
+        # Rows are L2-normalized, so one mat-vec gives cosine similarity
+        scores = feature_matrix @ user_profile
+        return np.asarray(scores).ravel(), interacted_indices, product_ids
+
+    def user_scores_batch(
+        self,
+        interacted_product_ids: List[List[int]],
+        candidate_ids: Optional[List[int]] = None
+    ) -> Tuple[np.ndarray, sparse.csr_matrix, List[int]]:
+        """Score every product for a block of users with one matrix-matrix product.
+
+        Returns (B x P scores, B x P interaction indicator, product ids).
+        With `candidate_ids` only those products are scored, in that order;
+        ones the model doesn't know score 0.
+        """
+        with self._lock:
+            feature_matrix = self.feature_matrix
+            product_ids = self.product_ids
+            product_index = self.product_index
+
+        num_products = len(product_ids)
+        rows, cols = [], []
+        for row, user_product_ids in enumerate(interacted_product_ids):
+            for pid in user_product_ids:
+                idx = product_index.get(pid)
+                if idx is not None:
+                    rows.append(row)
+                    cols.append(idx)
+
+        interacted = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(len(interacted_product_ids), num_products)
+        )
+        columns = None
+        if candidate_ids is not None:
+            columns = np.fromiter((product_index.get(pid, -1) for pid in candidate_ids), dtype=np.int64, count=len(candidate_ids))
+            known = columns >= 0
+            seen = interacted[:, np.where(known, columns, 0)].multiply(known.astype(np.float32)).tocsr()
+        if feature_matrix is None or num_products == 0:
+            if columns is not None:
+                return np.zeros(seen.shape, dtype=np.float32), seen, candidate_ids
+            return np.zeros(interacted.shape, dtype=np.float32), interacted, product_ids
+
+        # Mean of each user's product vectors, then L2-normalize the profiles
+        counts = np.asarray(interacted.sum(axis=1)).ravel()
+        counts[counts == 0] = 1.0
+        profiles = np.asarray((sparse.diags(1.0 / counts) @ interacted @ feature_matrix).todense())
+        norms = np.linalg.norm(profiles, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        profiles = (profiles / norms).T
+
+        if columns is not None:
+            # Only the candidates' rows of the matrix take part in the product
+            scores = np.zeros(seen.shape, dtype=np.float32)
+            scores[:, known] = np.asarray(feature_matrix[columns[known]] @ profiles).T
+            return scores, seen, candidate_ids
+
+        scores = np.asarray(feature_matrix @ profiles).T
+        return scores, interacted, product_ids
+
+    def search(self, interacted_product_ids: List[int], n: int) -> List[Tuple[int, float]]:
+        """Top-n products closest to the user's profile via the ANN index"""
+        with self._lock:
+            if self.ann is None and self.feature_matrix is not None:
+                self.ann = self._build_ann(self.feature_matrix)
+            feature_matrix = self.feature_matrix
+            product_ids = self.product_ids
+            product_index = self.product_index
+            ann = self.ann
+
+        interacted_indices = self._interacted_indices(product_index, interacted_product_ids)
+        user_profile = self._user_profile(feature_matrix, interacted_indices)
+        if user_profile is None:
+            return []
+
+        # Over-fetch so excluding already interacted products still leaves n
+        exclude = set(interacted_indices.tolist())
+        indices, scores = ann.search(user_profile, n + len(exclude))
+
+        recommendations = []
+        for idx, score in zip(indices, scores):
+            if idx in exclude or score <= 0 or idx >= len(product_ids):
+                continue
+            recommendations.append((product_ids[idx], float(score)))
+            if len(recommendations) == n:
+                break
+        return recommendations
+
+# Shared by every request handled by this process
+content_model = ContentModel()
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+EXPLANATION_CACHE_SIZE = int(os.getenv("EXPLANATION_CACHE_SIZE", "1024"))
+EXPLANATION_CACHE_TTL = float(os.getenv("EXPLANATION_CACHE_TTL", "3600"))
+EXPLANATION_CACHE_DB = os.getenv("EXPLANATION_CACHE_DB", "")  # empty = memory only
+
+def make_key(**inputs) -> str:
+    """Stable hash of prompt inputs, insensitive to case and surrounding whitespace"""
+    normalized = {
+        name: " ".join(value.lower().split()) if isinstance(value, str) else value
+        for name, value in inputs.items()
+    }
+    payload = json.dumps(normalized, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ExplanationCache:
+    """Bounded LRU + TTL cache for generated explanations.
+
+    Entries live in memory up to `max_entries`; if `db_path` is set they are
+    also written to a SQLite file so they survive restarts. Disk hits are
+    promoted back into memory.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = EXPLANATION_CACHE_SIZE,
+        ttl_seconds: float = EXPLANATION_CACHE_TTL,
+        db_path: Optional[str] = EXPLANATION_CACHE_DB
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS explanations (key TEXT PRIMARY KEY, value TEXT, created_at REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS ix_explanations_created_at ON explanations (created_at)")
+            self._db.commit()
+        self._writes = 0
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, created_at = entry
+                if now - created_at < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created_at FROM explanations WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and now - row[1] < self.ttl_seconds:
+                    self._store(key, row[0], row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: str):
+        created_at = time.time()
+        with self._lock:
+            self._store(key, value, created_at)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO explanations (key, value, created_at) VALUES (?, ?, ?)",
+                    (key, value, created_at)
+                )
+                # Drop expired rows occasionally so the file doesn't grow forever
+                self._writes += 1
+                if self._writes % 256 == 0:
+                    self._db.execute("DELETE FROM explanations WHERE created_at < ?", (created_at - self.ttl_seconds,))
+                self._db.commit()
+
+    def _store(self, key: str, value: str, created_at: float):
+        self._entries[key] = (value, created_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM explanations")
+                self._db.commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "persistent": self._db is not None
+            }
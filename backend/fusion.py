@@ -0,0 +1,178 @@
+import os
+import threading
+import numpy as np
+from scipy import sparse
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from ranking import top_k
+
+load_dotenv()
+
+FUSION_METHOD = os.getenv("FUSION_METHOD", "weighted")  # weighted or rrf
+FUSION_NORMALIZATION = os.getenv("FUSION_NORMALIZATION", "minmax")  # minmax, rank or none
+FUSION_WEIGHTS = os.getenv("FUSION_WEIGHTS", "collaborative:0.6,content:0.4")
+# Products each source proposes per user (candidate generation); rank-based
+# fusion (rank normalization, rrf) only ranks that many per source
+FUSION_CANDIDATES = int(os.getenv("FUSION_CANDIDATES", "100"))
+FUSION_RRF_K = float(os.getenv("FUSION_RRF_K", "60"))
+
+# (B x P scores, B x P already-interacted indicator, product ids) as returned
+# by the models' score_batch / user_scores_batch
+SourceScores = Tuple[np.ndarray, sparse.csr_matrix, List[int]]
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    """"collaborative:0.6,content:0.4" -> {"collaborative": 0.6, "content": 0.4}"""
+    weights = {}
+    for part in spec.split(","):
+        if part.strip():
+            name, _, weight = part.partition(":")
+            weights[name.strip()] = float(weight)
+    return weights
+
+class ScoreFusion:
+    """Blend several scorers' catalog-wide score blocks into one ranking.
+
+    Every source's B x P score block is scattered onto a shared catalog
+    axis (the column mapping is cached per model version), already
+    interacted products are masked, and the sources are combined with one
+    vectorized operation over the whole block:
+
+    - weighted + minmax/none: min-max (or raw) scores per user, weighted sum
+    - weighted + rank, or rrf: each source's top FUSION_CANDIDATES are
+      ranked and only those get a fused score
+
+    The final top-n per user is re-ranked from the fused block. The hybrid
+    recommender passes blocks over each user's generated candidates only,
+    so the cost stays flat as the catalog grows.
+    """
+
+    def __init__(
+        self,
+        weights: Optional[Dict[str, float]] = None,
+        method: str = FUSION_METHOD,
+        normalization: str = FUSION_NORMALIZATION,
+        candidates: int = FUSION_CANDIDATES,
+        rrf_k: float = FUSION_RRF_K
+    ):
+        if method not in ("weighted", "rrf"):
+            raise ValueError(f"Unknown fusion method: {method}")
+        if normalization not in ("minmax", "rank", "none"):
+            raise ValueError(f"Unknown score normalization: {normalization}")
+        self.weights = weights if weights is not None else parse_weights(FUSION_WEIGHTS)
+        self.method = method
+        self.normalization = normalization
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        self._alignments: Dict[Tuple[int, ...], Tuple] = {}
+        self._lock = threading.Lock()
+
+    def _align(self, id_lists: List[List[int]]) -> Tuple[np.ndarray, List[np.ndarray]]:
+        """Union catalog of the sources' product ids and each source's column positions in it.
+
+        Models replace (never mutate) their product id lists when they
+        change, so the lists' identities key the cache.
+        """
+        key = tuple(id(ids) for ids in id_lists)
+        with self._lock:
+            cached = self._alignments.get(key)
+            if cached is not None and all(a is b for a, b in zip(cached[0], id_lists)):
+                return cached[1], cached[2]
+
+        arrays = [np.asarray(ids, dtype=np.int64) for ids in id_lists]
+        catalog = np.unique(np.concatenate(arrays)) if arrays else np.array([], dtype=np.int64)
+        positions = [np.searchsorted(catalog, array) for array in arrays]
+        with self._lock:
+            if len(self._alignments) >= 8:
+                self._alignments.clear()
+            self._alignments[key] = (list(id_lists), catalog, positions)
+        return catalog, positions
+
+    def _contribution(self, scores: np.ndarray, valid: np.ndarray) -> np.ndarray:
+        """One source's 0-1 (or rrf) contribution per catalog column, before weighting"""
+        if self.method == "weighted" and self.normalization != "rank":
+            if self.normalization == "none":
+                return np.where(valid, scores, 0.0)
+            low = np.where(valid, scores, np.inf).min(axis=1, keepdims=True)
+            high = np.where(valid, scores, -np.inf).max(axis=1, keepdims=True)
+            # A user whose candidates all score the same gets 1 for each
+            span = np.where(high > low, high - low, 1.0)
+            scaled = np.where(high > low, (scores - low) / span, 1.0)
+            return np.where(valid, scaled, 0.0)
+
+        # Rank-based: only each source's top candidates are ranked
+        masked = np.where(valid, scores, -np.inf)
+        top = top_k(masked, self.candidates)
+        ranks = np.broadcast_to(np.arange(top.shape[1]), top.shape)
+        counts = valid.sum(axis=1, keepdims=True)
+        if self.method == "rrf":
+            values = 1.0 / (self.rrf_k + ranks + 1)
+        else:
+            values = 1.0 - ranks / np.maximum(np.minimum(counts, top.shape[1]), 1)
+        contribution = np.zeros(scores.shape, dtype=np.float32)
+        rows = np.arange(scores.shape[0])[:, None]
+        contribution[rows, top] = np.where(np.take_along_axis(valid, top, axis=1), values, 0.0)
+        return contribution
+
+    def fuse(self, sources: Dict[str, SourceScores], n: int) -> List[List[Tuple[int, float, str]]]:
+        """Top-n (product id, fused score, reason) per user row.
+
+        The reason names every source that has the product within its own
+        top n * 2 for that user, e.g. "collaborative_and_content". Only
+        products with a positive fused score are returned, so rows with no
+        positive score from any source come back empty (cold start).
+        """
+        names = [name for name, (scores, _, _) in sources.items() if scores.ndim == 2 and scores.shape[1]]
+        num_rows = next(iter(sources.values()))[0].shape[0] if sources else 0
+        if not names:
+            return [[] for _ in range(num_rows)]
+
+        catalog, positions = self._align([sources[name][2] for name in names])
+        aligned, valid = [], []
+        excluded = np.zeros((num_rows, len(catalog)), dtype=bool)
+        for name, columns in zip(names, positions):
+            scores, seen, _ = sources[name]
+            block = np.zeros((num_rows, len(catalog)), dtype=np.float32)
+            block[:, columns] = scores
+            aligned.append(block)
+            seen = seen.tocoo()
+            excluded[seen.row, columns[seen.col]] = True
+
+        # Only positive, not yet interacted scores are signal
+        for block in aligned:
+            valid.append((block > 0) & ~excluded)
+
+        fused = np.zeros((num_rows, len(catalog)), dtype=np.float32)
+        for name, block, mask in zip(names, aligned, valid):
+            fused += self.weights.get(name, 1.0) * self._contribution(block, mask)
+        # Products that fuse to nothing carry no signal, e.g. a source's weakest
+        # candidate under min-max or one outside every source's ranked candidates
+        candidate = np.logical_or.reduce(valid) & (fused > 0)
+        fused[~candidate] = -np.inf
+
+        # Re-rank: top-n of the fused block, then attribute each pick
+        top = top_k(fused, n)
+        credit_k = min(n * 2, len(catalog))
+        thresholds = [
+            -np.partition(-np.where(mask, block, -np.inf), credit_k - 1, axis=1)[:, credit_k - 1]
+            for block, mask in zip(aligned, valid)
+        ]
+
+        results = []
+        for row in range(num_rows):
+            recs = []
+            for col in top[row]:
+                score = fused[row, col]
+                if not np.isfinite(score):
+                    break
+                credited = [
+                    name for name, block, mask, threshold in zip(names, aligned, valid, thresholds)
+                    if mask[row, col] and block[row, col] >= threshold[row]
+                ]
+                if not credited:
+                    credited = [name for name, mask in zip(names, valid) if mask[row, col]][:1]
+                recs.append((int(catalog[col]), float(score), "_and_".join(credited)))
+            results.append(recs)
+        return results
+
+# Shared by every request handled by this process
+score_fusion = ScoreFusion()
@@ -0,0 +1,160 @@
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from dotenv import load_dotenv
+from sqlalchemy.orm import Session
+import models
+from database import SessionLocal
+from recommender import record_interactions
+
+load_dotenv()
+
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "500"))
+INGEST_FLUSH_INTERVAL = float(os.getenv("INGEST_FLUSH_INTERVAL", "1.0"))
+INGEST_MAX_PENDING = int(os.getenv("INGEST_MAX_PENDING", "20000"))
+
+class BufferFullError(Exception):
+    """Raised when the write buffer is at capacity; callers should retry later"""
+
+def interaction_row(interaction) -> Dict:
+    """Insert mapping for a `UserInteractionCreate`, stamped with the receive time"""
+    row = interaction.model_dump()
+    row["timestamp"] = datetime.utcnow()
+    return row
+
+def write_interactions(db: Session, rows: List[Dict], on_commit: Optional[Callable[[List[Dict]], None]] = record_interactions):
+    """Insert interaction rows in one transaction, then update the in-memory models"""
+    if not rows:
+        return
+    db.bulk_insert_mappings(models.UserInteraction, rows)
+    db.commit()
+    if on_commit is not None:
+        on_commit(rows)
+
+class InteractionWriteBuffer:
+    """In-process buffer that coalesces single interaction events into bulk inserts.
+
+    Events are flushed by a background thread once `batch_size` are pending or
+    `flush_interval` seconds have passed. When `max_pending` events are waiting,
+    `submit` raises BufferFullError instead of growing without bound.
+
+    Durability: an accepted event is only in memory until its batch commits, so
+    a crash can lose up to `max_pending` events, and a batch that fails to insert
+    is dropped and counted in `failed`. Use a direct or bulk insert when every
+    event must be persisted before the request returns.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        batch_size: int = INGEST_BATCH_SIZE,
+        flush_interval: float = INGEST_FLUSH_INTERVAL,
+        max_pending: int = INGEST_MAX_PENDING,
+        on_commit: Optional[Callable[[List[Dict]], None]] = record_interactions
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.on_commit = on_commit
+        self._pending: List[Dict] = []
+        self._lock = threading.Lock()
+        # Serializes flushes so batches are committed in submission order
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.accepted = 0
+        self.written = 0
+        self.failed = 0
+        self.rejected = 0
+        self.flushes = 0
+
+    def submit(self, row: Dict):
+        self.submit_many([row])
+
+    def submit_many(self, rows: List[Dict]):
+        """Queue rows for the next flush, or raise BufferFullError if there is no room"""
+        with self._lock:
+            if len(self._pending) + len(rows) > self.max_pending:
+                self.rejected += len(rows)
+                self._wake.set()
+                raise BufferFullError(f"{len(self._pending)} interactions already pending")
+            self._pending.extend(rows)
+            self.accepted += len(rows)
+            if len(self._pending) >= self.batch_size:
+                self._wake.set()
+        self._ensure_started()
+
+    def flush(self) -> int:
+        """Write everything pending now; returns the number of rows written"""
+        with self._flush_lock:
+            with self._lock:
+                rows, self._pending = self._pending, []
+            written = 0
+            for start in range(0, len(rows), self.batch_size):
+                batch = rows[start:start + self.batch_size]
+                db = self.session_factory()
+                try:
+                    write_interactions(db, batch, on_commit=None)
+                except Exception as e:
+                    db.rollback()
+                    self.failed += len(batch)
+                    print(f"Error flushing {len(batch)} buffered interactions: {e}")
+                    continue
+                finally:
+                    db.close()
+
+                written += len(batch)
+                if self.on_commit is not None:
+                    try:
+                        self.on_commit(batch)
+                    except Exception as e:
+                        print(f"Error updating models after interaction flush: {e}")
+            if rows:
+                self.written += written
+                self.flushes += 1
+            return written
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._stopping.clear()
+                    self._thread = threading.Thread(target=self._run, name="interaction-buffer", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def stop(self):
+        """Stop the flush thread and write whatever is still pending"""
+        thread = self._thread
+        if thread is not None:
+            self._stopping.set()
+            self._wake.set()
+            thread.join()
+            self._thread = None
+        self.flush()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "pending": pending,
+            "accepted": self.accepted,
+            "written": self.written,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "flushes": self.flushes,
+            "batch_size": self.batch_size,
+            "flush_interval": self.flush_interval,
+            "max_pending": self.max_pending
+        }
+
+# Shared by every request handled by this process
+interaction_buffer = InteractionWriteBuffer()
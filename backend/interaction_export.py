@@ -0,0 +1,63 @@
+import csv
+import io
+import json
+import os
+from typing import Iterator, Optional
+from dotenv import load_dotenv
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+import models
+
+load_dotenv()
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "5000"))
+
+EXPORT_COLUMNS = ["id", "user_id", "product_id", "interaction_type", "rating", "timestamp"]
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+def _ndjson_chunk(rows) -> str:
+    return "".join(
+        json.dumps(dict(zip(EXPORT_COLUMNS, row)), default=lambda value: value.isoformat()) + "\n"
+        for row in rows
+    )
+
+def _csv_chunk(rows, header: bool = False) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    writer.writerows(
+        [value.isoformat() if hasattr(value, "isoformat") else value for value in row]
+        for row in rows
+    )
+    return buffer.getvalue()
+
+def export_interactions(
+    db: Session,
+    format: str = "ndjson",
+    user_id: Optional[int] = None,
+    after_id: Optional[int] = None,
+    batch_size: int = EXPORT_BATCH_SIZE
+) -> Iterator[str]:
+    """Yield interactions in id order as NDJSON or CSV text, one chunk per batch.
+
+    Rows are fetched with `yield_per` (a server-side cursor where the driver
+    supports one), so memory stays bounded by `batch_size` whatever the table
+    size. `after_id` resumes an interrupted export.
+    """
+    stmt = select(*[getattr(models.UserInteraction, column) for column in EXPORT_COLUMNS])
+    if user_id is not None:
+        stmt = stmt.where(models.UserInteraction.user_id == user_id)
+    if after_id is not None:
+        stmt = stmt.where(models.UserInteraction.id > after_id)
+    stmt = stmt.order_by(models.UserInteraction.id).execution_options(yield_per=batch_size)
+
+    if format == "csv":
+        yield _csv_chunk([], header=True)
+
+    for rows in db.execute(stmt).partitions():
+        yield _csv_chunk(rows) if format == "csv" else _ndjson_chunk(rows)
@@ -0,0 +1,247 @@
+import os
+import threading
+import numpy as np
+from scipy import sparse
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+import models
+
+load_dotenv()
+
+# Fold per-user deltas into the CSR matrix after this many events
+STORE_COMPACT_EVERY = int(os.getenv("STORE_COMPACT_EVERY", "10000"))
+
+# Create interaction scores
+INTERACTION_WEIGHTS = {
+    'view': 1,
+    'click': 2,
+    'cart': 3,
+    'wishlist': 4,
+    'purchase': 5
+}
+
+def interaction_weight(interaction_type: str, rating: Optional[float] = None) -> float:
+    """Weight of a single interaction event in the user-item matrix"""
+    weight = INTERACTION_WEIGHTS.get(interaction_type, 1)
+
+    if rating:
+        weight *= rating / 5.0
+
+    return float(weight)
+
+class InteractionStore:
+    """Process-wide sparse user-item interaction matrix.
+
+    The matrix is built once from the `user_interactions` table and then kept
+    up to date by `add_interaction`, so recommendation requests never have to
+    reload the full interaction history. New events go into a per-user delta:
+    `user_row` merges one user's delta with their CSR row in O(user history),
+    and the deltas are folded into the CSR matrix only when the full matrix
+    is read or `compact_every` events have accumulated.
+    """
+
+    def __init__(self, compact_every: int = STORE_COMPACT_EVERY):
+        self._lock = threading.RLock()
+        self.compact_every = compact_every
+        # Monotonic count of events folded in, used to detect stale derived
+        # models. Never reset, not even by `load`: models built before a
+        # reload compare their built version with it (ALSModel._user_vector,
+        # is_stale), so a reset would make newer events look already trained on.
+        self.version = 0
+        self.reset()
+
+    def reset(self):
+        """Drop all state; the next `ensure_loaded` call reloads from the database"""
+        with self._lock:
+            self.user_ids: List[int] = []
+            self.product_ids: List[int] = []
+            self.user_index: Dict[int, int] = {}
+            self.product_index: Dict[int, int] = {}
+            self._matrix = sparse.csr_matrix((0, 0), dtype=np.float32)
+            # row index -> {column index: summed weight} not yet in _matrix
+            self._pending: Dict[int, Dict[int, float]] = {}
+            self._pending_count = 0
+            # row index -> store version of the user's latest incremental event
+            self._user_versions: Dict[int, int] = {}
+            # Highest interaction id read by `load` (every row up to it is in
+            # the store) and each loaded user's newest interaction id. Unlike
+            # versions, ids mean the same in every process.
+            self.max_id = 0
+            self._last_ids = np.zeros(0, dtype=np.int64)
+            self.loaded = False
+
+    def _user_idx(self, user_id: int) -> int:
+        idx = self.user_index.get(user_id)
+        if idx is None:
+            idx = len(self.user_ids)
+            self.user_index[user_id] = idx
+            self.user_ids.append(user_id)
+        return idx
+
+    def _product_idx(self, product_id: int) -> int:
+        idx = self.product_index.get(product_id)
+        if idx is None:
+            idx = len(self.product_ids)
+            self.product_index[product_id] = idx
+            self.product_ids.append(product_id)
+        return idx
+
+    def _append(self, user_id: int, product_id: int, interaction_type: str, rating: Optional[float]):
+        user_idx = self._user_idx(user_id)
+        row = self._pending.setdefault(user_idx, {})
+        col = self._product_idx(product_id)
+        row[col] = row.get(col, 0.0) + interaction_weight(interaction_type, rating)
+        self._pending_count += 1
+        self.version += 1
+        self._user_versions[user_idx] = self.version
+
+    def load(self, db: Session, batch_size: int = 10000, max_id: Optional[int] = None):
+        """Build the matrix from every stored interaction (up to `max_id` if given).
+
+        `version` keeps counting from where it was rather than restarting.
+        """
+        with self._lock:
+            self.reset()
+            query = db.query(
+                models.UserInteraction.id,
+                models.UserInteraction.user_id,
+                models.UserInteraction.product_id,
+                models.UserInteraction.interaction_type,
+                models.UserInteraction.rating
+            )
+            if max_id is not None:
+                query = query.filter(models.UserInteraction.id <= max_id)
+
+            ids, rows, cols, vals = [], [], [], []
+            for interaction_id, user_id, product_id, interaction_type, rating in query.yield_per(batch_size):
+                ids.append(interaction_id)
+                rows.append(self._user_idx(user_id))
+                cols.append(self._product_idx(product_id))
+                vals.append(interaction_weight(interaction_type, rating))
+
+            self._last_ids = np.zeros(len(self.user_ids), dtype=np.int64)
+            if ids:
+                ids = np.asarray(ids, dtype=np.int64)
+                np.maximum.at(self._last_ids, np.asarray(rows, dtype=np.int64), ids)
+                self.max_id = int(ids.max())
+
+            # Duplicate (user, product) pairs are summed
+            self._matrix = sparse.coo_matrix(
+                (np.asarray(vals, dtype=np.float32), (np.asarray(rows, dtype=np.int32), np.asarray(cols, dtype=np.int32))),
+                shape=(len(self.user_ids), len(self.product_ids))
+            ).tocsr()
+            self.version += len(vals)
+            self.loaded = True
+
+    @classmethod
+    def from_matrix(cls, matrix: sparse.spmatrix, user_ids: Optional[List[int]] = None, product_ids: Optional[List[int]] = None) -> "InteractionStore":
+        """Build a store around an existing matrix (used by benchmarks and offline jobs)"""
+        store = cls()
+        matrix = sparse.csr_matrix(matrix, dtype=np.float32)
+        store.user_ids = list(user_ids) if user_ids is not None else list(range(1, matrix.shape[0] + 1))
+        store.product_ids = list(product_ids) if product_ids is not None else list(range(1, matrix.shape[1] + 1))
+        store.user_index = {uid: idx for idx, uid in enumerate(store.user_ids)}
+        store.product_index = {pid: idx for idx, pid in enumerate(store.product_ids)}
+        store._matrix = matrix
+        store.version = int(matrix.nnz)
+        store.loaded = True
+        return store
+
+    def ensure_loaded(self, db: Session):
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self.load(db)
+
+    def add_interaction(self, user_id: int, product_id: int, interaction_type: str, rating: Optional[float] = None):
+        """Record a newly committed interaction without reloading the table"""
+        with self._lock:
+            if not self.loaded:
+                # Nothing to update yet; the first load will pick the row up
+                return
+            self._append(user_id, product_id, interaction_type, rating)
+            if self._pending_count >= self.compact_every:
+                self._flush()
+
+    def _flush(self):
+        """Fold the per-user deltas into the CSR matrix (duplicates are summed)"""
+        shape = (len(self.user_ids), len(self.product_ids))
+
+        if not self._pending:
+            if self._matrix.shape != shape:
+                # Resize a copy so readers holding the old matrix are unaffected
+                matrix = self._matrix.copy()
+                matrix.resize(shape)
+                self._matrix = matrix
+            return
+
+        rows, cols, vals = [], [], []
+        for row, deltas in self._pending.items():
+            rows.extend([row] * len(deltas))
+            cols.extend(deltas.keys())
+            vals.extend(deltas.values())
+
+        pending = sparse.coo_matrix(
+            (
+                np.asarray(vals, dtype=np.float32),
+                (np.asarray(rows, dtype=np.int32), np.asarray(cols, dtype=np.int32))
+            ),
+            shape=shape
+        ).tocsr()
+
+        matrix = self._matrix
+        if matrix.shape != shape:
+            matrix = matrix.copy()
+            matrix.resize(shape)
+
+        self._matrix = (matrix + pending).tocsr()
+        self._pending = {}
+        self._pending_count = 0
+
+    @property
+    def matrix(self) -> sparse.csr_matrix:
+        with self._lock:
+            self._flush()
+            return self._matrix
+
+    def user_row(self, user_id: int) -> Optional[sparse.csr_matrix]:
+        """1 x P sparse row of a user's interaction weights, or None if unknown"""
+        with self._lock:
+            idx = self.user_index.get(user_id)
+            if idx is None:
+                return None
+
+            num_products = len(self.product_ids)
+            weights: Dict[int, float] = {}
+            if idx < self._matrix.shape[0]:
+                start, end = self._matrix.indptr[idx], self._matrix.indptr[idx + 1]
+                weights = dict(zip(self._matrix.indices[start:end].tolist(), self._matrix.data[start:end].tolist()))
+            for col, weight in self._pending.get(idx, {}).items():
+                weights[col] = weights.get(col, 0.0) + weight
+
+        cols = np.array(sorted(weights), dtype=np.int32)
+        data = np.array([weights[col] for col in cols.tolist()], dtype=np.float32)
+        return sparse.csr_matrix((data, cols, np.array([0, len(cols)])), shape=(1, num_products))
+
+    def user_version(self, user_id: int) -> int:
+        """Store version when the user's row last changed (0 if only loaded)"""
+        with self._lock:
+            idx = self.user_index.get(user_id)
+            return self._user_versions.get(idx, 0) if idx is not None else 0
+
+    def user_last_id(self, user_id: int) -> int:
+        """Id of the user's newest loaded interaction (0 if none); see `user_version` for later events"""
+        with self._lock:
+            idx = self.user_index.get(user_id)
+            return int(self._last_ids[idx]) if idx is not None and idx < len(self._last_ids) else 0
+
+    def user_product_ids(self, user_id: int) -> List[int]:
+        """Products the user has interacted with"""
+        row = self.user_row(user_id)
+        if row is None:
+            return []
+        return [self.product_ids[idx] for idx in row.indices]
+
+# Shared by every request handled by this process
+interaction_store = InteractionStore()
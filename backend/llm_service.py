@@ -1,38 +1,65 @@
+import asyncio
+import json
 import os
-from openai import OpenAI
-from typing import Dict
+from functools import lru_cache
+from openai import OpenAI, AsyncOpenAI
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from dotenv import load_dotenv
+from explanation_cache import ExplanationCache, make_key
+from metrics import Metrics, metrics
+import models
 
 load_dotenv()
 
+LLM_MODEL = "gpt-3.5-turbo"
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "5"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "10"))
+
 class LLMService:
-    def __init__(self):
+    def __init__(
+        self,
+        cache: Optional[ExplanationCache] = None,
+        explanation_mode: str = "concurrent",
+        instrumentation: Optional[Metrics] = None
+    ):
+        self.cache = cache or ExplanationCache()
+        self.metrics = instrumentation or metrics
+        self.explanation_mode = explanation_mode
+        self.concurrency = LLM_CONCURRENCY
+        self.timeout = LLM_TIMEOUT
         api_key = os.getenv("OPENAI_API_KEY")
         if api_key:
-            self.client = OpenAI(api_key=api_key)
+            # OPENAI_BASE_URL lets a local stub server stand in for the API
+            base_url = os.getenv("OPENAI_BASE_URL") or None
+            self.client = OpenAI(api_key=api_key, base_url=base_url, timeout=self.timeout)
+            self.async_client = AsyncOpenAI(api_key=api_key, base_url=base_url, timeout=self.timeout)
             self.enabled = True
         else:
             self.client = None
+            self.async_client = None
             self.enabled = False
     
-    def generate_explanation(
-        self, 
-        product_name: str, 
+    def _prepare(
+        self,
+        product_name: str,
         product_description: str,
         product_category: str,
         user_behavior: Dict,
         recommendation_reason: str
-    ) -> str:
-        """Generate LLM-powered explanation for why a product is recommended"""
-        
-        if not self.enabled:
-            return self._generate_fallback_explanation(
-                product_name, product_category, user_behavior, recommendation_reason
-            )
-        
+    ) -> Tuple[str, List[Dict]]:
+        """Cache key and chat messages for one explanation"""
         # Build context from user behavior
         behavior_context = self._build_behavior_context(user_behavior)
         
+        cache_key = make_key(
+            model=LLM_MODEL,
+            product_name=product_name,
+            product_description=product_description,
+            product_category=product_category,
+            behavior_context=behavior_context,
+            recommendation_reason=recommendation_reason
+        )
+        
         # Create prompt for LLM
         prompt = f"""You are a helpful e-commerce assistant. Explain why we're recommending this product to the user in a friendly, concise way (2-3 sentences max).
 
@@ -48,24 +75,269 @@ Recommendation Method: {recommendation_reason}
 
 Generate a personalized explanation for why this product is recommended to this user. Make it engaging and highlight the connection to their interests."""
 
-        try:
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "You are a helpful e-commerce recommendation assistant."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=150,
-                temperature=0.7
+        messages = [
+            {"role": "system", "content": "You are a helpful e-commerce recommendation assistant."},
+            {"role": "user", "content": prompt}
+        ]
+        return cache_key, messages
+    
+    def generate_explanation(
+        self, 
+        product_name: str, 
+        product_description: str,
+        product_category: str,
+        user_behavior: Dict,
+        recommendation_reason: str
+    ) -> str:
+        """Generate LLM-powered explanation for why a product is recommended"""
+        
+        if not self.enabled:
+            self.metrics.count_fallback("disabled")
+            return self._generate_fallback_explanation(
+                product_name, product_category, user_behavior, recommendation_reason
             )
+        
+        cache_key, messages = self._prepare(
+            product_name, product_description, product_category, user_behavior, recommendation_reason
+        )
+        
+        # Reuse an explanation generated for the same prompt inputs
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        try:
+            with self.metrics.time("llm_call"):
+                response = self.client.chat.completions.create(
+                    model=LLM_MODEL,
+                    messages=messages,
+                    max_tokens=150,
+                    temperature=0.7
+                )
+            self.metrics.count_llm_call("single", "success")
             
-            return response.choices[0].message.content.strip()
+            explanation = response.choices[0].message.content.strip()
+            self.cache.set(cache_key, explanation)
+            return explanation
         
         except Exception as e:
             print(f"LLM Error: {e}")
+            self.metrics.count_llm_call("single", "error")
+            self.metrics.count_fallback("error")
+            return self._generate_fallback_explanation(
+                product_name, product_category, user_behavior, recommendation_reason
+            )
+    
+    async def generate_explanation_async(
+        self,
+        product_name: str,
+        product_description: str,
+        product_category: str,
+        user_behavior: Dict,
+        recommendation_reason: str,
+        semaphore: Optional[asyncio.Semaphore] = None
+    ) -> str:
+        """Async variant of generate_explanation with a per-call deadline.
+
+        Falls back to the template explanation if the call fails or does not
+        finish within `self.timeout` seconds.
+        """
+        if not self.enabled:
+            self.metrics.count_fallback("disabled")
             return self._generate_fallback_explanation(
                 product_name, product_category, user_behavior, recommendation_reason
             )
+        
+        cache_key, messages = self._prepare(
+            product_name, product_description, product_category, user_behavior, recommendation_reason
+        )
+        
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        try:
+            async with semaphore or asyncio.Semaphore(1):
+                with self.metrics.time("llm_call"):
+                    response = await asyncio.wait_for(
+                        self.async_client.chat.completions.create(
+                            model=LLM_MODEL,
+                            messages=messages,
+                            max_tokens=150,
+                            temperature=0.7
+                        ),
+                        timeout=self.timeout
+                    )
+            self.metrics.count_llm_call("single", "success")
+            
+            explanation = response.choices[0].message.content.strip()
+            self.cache.set(cache_key, explanation)
+            return explanation
+        
+        except asyncio.TimeoutError:
+            print(f"LLM Error: no response within {self.timeout}s for {product_name}")
+            outcome = "timeout"
+        except Exception as e:
+            print(f"LLM Error: {e}")
+            outcome = "error"
+        
+        self.metrics.count_llm_call("single", outcome)
+        self.metrics.count_fallback(outcome)
+        return self._generate_fallback_explanation(
+            product_name, product_category, user_behavior, recommendation_reason
+        )
+    
+    async def generate_explanations(
+        self,
+        products: List[Tuple[models.Product, str]],
+        user_behavior: Dict
+    ) -> List[str]:
+        """Explain several (product, reason) pairs concurrently.
+
+        At most `self.concurrency` LLM calls are in flight at once; results
+        are returned in input order.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        return await asyncio.gather(*[
+            self.generate_explanation_async(
+                product_name=product.name,
+                product_description=product.description,
+                product_category=product.category,
+                user_behavior=user_behavior,
+                recommendation_reason=reason,
+                semaphore=semaphore
+            )
+            for product, reason in products
+        ])
+    
+    async def explain_all(
+        self,
+        products: List[Tuple[models.Product, str]],
+        user_behavior: Dict
+    ) -> List[str]:
+        """Explanations for a whole response using the configured mode"""
+        with self.metrics.time("explanations"):
+            if self.explanation_mode == "batch":
+                return await self.generate_explanations_batch(products, user_behavior)
+            return await self.generate_explanations(products, user_behavior)
+    
+    async def iter_explanations(
+        self,
+        products: List[Tuple[models.Product, str]],
+        user_behavior: Dict
+    ) -> AsyncIterator[Tuple[int, str]]:
+        """Yield (position, explanation) for each product as soon as it is ready"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        
+        async def explain(position: int, product: models.Product, reason: str) -> Tuple[int, str]:
+            explanation = await self.generate_explanation_async(
+                product_name=product.name,
+                product_description=product.description,
+                product_category=product.category,
+                user_behavior=user_behavior,
+                recommendation_reason=reason,
+                semaphore=semaphore
+            )
+            return position, explanation
+        
+        tasks = [explain(position, product, reason) for position, (product, reason) in enumerate(products)]
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    
+    async def generate_explanations_batch(
+        self,
+        products: List[Tuple[models.Product, str]],
+        user_behavior: Dict
+    ) -> List[str]:
+        """Explain several (product, reason) pairs with a single LLM call.
+
+        The behavior context is sent once and the model is asked for a JSON
+        array with one explanation per product. Cached explanations are
+        reused; any product missing from a malformed or partial reply gets
+        the template explanation.
+        """
+        fallbacks = [
+            self._generate_fallback_explanation(product.name, product.category, user_behavior, reason)
+            for product, reason in products
+        ]
+        if not self.enabled or not products:
+            self.metrics.count_fallback("disabled", len(products))
+            return fallbacks
+        
+        explanations: List[Optional[str]] = []
+        cache_keys = []
+        for product, reason in products:
+            cache_key, _ = self._prepare(
+                product.name, product.description, product.category, user_behavior, reason
+            )
+            cache_keys.append(cache_key)
+            explanations.append(self.cache.get(cache_key))
+        
+        pending = [i for i, explanation in enumerate(explanations) if explanation is None]
+        if not pending:
+            return explanations
+        
+        product_lines = "\n".join(
+            f"{number}. {products[i][0].name} ({products[i][0].category}) - {products[i][0].description} "
+            f"[method: {products[i][1]}]"
+            for number, i in enumerate(pending, start=1)
+        )
+        prompt = f"""You are a helpful e-commerce assistant. For each product below, explain why we're recommending it to the user in a friendly, concise way (2-3 sentences max).
+
+User Behavior:
+{self._build_behavior_context(user_behavior)}
+
+Products:
+{product_lines}
+
+Respond with only a JSON array of {len(pending)} strings, one explanation per product, in the same order."""
+
+        try:
+            with self.metrics.time("llm_batch_call"):
+                response = await asyncio.wait_for(
+                    self.async_client.chat.completions.create(
+                        model=LLM_MODEL,
+                        messages=[
+                            {"role": "system", "content": "You are a helpful e-commerce recommendation assistant."},
+                            {"role": "user", "content": prompt}
+                        ],
+                        max_tokens=150 * len(pending),
+                        temperature=0.7
+                    ),
+                    timeout=self.timeout
+                )
+            parsed = _parse_explanation_list(response.choices[0].message.content)
+            outcome = "success"
+        except asyncio.TimeoutError:
+            print(f"LLM Error: no batch response within {self.timeout}s")
+            parsed = []
+            outcome = "timeout"
+        except Exception as e:
+            print(f"LLM Error: {e}")
+            parsed = []
+            outcome = "error"
+        self.metrics.count_llm_call("batch", outcome)
+        
+        missing = 0
+        for position, i in enumerate(pending):
+            explanation = parsed[position] if position < len(parsed) else None
+            if explanation:
+                self.cache.set(cache_keys[i], explanation)
+                explanations[i] = explanation
+            else:
+                explanations[i] = fallbacks[i]
+                missing += 1
+        
+        # A reply that parsed but left products out is counted as malformed
+        self.metrics.count_fallback("malformed" if outcome == "success" else outcome, missing)
+        return explanations
+    
+    def cache_stats(self) -> Dict:
+        """Hit/miss counters of the explanation cache and the fallback memo"""
+        return {
+            "explanations": self.cache.stats(),
+            "fallback_templates": _fallback_template.cache_info()._asdict()
+        }
     
     def _build_behavior_context(self, user_behavior: Dict) -> str:
         """Build readable context from user behavior data"""
@@ -96,21 +368,54 @@ Generate a personalized explanation for why this product is recommended to this
         recommendation_reason: str
     ) -> str:
         """Generate rule-based explanation when LLM is not available"""
-        
-        if recommendation_reason == "popular":
-            return f"This {product_category} is highly rated and popular among our customers. It's a great choice to explore!"
-        
-        if recommendation_reason == "collaborative":
-            return f"Based on your shopping patterns, users with similar interests loved this {product_category}. We think you'll enjoy it too!"
-        
-        if recommendation_reason == "content":
-            categories = user_behavior.get("categories", [])
-            if categories:
-                top_cat = categories[0][0]
-                return f"Since you've shown interest in {top_cat}, this {product_category} matches your preferences perfectly!"
-            return f"This {product_category} aligns well with your browsing history and interests."
-        
-        if recommendation_reason == "collaborative_and_content":
-            return f"This {product_name} is a perfect match! It's popular among users like you and matches your interests in {product_category}."
-        
-        return f"We recommend this {product_category} based on your unique shopping profile and preferences."
+        # Only the top category of the behavior summary affects the text
+        categories = user_behavior.get("categories", [])
+        top_cat = categories[0][0] if categories else None
+        return _fallback_template(product_name, product_category, top_cat, recommendation_reason)
+
+def _parse_explanation_list(content: str) -> List[Optional[str]]:
+    """Read a JSON array of explanations from a model reply.
+
+    Tolerates Markdown code fences, surrounding prose and items given as
+    objects with an "explanation" field. Unusable items become None.
+    """
+    text = (content or "").strip()
+    start, end = text.find("["), text.rfind("]")
+    if start == -1 or end <= start:
+        return []
+    
+    try:
+        items = json.loads(text[start:end + 1])
+    except json.JSONDecodeError:
+        return []
+    
+    parsed = []
+    for item in items if isinstance(items, list) else []:
+        if isinstance(item, dict):
+            item = item.get("explanation")
+        parsed.append(item.strip() if isinstance(item, str) and item.strip() else None)
+    return parsed
+
+@lru_cache(maxsize=4096)
+def _fallback_template(
+    product_name: str,
+    product_category: str,
+    top_cat: Optional[str],
+    recommendation_reason: str
+) -> str:
+    """Rule-based explanation text, memoized on its hashable inputs"""
+    if recommendation_reason == "popular":
+        return f"This {product_category} is highly rated and popular among our customers. It's a great choice to explore!"
+    
+    if recommendation_reason == "collaborative":
+        return f"Based on your shopping patterns, users with similar interests loved this {product_category}. We think you'll enjoy it too!"
+    
+    if recommendation_reason == "content":
+        if top_cat:
+            return f"Since you've shown interest in {top_cat}, this {product_category} matches your preferences perfectly!"
+        return f"This {product_category} aligns well with your browsing history and interests."
+    
+    if recommendation_reason == "collaborative_and_content":
+        return f"This {product_name} is a perfect match! It's popular among users like you and matches your interests in {product_category}."
+    
+    return f"We recommend this {product_category} based on your unique shopping profile and preferences."
@@ -1,15 +1,33 @@
-from fastapi import FastAPI, Depends, HTTPException
+import os
+import time
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Literal, Optional
 import models
 import schemas
-from database import engine, get_db, Base
-from recommender import ProductRecommender
+from database import engine, get_db, Base, SessionLocal, USE_ASYNC_DB, count_queries
+from recommender import ProductRecommender, model_version, record_interaction, record_product
+from response_cache import cached_recommendations, recommendation_cache
+from neighbor_index import item_neighbor_index
+from content_model import content_model
+from als_model import als_model
+from model_artifacts import artifact_watcher
 from llm_service import LLMService
+from metrics import CONTENT_TYPE, metrics
+from migrations import run_migrations
+from consistency import check_models
+from pagination import NEXT_CURSOR_HEADER, keyset_page, set_next_cursor
+from interaction_export import EXPORT_MEDIA_TYPES, export_interactions
+from interaction_buffer import BufferFullError, interaction_buffer, interaction_row, write_interactions
 
-# Create database tables
+# Create database tables, then bring existing ones up to date
 Base.metadata.create_all(bind=engine)
+run_migrations(engine)
 
 app = FastAPI(
     title="E-commerce Product Recommender API",
@@ -24,10 +42,56 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+# Request latency, status and SQL statement count per route for /metrics;
+# not installed at all when METRICS_ENABLED is false
+if metrics.enabled:
+    @app.middleware("http")
+    async def record_request_metrics(request: Request, call_next):
+        start = time.perf_counter()
+        status = 500
+        with count_queries() as queries:
+            try:
+                response = await call_next(request)
+                status = response.status_code
+                return response
+            finally:
+                # Route templates keep the label set bounded; streamed bodies
+                # are timed until the response starts
+                route = request.scope.get("route")
+                metrics.observe_request(
+                    request.method,
+                    route.path if route is not None else "unmatched",
+                    status,
+                    time.perf_counter() - start,
+                    queries.count
+                )
+
+# "concurrent": one LLM call per product in parallel; "batch": one call per response
+LLM_EXPLANATION_MODE = os.getenv("LLM_EXPLANATION_MODE", "concurrent")
+
 # Initialize LLM service
-llm_service = LLMService()
+llm_service = LLMService(explanation_mode=LLM_EXPLANATION_MODE)
+app.state.llm_service = llm_service
+
+# Memory-map published model artifacts if they exist; otherwise each model
+# is built on first use. Every worker maps the same files, and the watcher
+# swaps in versions published later (e.g. by `python neighbor_index.py`)
+item_neighbor_index.load()
+_startup_db = SessionLocal()
+try:
+    # Also picks up products a previous process created but never published
+    content_model.load(_startup_db)
+finally:
+    _startup_db.close()
+als_model.load()
+artifact_watcher.watch(item_neighbor_index, content_model, als_model)
+
+@app.on_event("startup")
+def start_artifact_watcher():
+    artifact_watcher.start()
 
 @app.get("/")
 def read_root():
@@ -38,16 +102,36 @@ def read_root():
             "products": "/products",
             "users": "/users",
             "recommendations": "/recommendations/{user_id}",
-            "interactions": "/interactions"
+            "batch_recommendations": "/recommendations/batch",
+            "streaming_recommendations": "/recommendations/{user_id}/stream",
+            "interactions": "/interactions",
+            "bulk_interactions": "/interactions/bulk",
+            "metrics": "/metrics"
         }
     }
 
 # Product endpoints
 @app.get("/products", response_model=List[schemas.Product])
-def get_products(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    products = db.query(models.Product).offset(skip).limit(limit).all()
+def get_products(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    products = keyset_page(db.query(models.Product), models.Product.id, after_id, skip, limit).all()
+    set_next_cursor(response, products, limit)
     return products
 
+@app.get("/products/popular", response_model=List[schemas.ScoredProduct])
+def get_popular_products(n: int = 10, category: Optional[str] = None, db: Session = Depends(get_db)):
+    """Products ranked by time-decayed engagement, optionally within a category"""
+    popular = ProductRecommender(db).get_popular_products(n, category)
+    return [
+        schemas.ScoredProduct(product_id=product_id, score=float(score), reason=reason)
+        for product_id, score, reason in popular
+    ]
+
 @app.get("/products/{product_id}", response_model=schemas.Product)
 def get_product(product_id: int, db: Session = Depends(get_db)):
     product = db.query(models.Product).filter(models.Product.id == product_id).first()
@@ -61,12 +145,22 @@ def create_product(product: schemas.ProductCreate, db: Session = Depends(get_db)
     db.add(db_product)
     db.commit()
     db.refresh(db_product)
+    
+    # Add the product to the cached content model
+    record_product(db_product)
     return db_product
 
 # User endpoints
 @app.get("/users", response_model=List[schemas.User])
-def get_users(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    users = db.query(models.User).offset(skip).limit(limit).all()
+def get_users(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    users = keyset_page(db.query(models.User), models.User.id, after_id, skip, limit).all()
+    set_next_cursor(response, users, limit)
     return users
 
 @app.get("/users/{user_id}", response_model=schemas.User)
@@ -86,8 +180,15 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
 
 # Interaction endpoints
 @app.get("/interactions", response_model=List[schemas.UserInteraction])
-def get_interactions(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    interactions = db.query(models.UserInteraction).offset(skip).limit(limit).all()
+def get_interactions(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    interactions = keyset_page(db.query(models.UserInteraction), models.UserInteraction.id, after_id, skip, limit).all()
+    set_next_cursor(response, interactions, limit)
     return interactions
 
 @app.post("/interactions", response_model=schemas.UserInteraction)
@@ -96,8 +197,62 @@ def create_interaction(interaction: schemas.UserInteractionCreate, db: Session =
     db.add(db_interaction)
     db.commit()
     db.refresh(db_interaction)
+    
+    # Update the in-memory recommender models
+    record_interaction(db_interaction)
     return db_interaction
 
+@app.get("/interactions/export")
+def export_all_interactions(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    user_id: Optional[int] = None,
+    after_id: Optional[int] = None
+):
+    """Stream every interaction in id order without loading the table into memory"""
+    # The export outlives the request's dependencies, so it owns its session
+    def generate():
+        db = SessionLocal()
+        try:
+            yield from export_interactions(db, format, user_id=user_id, after_id=after_id)
+        finally:
+            db.close()
+    
+    headers = {"Content-Disposition": f"attachment; filename=interactions.{format}"}
+    return StreamingResponse(generate(), media_type=EXPORT_MEDIA_TYPES[format], headers=headers)
+
+_interaction_list = TypeAdapter(List[schemas.UserInteractionCreate])
+
+def parse_interactions(body: bytes, content_type: str) -> List[schemas.UserInteractionCreate]:
+    """Validate a JSON array or NDJSON body of interactions"""
+    if "ndjson" in content_type:
+        lines = [line for line in body.splitlines() if line.strip()]
+        body = b"[" + b",".join(lines) + b"]"
+    try:
+        return _interaction_list.validate_json(body)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False))
+
+@app.post("/interactions/bulk", response_model=schemas.IngestResult)
+async def bulk_create_interactions(request: Request, db: Session = Depends(get_db)):
+    """Insert many interactions (JSON array or NDJSON) in one transaction"""
+    interactions = parse_interactions(await request.body(), request.headers.get("content-type", ""))
+    rows = [interaction_row(interaction) for interaction in interactions]
+    await run_in_threadpool(write_interactions, db, rows)
+    return schemas.IngestResult(accepted=len(rows), buffered=False)
+
+@app.post("/interactions/events", response_model=schemas.IngestResult, status_code=202)
+def buffer_interaction(interaction: schemas.UserInteractionCreate):
+    """Queue one interaction for the next batched write (returns before it is stored)"""
+    try:
+        interaction_buffer.submit(interaction_row(interaction))
+    except BufferFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    return schemas.IngestResult(accepted=1, buffered=True)
+
+@app.get("/interactions/buffer/stats")
+def get_interaction_buffer_stats():
+    return interaction_buffer.stats()
+
 @app.get("/interactions/user/{user_id}", response_model=List[schemas.UserInteraction])
 def get_user_interactions(user_id: int, db: Session = Depends(get_db)):
     interactions = db.query(models.UserInteraction).filter(
@@ -106,45 +261,146 @@ def get_user_interactions(user_id: int, db: Session = Depends(get_db)):
     return interactions
 
 # Recommendation endpoints
-@app.get("/recommendations/{user_id}", response_model=List[schemas.RecommendationResponse])
-def get_recommendations(user_id: int, num_recommendations: int = 5, db: Session = Depends(get_db)):
+def score_recommendations(user_id: int, num_recommendations: int, db: Session):
+    """Blocking part of a recommendation request: DB lookups and scoring"""
     # Check if user exists
     user = db.query(models.User).filter(models.User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    # Get recommendations
+    # Load the user's interactions once for the whole request
     recommender = ProductRecommender(db)
-    recommendations = recommender.hybrid_recommendations(user_id, num_recommendations)
+    interactions = recommender.get_user_interactions(user_id)
+    
+    # Get recommendations, preferring the offline precomputed set when fresh
+    recommendations = recommender.get_precomputed_recommendations(user_id, num_recommendations, interactions)
+    if recommendations is None:
+        recommendations = recommender.hybrid_recommendations(user_id, num_recommendations)
+    
+    # One IN query for both the recommended products and the behavior summary
+    recommended_ids = [product_id for product_id, _, _ in recommendations]
+    product_map = recommender.get_products(recommended_ids + recommender.recent_product_ids(interactions))
     
     # Get user behavior for LLM context
-    user_behavior = recommender.get_user_behavior_summary(user_id)
+    user_behavior = recommender.get_user_behavior_summary(user_id, interactions, product_map)
     
-    # Build response with LLM explanations
-    response = []
-    for product_id, score, reason in recommendations:
-        product = db.query(models.Product).filter(models.Product.id == product_id).first()
-        if product:
-            # Generate LLM explanation
-            explanation = llm_service.generate_explanation(
-                product_name=product.name,
-                product_description=product.description,
-                product_category=product.category,
-                user_behavior=user_behavior,
-                recommendation_reason=reason
-            )
-            
-            response.append(schemas.RecommendationResponse(
+    scored = [
+        (product_map[product_id], score, reason)
+        for product_id, score, reason in recommendations
+        if product_id in product_map
+    ]
+    
+    return scored, user_behavior
+
+@app.get("/recommendations/{user_id}", response_model=List[schemas.RecommendationResponse])
+async def get_recommendations(user_id: int, num_recommendations: int = Query(5, ge=1), db: Session = Depends(get_db)):
+    async def compute():
+        scored, user_behavior = await run_in_threadpool(score_recommendations, user_id, num_recommendations, db)
+        
+        # Generate all LLM explanations for the response at once
+        explanations = await llm_service.explain_all(
+            [(product, reason) for product, _, reason in scored],
+            user_behavior
+        )
+        
+        # Build response with LLM explanations
+        return [
+            schemas.RecommendationResponse(
                 product=product,
                 score=float(score),
                 explanation=explanation
-            ))
+            )
+            for (product, score, _), explanation in zip(scored, explanations)
+        ]
+    
+    # Repeat requests are served from the per-user response cache
+    return await cached_recommendations(user_id, num_recommendations, model_version, compute)
+
+@app.get("/recommendations/cache/stats")
+def get_recommendation_cache_stats():
+    return recommendation_cache.stats()
+
+@app.get("/recommendations/{user_id}/stream")
+async def stream_recommendations(user_id: int, num_recommendations: int = Query(5, ge=1), db: Session = Depends(get_db)):
+    """Stream scored products immediately, then each explanation as it arrives (NDJSON)"""
+    scored, user_behavior = await run_in_threadpool(score_recommendations, user_id, num_recommendations, db)
+    
+    async def generate():
+        for index, (product, score, _) in enumerate(scored):
+            line = schemas.StreamedRecommendation(
+                index=index,
+                product=schemas.Product.model_validate(product),
+                score=float(score)
+            )
+            yield line.model_dump_json() + "\n"
+        
+        products = [(product, reason) for product, _, reason in scored]
+        async for index, explanation in llm_service.iter_explanations(products, user_behavior):
+            line = schemas.StreamedExplanation(
+                index=index,
+                product_id=scored[index][0].id,
+                explanation=explanation
+            )
+            yield line.model_dump_json() + "\n"
     
-    return response
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
 
 @app.post("/recommendations/request", response_model=List[schemas.RecommendationResponse])
-def request_recommendations(request: schemas.RecommendationRequest, db: Session = Depends(get_db)):
-    return get_recommendations(request.user_id, request.num_recommendations, db)
+async def request_recommendations(request: schemas.RecommendationRequest, db: Session = Depends(get_db)):
+    return await get_recommendations(request.user_id, request.num_recommendations, db)
+
+# Model endpoints
+@app.get("/models/consistency")
+def get_model_consistency(db: Session = Depends(get_db)):
+    """Compare the incrementally updated in-memory models with a full rebuild"""
+    return check_models(db)
+
+# LLM endpoints
+@app.get("/llm/cache/stats")
+def get_explanation_cache_stats():
+    return llm_service.cache_stats()
+
+# Monitoring endpoints
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Request and stage latency histograms, SQL and LLM counters in Prometheus text format"""
+    return Response(content=metrics.render(), headers={"Content-Type": CONTENT_TYPE})
+
+@app.post("/recommendations/batch")
+def batch_recommendations(request: schemas.BatchRecommendationRequest, db: Session = Depends(get_db)):
+    """Stream recommendations for many users as NDJSON, one line per user"""
+    recommender = ProductRecommender(db)
+    
+    def generate():
+        results = recommender.hybrid_recommendations_batch(request.user_ids, request.num_recommendations)
+        for user_id, recommendations in results:
+            line = schemas.BatchRecommendationResult(
+                user_id=user_id,
+                recommendations=[
+                    schemas.ScoredProduct(product_id=product_id, score=float(score), reason=reason)
+                    for product_id, score, reason in recommendations
+                ]
+            )
+            yield line.model_dump_json() + "\n"
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@app.on_event("shutdown")
+def flush_interaction_buffer():
+    interaction_buffer.stop()
+
+@app.on_event("shutdown")
+def stop_artifact_watcher():
+    artifact_watcher.stop()
+
+@app.on_event("shutdown")
+def publish_new_products():
+    content_model.flush()
+
+# With USE_ASYNC_DB, serve CRUD and recommendation routes from the async engine
+if USE_ASYNC_DB:
+    import async_api
+    async_api.replace_routes(app)
 
 if __name__ == "__main__":
     import uvicorn
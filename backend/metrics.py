@@ -0,0 +1,234 @@
+import bisect
+import os
+import threading
+import time
+from contextlib import nullcontext
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+# Quantiles are computed over each series' most recent observations
+METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", "1024"))
+
+# Seconds, from sub-millisecond scoring stages up to slow LLM calls
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+QUANTILES = (0.5, 0.95, 0.99)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Shared by every disabled timer; entering and leaving it does nothing
+_NOOP = nullcontext()
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Tuple = ()) -> str:
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Monotonic counter per label set"""
+
+    def __init__(self, name: str, help: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}")
+        return lines
+
+class _Series:
+    """Cumulative bucket counts plus a ring of the latest observations"""
+
+    __slots__ = ("counts", "sum", "count", "window", "lock")
+
+    def __init__(self, num_buckets: int, window: int):
+        self.counts = [0] * (num_buckets + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.window = [0.0] * window
+        self.lock = threading.Lock()
+
+class Histogram:
+    """Prometheus histogram per label set, with recent p50/p95/p99.
+
+    Buckets are cumulative since startup so they can be aggregated across
+    workers; the quantiles are exact over each series' last `window`
+    observations and exported as a `<name>_quantile` gauge.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+        window: int = METRICS_WINDOW
+    ):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self.window = window
+        self._series: Dict[Tuple, _Series] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, labels: Tuple) -> _Series:
+        series = self._series.get(labels)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(labels, _Series(len(self.buckets), self.window))
+        return series
+
+    def observe(self, value: float, *labels: str):
+        series = self._get(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with series.lock:
+            series.counts[index] += 1
+            series.window[series.count % self.window] = value
+            series.sum += value
+            series.count += 1
+
+    def quantiles(self, *labels: str) -> Dict[float, float]:
+        """p50/p95/p99 of the series' recent observations (empty if none)"""
+        series = self._series.get(labels)
+        if series is None or not series.count:
+            return {}
+        with series.lock:
+            recent = np.array(series.window[:min(series.count, self.window)])
+        return dict(zip(QUANTILES, np.quantile(recent, QUANTILES).tolist()))
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        quantile_lines = [
+            f"# HELP {self.name}_quantile {self.help} (last {self.window} observations)",
+            f"# TYPE {self.name}_quantile gauge"
+        ]
+        with self._lock:
+            series_items = sorted(self._series.items())
+        for labels, series in series_items:
+            with series.lock:
+                counts, total, count = list(series.counts), series.sum, series.count
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = (("le", _format_value(float(bound))),)
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {count}")
+            for quantile, value in self.quantiles(*labels).items():
+                label = _format_labels(self.label_names, labels, (("quantile", repr(quantile)),))
+                quantile_lines.append(f"{self.name}_quantile{label} {_format_value(value)}")
+        return lines + quantile_lines
+
+class _StageTimer:
+    __slots__ = ("histogram", "stage", "start")
+
+    def __init__(self, histogram: Histogram, stage: str):
+        self.histogram = histogram
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, self.stage)
+        return False
+
+class Metrics:
+    """Per-process latency, SQL and LLM counters, exported in Prometheus text format.
+
+    With `enabled` False every hook returns immediately (timers are a shared
+    no-op context manager), so instrumented code pays one attribute check.
+    """
+
+    def __init__(self, enabled: bool = METRICS_ENABLED, window: int = METRICS_WINDOW):
+        self.enabled = enabled
+        self.stage_seconds = Histogram(
+            "recommender_stage_duration_seconds",
+            "Time spent in each recommendation and explanation stage",
+            ("stage",), LATENCY_BUCKETS, window
+        )
+        self.request_seconds = Histogram(
+            "http_request_duration_seconds",
+            "HTTP request latency by route template",
+            ("method", "route"), LATENCY_BUCKETS, window
+        )
+        self.request_queries = Histogram(
+            "http_request_sql_queries",
+            "SQL statements executed per HTTP request",
+            ("method", "route"), QUERY_BUCKETS, window
+        )
+        self.requests = Counter("http_requests_total", "HTTP requests by route template and status", ("method", "route", "status"))
+        self.sql_queries = Counter("sql_queries_total", "SQL statements executed by this process, including background work")
+        self.llm_calls = Counter("llm_calls_total", "LLM API calls by mode and outcome", ("mode", "outcome"))
+        self.llm_fallbacks = Counter("llm_fallbacks_total", "Explanations served from the template fallback", ("reason",))
+
+    def time(self, stage: str):
+        """Context manager recording the enclosed block under `stage`"""
+        if not self.enabled:
+            return _NOOP
+        return _StageTimer(self.stage_seconds, stage)
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, queries: int):
+        if not self.enabled:
+            return
+        self.requests.inc(method, route, str(status))
+        self.request_seconds.observe(seconds, method, route)
+        self.request_queries.observe(queries, method, route)
+
+    def count_query(self):
+        if self.enabled:
+            self.sql_queries.inc()
+
+    def count_llm_call(self, mode: str, outcome: str):
+        if self.enabled:
+            self.llm_calls.inc(mode, outcome)
+
+    def count_fallback(self, reason: str, amount: int = 1):
+        if self.enabled and amount:
+            self.llm_fallbacks.inc(reason, amount=amount)
+
+    def render(self) -> str:
+        families = [
+            self.request_seconds,
+            self.request_queries,
+            self.requests,
+            self.stage_seconds,
+            self.sql_queries,
+            self.llm_calls,
+            self.llm_fallbacks
+        ]
+        return "\n".join(line for family in families for line in family.render()) + "\n"
+
+# Shared by every request handled by this process
+metrics = Metrics()
@@ -0,0 +1,59 @@
+"""Schema migrations for databases created before a model change.
+
+`Base.metadata.create_all` only creates missing tables, so indexes and other
+changes to existing tables are applied here. Each migration runs once, in
+order, and is recorded in the `schema_migrations` table.
+
+Usage (from the backend directory):
+    python migrations.py
+"""
+from datetime import datetime
+from typing import List
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from database import engine
+
+# (version, description, statements); statements must be safe to re-run
+MIGRATIONS = [
+    (1, "Index interaction lookups and product rating", [
+        "CREATE INDEX IF NOT EXISTS ix_user_interactions_user_id_timestamp ON user_interactions (user_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS ix_user_interactions_product_id ON user_interactions (product_id)",
+        "CREATE INDEX IF NOT EXISTS ix_products_rating ON products (rating)",
+        "ANALYZE"
+    ])
+]
+
+def applied_versions(bind: Engine) -> List[int]:
+    with bind.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations "
+            "(version INTEGER PRIMARY KEY, description VARCHAR, applied_at TIMESTAMP)"
+        ))
+        return [row[0] for row in connection.execute(text("SELECT version FROM schema_migrations"))]
+
+def run_migrations(bind: Engine = engine) -> List[int]:
+    """Apply pending migrations; returns the versions that were applied"""
+    done = set(applied_versions(bind))
+    applied = []
+
+    for version, description, statements in MIGRATIONS:
+        if version in done:
+            continue
+        with bind.begin() as connection:
+            for statement in statements:
+                connection.execute(text(statement))
+            connection.execute(
+                text("INSERT INTO schema_migrations (version, description, applied_at) VALUES (:version, :description, :applied_at)"),
+                {"version": version, "description": description, "applied_at": datetime.utcnow()}
+            )
+        applied.append(version)
+
+    return applied
+
+if __name__ == "__main__":
+    from database import Base
+    import models  # noqa: F401  (registers tables on Base)
+
+    Base.metadata.create_all(bind=engine)
+    applied = run_migrations()
+    print(f"Applied migrations: {applied}" if applied else "Schema is up to date")
@@ -0,0 +1,179 @@
+"""Versioned, memory-mapped model artifacts shared by every API worker.
+
+Layout under MODEL_DIR:
+    <name>/CURRENT                  name of the published version directory
+    <name>/v000007/manifest.json    metadata (shapes, hyperparameters, ...)
+    <name>/v000007/<array>.npy      one file per array
+
+`publish` writes a new version into a temporary directory, renames it into
+place and then replaces CURRENT with `os.replace`, so readers only ever see
+complete versions. `load_artifact` memory-maps every array read-only
+(`np.load(mmap_mode="r")`): loading costs a few page-table entries rather
+than a copy, and workers mapping the same files share the pages through
+the OS page cache. `ArtifactWatcher` polls CURRENT and hot-swaps models
+when another process publishes.
+"""
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+import numpy as np
+from typing import Dict, List, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MODEL_DIR = os.getenv("MODEL_DIR", "./model_artifacts")
+ARTIFACT_KEEP_VERSIONS = int(os.getenv("ARTIFACT_KEEP_VERSIONS", "3"))
+ARTIFACT_POLL_SECONDS = float(os.getenv("ARTIFACT_POLL_SECONDS", "5"))
+
+_VERSION_DIR = re.compile(r"^v(\d{6,})$")
+
+class Artifact:
+    """One loaded artifact version: read-only arrays plus manifest metadata"""
+
+    def __init__(self, name: str, version: int, arrays: Dict[str, np.ndarray], meta: Dict):
+        self.name = name
+        self.version = version
+        self.arrays = arrays
+        self.meta = meta
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        return self.arrays[key]
+
+def _versions(path: str) -> List[int]:
+    if not os.path.isdir(path):
+        return []
+    return sorted(int(m.group(1)) for m in map(_VERSION_DIR.match, os.listdir(path)) if m)
+
+def current_version(name: str, model_dir: str = MODEL_DIR) -> Optional[int]:
+    """Published version of an artifact, or None if it was never published"""
+    try:
+        with open(os.path.join(model_dir, name, "CURRENT")) as f:
+            match = _VERSION_DIR.match(f.read().strip())
+    except FileNotFoundError:
+        return None
+    return int(match.group(1)) if match else None
+
+def publish(
+    name: str,
+    arrays: Dict[str, np.ndarray],
+    meta: Optional[Dict] = None,
+    model_dir: str = MODEL_DIR,
+    keep: int = ARTIFACT_KEEP_VERSIONS
+) -> int:
+    """Write a new version of an artifact and make it current; returns the version"""
+    path = os.path.join(model_dir, name)
+    os.makedirs(path, exist_ok=True)
+
+    staging = os.path.join(path, f".tmp-{uuid.uuid4().hex}")
+    os.makedirs(staging)
+    try:
+        for key, array in arrays.items():
+            np.save(os.path.join(staging, f"{key}.npy"), np.ascontiguousarray(array))
+        with open(os.path.join(staging, "manifest.json"), "w") as f:
+            json.dump({"arrays": sorted(arrays), "meta": meta or {}, "published_at": time.time()}, f)
+
+        # Another process may claim the same number first; take the next one
+        while True:
+            version = max(_versions(path), default=0) + 1
+            target = os.path.join(path, f"v{version:06d}")
+            try:
+                os.rename(staging, target)
+                break
+            except OSError:
+                if not os.path.exists(target):
+                    raise
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    pointer = os.path.join(path, f".CURRENT-{uuid.uuid4().hex}")
+    with open(pointer, "w") as f:
+        f.write(f"v{version:06d}\n")
+    os.replace(pointer, os.path.join(path, "CURRENT"))
+
+    # Older versions stay mapped in running workers until they swap;
+    # unlinking them is safe on POSIX, the pages live until unmapped
+    if keep > 0:
+        current = current_version(name, model_dir)
+        for old in _versions(path)[:-keep]:
+            if old != current:
+                shutil.rmtree(os.path.join(path, f"v{old:06d}"), ignore_errors=True)
+    return version
+
+def load_artifact(name: str, model_dir: str = MODEL_DIR) -> Optional[Artifact]:
+    """Memory-map the current version of an artifact; None if there is none"""
+    for _ in range(3):
+        version = current_version(name, model_dir)
+        if version is None:
+            return None
+        path = os.path.join(model_dir, name, f"v{version:06d}")
+        try:
+            with open(os.path.join(path, "manifest.json")) as f:
+                manifest = json.load(f)
+            arrays = {
+                key: np.load(os.path.join(path, f"{key}.npy"), mmap_mode="r")
+                for key in manifest["arrays"]
+            }
+        except FileNotFoundError:
+            # Pruned between reading CURRENT and opening it; re-read CURRENT
+            continue
+        return Artifact(name, version, arrays, manifest["meta"])
+    return None
+
+class ArtifactWatcher:
+    """Poll published artifact versions and hot-swap models when they change.
+
+    A watched model exposes `artifact_name`, `model_dir`, `artifact_version`
+    (the version it has loaded, or None) and `refresh()`, which swaps in the
+    published version. `refresh` runs in the watcher thread.
+    """
+
+    def __init__(self, poll_seconds: float = ARTIFACT_POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self._models: List = []
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.reloads = 0
+
+    def watch(self, *models):
+        self._models.extend(models)
+
+    def check(self) -> int:
+        """Refresh every model whose published version moved; returns how many did"""
+        reloaded = 0
+        for model in self._models:
+            published = current_version(model.artifact_name, model.model_dir)
+            if published is None or published == model.artifact_version:
+                continue
+            try:
+                if model.refresh():
+                    reloaded += 1
+            except Exception as e:
+                print(f"Error reloading {model.artifact_name} artifact v{published}: {e}")
+        self.reloads += reloaded
+        return reloaded
+
+    def start(self):
+        if self._thread is None and self.poll_seconds > 0:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="artifact-watcher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopping.wait(self.poll_seconds):
+            self.check()
+
+    def stop(self):
+        thread = self._thread
+        if thread is not None:
+            self._stopping.set()
+            thread.join()
+            self._thread = None
+
+# Shared by every request handled by this process
+artifact_watcher = ArtifactWatcher()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Text
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Text, Index
 from sqlalchemy.orm import relationship
 from database import Base
 from datetime import datetime
@@ -12,7 +12,7 @@ class Product(Base):
     category = Column(String, index=True)
     price = Column(Float)
     image_url = Column(String)
-    rating = Column(Float, default=0.0)
+    rating = Column(Float, default=0.0, index=True)
     tags = Column(String)  # Comma-separated tags
     
     interactions = relationship("UserInteraction", back_populates="product")
@@ -32,10 +32,26 @@ class UserInteraction(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
-    product_id = Column(Integer, ForeignKey("products.id"))
+    product_id = Column(Integer, ForeignKey("products.id"), index=True)
     interaction_type = Column(String)  # view, click, purchase, cart, wishlist
     rating = Column(Float, nullable=True)
     timestamp = Column(DateTime, default=datetime.utcnow)
     
     user = relationship("User", back_populates="interactions")
     product = relationship("Product", back_populates="interactions")
+    
+    # Per-user lookups, newest first (see migrations.py for existing databases)
+    __table_args__ = (
+        Index("ix_user_interactions_user_id_timestamp", "user_id", "timestamp"),
+    )
+
+class PrecomputedRecommendation(Base):
+    __tablename__ = "precomputed_recommendations"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    product_id = Column(Integer, ForeignKey("products.id"))
+    rank = Column(Integer)
+    score = Column(Float)
+    reason = Column(String)
+    computed_at = Column(DateTime, default=datetime.utcnow)
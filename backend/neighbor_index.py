@@ -0,0 +1,266 @@
+import os
+import threading
+import time
+import numpy as np
+from scipy import sparse
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+from interaction_store import InteractionStore, interaction_store
+from model_artifacts import MODEL_DIR, load_artifact, publish
+
+load_dotenv()
+
+NEIGHBOR_INDEX_K = int(os.getenv("NEIGHBOR_INDEX_K", "50"))
+NEIGHBOR_INDEX_REBUILD_EVERY = int(os.getenv("NEIGHBOR_INDEX_REBUILD_EVERY", "1000"))
+
+def top_k_item_neighbors(matrix: sparse.csr_matrix, k: int = 50, block_size: int = 1024) -> sparse.csr_matrix:
+    """Item-item cosine similarity keeping only the k strongest neighbors per item.
+
+    Similarities are computed one block of items at a time so memory stays
+    bounded by `block_size` rows of the P x P product.
+    """
+    matrix = sparse.csr_matrix(matrix, dtype=np.float32)
+    num_products = matrix.shape[1]
+
+    # L2-normalize item columns so X^T X gives cosine similarity
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=0)).ravel())
+    norms[norms == 0] = 1.0
+    normalized = (matrix @ sparse.diags(1.0 / norms).astype(np.float32)).tocsc()
+    normalized_t = normalized.T.tocsr()
+
+    rows, cols, vals = [], [], []
+    for start in range(0, num_products, block_size):
+        stop = min(start + block_size, num_products)
+        block = (normalized_t[start:stop] @ normalized).tocsr()
+
+        for offset in range(stop - start):
+            item = start + offset
+            lo, hi = block.indptr[offset], block.indptr[offset + 1]
+            neighbors = block.indices[lo:hi]
+            sims = block.data[lo:hi]
+
+            # Drop self-similarity
+            keep = neighbors != item
+            neighbors, sims = neighbors[keep], sims[keep]
+
+            if len(sims) > k:
+                top = np.argpartition(sims, -k)[-k:]
+                neighbors, sims = neighbors[top], sims[top]
+
+            rows.append(np.full(len(neighbors), item, dtype=np.int32))
+            cols.append(neighbors)
+            vals.append(sims)
+
+    if not rows:
+        return sparse.csr_matrix((num_products, num_products), dtype=np.float32)
+
+    return sparse.csr_matrix(
+        (np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(num_products, num_products),
+        dtype=np.float32
+    )
+
+class ItemNeighborIndex:
+    """Precomputed top-K item-item neighbor index for collaborative filtering.
+
+    Scoring a user is a sparse lookup: the user's interaction row is
+    multiplied by the neighbor matrix, so only the neighbors of items the
+    user has touched contribute. The index is rebuilt from the shared
+    `InteractionStore` offline (`python neighbor_index.py`, which publishes
+    it under MODEL_DIR) or in a background thread once enough new
+    interactions have arrived.
+    """
+
+    artifact_name = "item_neighbors"
+
+    def __init__(self, k: int = NEIGHBOR_INDEX_K, model_dir: str = MODEL_DIR):
+        self.k = k
+        self.model_dir = model_dir
+        self.similarity: Optional[sparse.csr_matrix] = None
+        self.product_ids: List[int] = []
+        self.product_index: Dict[int, int] = {}
+        self.built_version = -1
+        # Published version currently (or last) loaded, see model_artifacts
+        self.artifact_version: Optional[int] = None
+        self._lock = threading.Lock()
+        self._rebuild_thread: Optional[threading.Thread] = None
+
+    @property
+    def built(self) -> bool:
+        return self.similarity is not None
+
+    def build(self, store: InteractionStore):
+        """Rebuild the index from the current interaction matrix"""
+        version = store.version
+        matrix = store.matrix
+        product_ids = list(store.product_ids[:matrix.shape[1]])
+
+        similarity = top_k_item_neighbors(matrix, self.k)
+
+        # Swap in the new index atomically
+        with self._lock:
+            self.similarity = similarity
+            self.product_ids = product_ids
+            self.product_index = {pid: idx for idx, pid in enumerate(product_ids)}
+            self.built_version = version
+
+    def ensure_built(self, store: InteractionStore):
+        if not self.built:
+            self.build(store)
+
+    def save(self) -> int:
+        """Publish the index so API workers can map it instead of rebuilding"""
+        with self._lock:
+            similarity, product_ids, version = self.similarity, self.product_ids, self.built_version
+        self.artifact_version = publish(
+            self.artifact_name,
+            {
+                "data": similarity.data,
+                "indices": similarity.indices,
+                "indptr": similarity.indptr,
+                "product_ids": np.array(product_ids, dtype=np.int64)
+            },
+            {"shape": list(similarity.shape), "built_version": version, "k": self.k},
+            self.model_dir
+        )
+        return self.artifact_version
+
+    def load(self, newer_only: bool = False) -> bool:
+        """Memory-map the published index; returns False if none was swapped in.
+
+        With `newer_only`, an index built in this process from more
+        interactions than the published one is kept.
+        """
+        artifact = load_artifact(self.artifact_name, self.model_dir)
+        if artifact is None:
+            return False
+        if newer_only and artifact.meta["built_version"] < self.built_version:
+            self.artifact_version = artifact.version
+            return False
+
+        # The CSR arrays stay memory-mapped; only the id map is built here
+        similarity = sparse.csr_matrix(
+            (artifact["data"], artifact["indices"], artifact["indptr"]),
+            shape=tuple(artifact.meta["shape"])
+        )
+        product_ids = artifact["product_ids"].tolist()
+        with self._lock:
+            self.similarity = similarity
+            self.product_ids = product_ids
+            self.product_index = {pid: idx for idx, pid in enumerate(product_ids)}
+            self.built_version = artifact.meta["built_version"]
+            self.artifact_version = artifact.version
+        return True
+
+    def refresh(self) -> bool:
+        return self.load(newer_only=True)
+
+    def is_stale(self, store: InteractionStore, rebuild_every: int = NEIGHBOR_INDEX_REBUILD_EVERY) -> bool:
+        return store.version - self.built_version >= rebuild_every
+
+    def rebuild_in_background(self, store: InteractionStore):
+        """Start a rebuild thread unless one is already running"""
+        with self._lock:
+            if self._rebuild_thread is not None and self._rebuild_thread.is_alive():
+                return
+            self._rebuild_thread = threading.Thread(target=self.build, args=(store,), daemon=True)
+            self._rebuild_thread.start()
+
+    def score(self, store: InteractionStore, user_id: int) -> Tuple[np.ndarray, np.ndarray, List[int]]:
+        """Score every indexed product for a user.
+
+        Returns (scores, interacted column indices, product ids) in index space.
+        """
+        with self._lock:
+            similarity = self.similarity
+            product_ids = self.product_ids
+            product_index = self.product_index
+
+        user_row = store.user_row(user_id)
+        if similarity is None or user_row is None:
+            return np.array([]), np.array([], dtype=np.int64), []
+
+        # Map the user's history into index columns; products added after
+        # the last build have no neighbors yet and are skipped
+        columns, weights = [], []
+        for col, weight in zip(user_row.indices, user_row.data):
+            idx = product_index.get(store.product_ids[col])
+            if idx is not None:
+                columns.append(idx)
+                weights.append(weight)
+
+        interacted = np.array(columns, dtype=np.int64)
+        if not columns:
+            return np.array([]), interacted, product_ids
+
+        # Only the neighbor rows of the user's items are touched
+        scores = np.asarray(similarity[interacted].T @ np.asarray(weights, dtype=np.float32)).ravel()
+        return scores, interacted, product_ids
+
+    def score_batch(self, store: InteractionStore, user_ids: List[int]) -> Tuple[np.ndarray, sparse.csr_matrix, List[int]]:
+        """Score a block of users with one sparse matrix-matrix product.
+
+        Returns (B x P scores, B x P interaction rows, product ids) in index
+        space; unknown users get all-zero rows.
+        """
+        with self._lock:
+            similarity = self.similarity
+            product_ids = self.product_ids
+            product_index = self.product_index
+
+        num_indexed = similarity.shape[0] if similarity is not None else 0
+        matrix = store.matrix
+        store_product_ids = store.product_ids[:matrix.shape[1]]
+
+        # Store column -> index column, -1 for products the index doesn't know
+        column_map = np.fromiter(
+            (product_index.get(pid, -1) for pid in store_product_ids),
+            dtype=np.int64,
+            count=len(store_product_ids)
+        )
+
+        # Gather the block's interaction rows from the store
+        rows, store_rows = [], []
+        for row, user_id in enumerate(user_ids):
+            idx = store.user_index.get(user_id)
+            if idx is not None and idx < matrix.shape[0]:
+                rows.append(row)
+                store_rows.append(idx)
+
+        block = matrix[store_rows].tocoo()
+        block_rows = np.asarray(rows, dtype=np.int64)[block.row]
+        block_cols = column_map[block.col]
+        keep = block_cols >= 0
+
+        user_rows = sparse.csr_matrix(
+            (block.data[keep], (block_rows[keep], block_cols[keep])),
+            shape=(len(user_ids), num_indexed),
+            dtype=np.float32
+        )
+        if similarity is None:
+            return np.zeros((len(user_ids), 0), dtype=np.float32), user_rows, product_ids
+
+        scores = (user_rows @ similarity).toarray()
+        return scores, user_rows, product_ids
+
+# Shared by every request handled by this process
+item_neighbor_index = ItemNeighborIndex()
+
+if __name__ == "__main__":
+    from database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        interaction_store.load(db)
+        item_neighbor_index.build(interaction_store)
+        version = item_neighbor_index.save()
+        elapsed = time.perf_counter() - start
+    finally:
+        db.close()
+
+    similarity = item_neighbor_index.similarity
+    print(
+        f"Built item neighbor index: {similarity.shape[0]} products, "
+        f"{similarity.nnz} neighbor pairs (k={item_neighbor_index.k}) in {elapsed:.2f}s, published v{version}"
+    )
@@ -0,0 +1,21 @@
+from typing import Optional, Sequence
+from fastapi import Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def keyset_page(query, id_column, after_id: Optional[int], skip: int, limit: int):
+    """Order a Query/select by id and take one page.
+
+    With `after_id` the page starts right after that id, which an index seek
+    serves in constant time at any depth; `skip` is kept for older clients
+    and still costs O(skip).
+    """
+    query = query.order_by(id_column)
+    if after_id is not None:
+        return query.filter(id_column > after_id).limit(limit)
+    return query.offset(skip).limit(limit)
+
+def set_next_cursor(response: Response, rows: Sequence, limit: int):
+    """Point clients at the next page; a short page means there is none"""
+    if rows and len(rows) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = str(rows[-1].id)
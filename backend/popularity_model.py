@@ -0,0 +1,184 @@
+import math
+import os
+import threading
+import time
+import numpy as np
+from datetime import datetime, timezone
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Tuple
+from dotenv import load_dotenv
+import models
+from interaction_store import interaction_weight
+from ranking import top_k
+
+load_dotenv()
+
+POPULARITY_HALF_LIFE_DAYS = float(os.getenv("POPULARITY_HALF_LIFE_DAYS", "7"))
+POPULARITY_TOP_N = int(os.getenv("POPULARITY_TOP_N", "100"))
+POPULARITY_REFRESH_SECONDS = float(os.getenv("POPULARITY_REFRESH_SECONDS", "5"))
+
+# Rebase stored scores before exp() of the elapsed time can overflow float64
+_MAX_EXPONENT = 500.0
+
+def _epoch(timestamp: Optional[datetime]) -> float:
+    """Seconds since the epoch; naive timestamps are UTC like the rest of the schema"""
+    if timestamp is None:
+        return time.time()
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp.timestamp()
+
+class PopularityModel:
+    """Engagement popularity per product with exponential time decay.
+
+    Each interaction adds `interaction_weight * 2 ** (-age / half_life)`.
+    Scores are stored relative to a reference time `t0` (an event at time t
+    contributes `weight * exp(decay * (t - t0))`), so every score decays by
+    the same factor and a new event is a single O(1) addition. Top-N lists,
+    overall and per category, are cached and re-ranked at most every
+    POPULARITY_REFRESH_SECONDS, so cold-start requests are dictionary reads.
+    """
+
+    def __init__(
+        self,
+        half_life_days: float = POPULARITY_HALF_LIFE_DAYS,
+        top_n: int = POPULARITY_TOP_N,
+        refresh_seconds: float = POPULARITY_REFRESH_SECONDS
+    ):
+        self.decay = math.log(2) / (half_life_days * 86400)
+        self.top_n = top_n
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.RLock()
+        self.fitted = False
+        self._reset()
+
+    def _reset(self):
+        self.t0 = time.time()
+        self.scores = np.zeros(0, dtype=np.float64)
+        self.category_codes = np.zeros(0, dtype=np.int32)
+        self.product_ids: List[int] = []
+        self.product_index: Dict[int, int] = {}
+        self.category_index: Dict[str, int] = {}
+        # Bumped on every score change; cached rankings remember the version they saw
+        self.version = 0
+        self._rankings: Dict[Optional[str], Tuple[float, int, List[Tuple[int, float]]]] = {}
+
+    def _category_code(self, category: Optional[str]) -> int:
+        if category is None:
+            return -1
+        return self.category_index.setdefault(category, len(self.category_index))
+
+    def _product_idx(self, product_id: int, category: Optional[str] = None) -> int:
+        idx = self.product_index.get(product_id)
+        if idx is None:
+            idx = len(self.product_ids)
+            self.product_index[product_id] = idx
+            self.product_ids.append(product_id)
+            if idx >= len(self.scores):
+                # Grow by doubling so appends stay amortized O(1)
+                grow = max(idx + 1, len(self.scores))
+                self.scores = np.concatenate([self.scores, np.zeros(grow, dtype=np.float64)])
+                self.category_codes = np.concatenate([self.category_codes, np.full(grow, -1, dtype=np.int32)])
+        if category is not None:
+            self.category_codes[idx] = self._category_code(category)
+        return idx
+
+    def _rebase(self, now: float):
+        """Move t0 forward so exponents stay small; scales every score equally"""
+        self.scores *= math.exp(-self.decay * (now - self.t0))
+        self.t0 = now
+
+    def fit(self, db: Session, batch_size: int = 10000, max_id: Optional[int] = None):
+        """Compute scores from every stored interaction (up to `max_id` if given)"""
+        products = db.query(models.Product.id, models.Product.category).order_by(models.Product.id).all()
+        query = db.query(
+            models.UserInteraction.product_id,
+            models.UserInteraction.interaction_type,
+            models.UserInteraction.rating,
+            models.UserInteraction.timestamp
+        )
+        if max_id is not None:
+            query = query.filter(models.UserInteraction.id <= max_id)
+        rows = query.yield_per(batch_size)
+
+        with self._lock:
+            self._reset()
+            for product_id, category in products:
+                self._product_idx(product_id, category)
+
+            indices, weights, times = [], [], []
+            for product_id, interaction_type, rating, timestamp in rows:
+                indices.append(self._product_idx(product_id))
+                weights.append(interaction_weight(interaction_type, rating))
+                times.append(_epoch(timestamp))
+
+            # t0 is now, so every historical contribution is <= its weight
+            if indices:
+                decayed = np.asarray(weights) * np.exp(self.decay * (np.asarray(times) - self.t0))
+                np.add.at(self.scores, np.asarray(indices, dtype=np.int64), decayed)
+            self.version += 1
+            self.fitted = True
+
+    def ensure_fitted(self, db: Session):
+        if not self.fitted:
+            with self._lock:
+                if not self.fitted:
+                    self.fit(db)
+
+    def _add(self, product_id: int, interaction_type: str, rating: Optional[float], at: float):
+        exponent = self.decay * (at - self.t0)
+        if exponent > _MAX_EXPONENT:
+            self._rebase(at)
+            exponent = 0.0
+        idx = self._product_idx(product_id)
+        self.scores[idx] += interaction_weight(interaction_type, rating) * math.exp(exponent)
+        self.version += 1
+
+    def add_interaction(self, product_id: int, interaction_type: str, rating: Optional[float] = None, timestamp: Optional[datetime] = None):
+        """Fold one committed interaction in (no-op until the model is fitted)"""
+        with self._lock:
+            if self.fitted:
+                self._add(product_id, interaction_type, rating, _epoch(timestamp))
+
+    def add_product(self, product_id: int, category: Optional[str]):
+        with self._lock:
+            if self.fitted:
+                self._product_idx(product_id, category)
+
+    def product_scores(self, at: Optional[float] = None) -> Dict[int, float]:
+        """Every product's score decayed to time `at` (default now)"""
+        with self._lock:
+            scale = math.exp(-self.decay * ((at or time.time()) - self.t0))
+            return {pid: float(self.scores[idx] * scale) for idx, pid in enumerate(self.product_ids)}
+
+    def _rank(self, category: Optional[str], n: int, now: float) -> List[Tuple[int, float]]:
+        scores = self.scores[:len(self.product_ids)]
+        if category is not None:
+            code = self.category_index.get(category)
+            if code is None:
+                return []
+            scores = np.where(self.category_codes[:len(scores)] == code, scores, 0.0)
+
+        # Report scores decayed to `now`
+        scale = math.exp(-self.decay * (now - self.t0))
+        return [
+            (self.product_ids[idx], float(scores[idx] * scale))
+            for idx in top_k(scores, n, min_score=0)
+        ]
+
+    def top(self, n: int, category: Optional[str] = None) -> List[Tuple[int, float]]:
+        """Most popular (product id, decayed score) pairs, optionally within a category"""
+        with self._lock:
+            now = time.time()
+            if n > self.top_n:
+                # More than the cached list holds; rank directly
+                return self._rank(category, n, now)
+
+            cached = self._rankings.get(category)
+            if cached is None or (cached[1] != self.version and now - cached[0] >= self.refresh_seconds):
+                cached = (now, self.version, self._rank(category, self.top_n, now))
+                self._rankings[category] = cached
+            return cached[2][:n]
+
+# Shared by every request handled by this process
+popularity_model = PopularityModel()
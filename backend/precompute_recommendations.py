@@ -0,0 +1,90 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import List, Tuple
+import models
+from database import SessionLocal, engine, Base
+from neighbor_index import item_neighbor_index
+from als_model import als_model
+from content_model import content_model
+from recommender import CF_STRATEGY, ProductRecommender, publish_models
+
+def _collaborative_model():
+    return als_model if CF_STRATEGY == "als" else item_neighbor_index
+
+def _init_worker():
+    """Worker start-up: drop inherited connections and map the published models"""
+    # Pooled connections forked from the parent must not be shared across processes
+    engine.dispose(close=False)
+    content_model.load()
+    _collaborative_model().load()
+
+def _recommend_chunk(args: Tuple[List[int], int]) -> List[Tuple[int, int, int, float, str]]:
+    """Worker: hybrid recommendations for a chunk of users as table rows"""
+    user_ids, n = args
+    db = SessionLocal()
+    try:
+        recommender = ProductRecommender(db)
+        rows = []
+        for user_id, recommendations in recommender.hybrid_recommendations_batch(user_ids, n):
+            for rank, (product_id, score, reason) in enumerate(recommendations):
+                rows.append((user_id, product_id, rank, float(score), reason))
+        return rows
+    finally:
+        db.close()
+
+def precompute_recommendations(n: int = 10, workers: int = 0, chunk_size: int = 1000):
+    """Materialize top-n hybrid recommendations for every user"""
+    Base.metadata.create_all(bind=engine)
+    
+    # Interactions after this point are treated as newer than the run
+    computed_at = datetime.utcnow()
+    start = time.perf_counter()
+    
+    db = SessionLocal()
+    try:
+        user_ids = [row[0] for row in db.query(models.User.id).order_by(models.User.id)]
+        
+        # Build and publish the shared models once; workers map the published versions
+        publish_models(db)
+    finally:
+        db.close()
+    
+    chunks = [(user_ids[i:i + chunk_size], n) for i in range(0, len(user_ids), chunk_size)]
+    workers = workers or os.cpu_count() or 1
+    
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        results = list(executor.map(_recommend_chunk, chunks))
+    
+    # Replace the previous run in one transaction
+    db = SessionLocal()
+    try:
+        db.query(models.PrecomputedRecommendation).delete()
+        db.bulk_insert_mappings(models.PrecomputedRecommendation, [
+            {
+                "user_id": user_id,
+                "product_id": product_id,
+                "rank": rank,
+                "score": score,
+                "reason": reason,
+                "computed_at": computed_at
+            }
+            for rows in results
+            for user_id, product_id, rank, score, reason in rows
+        ])
+        db.commit()
+    finally:
+        db.close()
+    
+    print(f"Precomputed recommendations for {len(user_ids)} users in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Materialize hybrid recommendations for all users")
+    parser.add_argument("--num", type=int, default=10, help="recommendations stored per user")
+    parser.add_argument("--workers", type=int, default=0, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="users per worker task")
+    args = parser.parse_args()
+    
+    precompute_recommendations(args.num, args.workers, args.chunk_size)
@@ -0,0 +1,38 @@
+import numpy as np
+from typing import Iterable, Optional
+
+def top_k(scores: np.ndarray, k: int, exclude: Optional[Iterable[int]] = None, min_score: Optional[float] = None) -> np.ndarray:
+    """Indices of the k highest scores, best first.
+
+    Uses argpartition to pick the candidates in O(n) and only sorts those k,
+    instead of a full O(n log n) argsort. `exclude` indices (e.g. products
+    the user already interacted with) are masked out in one vectorized
+    assignment, and scores not above `min_score` are dropped. A 2-D block
+    is ranked per row (B x k); `exclude` and `min_score` are 1-D only.
+    """
+    scores = np.asarray(scores)
+    if exclude is not None:
+        exclude = np.fromiter(exclude, dtype=np.int64) if not isinstance(exclude, np.ndarray) else exclude
+        if len(exclude):
+            scores = scores.copy()
+            scores[exclude] = -np.inf
+
+    width = scores.shape[-1]
+    k = min(k, width)
+    if k <= 0:
+        return np.zeros(scores.shape[:-1] + (0,), dtype=np.int64)
+
+    if k < width:
+        candidates = np.argpartition(scores, -k, axis=-1)[..., -k:]
+    else:
+        candidates = np.broadcast_to(np.arange(width), scores.shape)
+    order = np.argsort(np.take_along_axis(scores, candidates, axis=-1), axis=-1)[..., ::-1]
+    top = np.take_along_axis(candidates, order, axis=-1)
+    if scores.ndim > 1:
+        return top
+
+    if min_score is not None:
+        top = top[scores[top] > min_score]
+    elif exclude is not None:
+        top = top[np.isfinite(scores[top])]
+    return top
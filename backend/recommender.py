@@ -1,203 +1,387 @@
+import os
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.feature_extraction.text import TfidfVectorizer
+from datetime import datetime, timedelta
+from scipy import sparse
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional, Iterator
 import models
+from interaction_store import InteractionStore, interaction_store
+from neighbor_index import ItemNeighborIndex, item_neighbor_index
+from als_model import ALSModel, als_model
+from content_model import ContentModel, content_model
+from popularity_model import PopularityModel, popularity_model
+from response_cache import recommendation_cache
+from fusion import ScoreFusion, SourceScores, score_fusion
+from metrics import Metrics, metrics
+from ranking import top_k
 import pandas as pd
 
+PRECOMPUTED_MAX_AGE_HOURS = float(os.getenv("PRECOMPUTED_MAX_AGE_HOURS", "24"))
+# Collaborative filtering backend: "neighbors" (item-item index) or "als"
+CF_STRATEGY = os.getenv("CF_STRATEGY", "neighbors")
+
 class ProductRecommender:
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: Session,
+        store: Optional[InteractionStore] = None,
+        neighbor_index: Optional[ItemNeighborIndex] = None,
+        content: Optional[ContentModel] = None,
+        popularity: Optional[PopularityModel] = None,
+        als: Optional[ALSModel] = None,
+        strategy: Optional[str] = None,
+        fusion: Optional[ScoreFusion] = None,
+        instrumentation: Optional[Metrics] = None
+    ):
         self.db = db
-        
-    def get_user_interaction_matrix(self) -> Tuple[np.ndarray, List[int], List[int]]:
-        """Create user-item interaction matrix for collaborative filtering"""
-        interactions = self.db.query(models.UserInteraction).all()
-        
-        if not interactions:
-            return np.array([]), [], []
-        
-        # Create interaction scores
-        interaction_weights = {
-            'view': 1,
-            'click': 2,
-            'cart': 3,
-            'wishlist': 4,
-            'purchase': 5
-        }
-        
-        user_ids = list(set([i.user_id for i in interactions]))
-        product_ids = list(set([i.product_id for i in interactions]))
-        
-        matrix = np.zeros((len(user_ids), len(product_ids)))
-        
-        for interaction in interactions:
-            user_idx = user_ids.index(interaction.user_id)
-            product_idx = product_ids.index(interaction.product_id)
-            weight = interaction_weights.get(interaction.interaction_type, 1)
-            
-            if interaction.rating:
-                weight *= interaction.rating / 5.0
-            
-            matrix[user_idx][product_idx] += weight
-        
-        return matrix, user_ids, product_ids
+        self.store = store or interaction_store
+        self.neighbor_index = neighbor_index or item_neighbor_index
+        self.content_model = content or content_model
+        self.popularity = popularity or popularity_model
+        self.als_model = als or als_model
+        self.strategy = strategy or CF_STRATEGY
+        self.fusion = fusion or score_fusion
+        self.metrics = instrumentation or metrics
     
-    def collaborative_filtering(self, user_id: int, n: int = 10) -> List[Tuple[int, float]]:
-        """Collaborative filtering based on user similarity"""
-        matrix, user_ids, product_ids = self.get_user_interaction_matrix()
-        
-        if len(matrix) == 0 or user_id not in user_ids:
-            return []
-        
-        user_idx = user_ids.index(user_id)
-        
-        # Calculate user similarity
-        user_similarity = cosine_similarity(matrix)
-        similar_users = user_similarity[user_idx]
-        
-        # Get weighted scores for products
-        scores = np.dot(similar_users, matrix)
-        
-        # Remove already interacted products
-        user_interactions = matrix[user_idx]
-        scores[user_interactions > 0] = -1
-        
-        # Get top N recommendations
-        top_indices = np.argsort(scores)[::-1][:n]
-        recommendations = [(product_ids[idx], scores[idx]) for idx in top_indices if scores[idx] > 0]
-        
-        return recommendations
+    def _collaborative_model(self, strategy: Optional[str] = None):
+        """Scoring backend for a CF strategy; both expose score/score_batch"""
+        strategy = strategy or self.strategy
+        if strategy == "als":
+            return self.als_model
+        if strategy == "neighbors":
+            return self.neighbor_index
+        raise ValueError(f"Unknown collaborative filtering strategy: {strategy}")
+        
+    def _prepare_models(self, strategy: Optional[str] = None):
+        """Load, build or fit whatever the hybrid scorers need; returns the CF model.
+
+        Each step is a no-op once done, so the timed stages only show up as
+        slow on a cold start, a rebuild or a refit.
+        """
+        with self.metrics.time("interaction_matrix"):
+            self.store.ensure_loaded(self.db)
+        collaborative = self._collaborative_model(strategy)
+        with self.metrics.time("collaborative_build"):
+            collaborative.ensure_built(self.store)
+        with self.metrics.time("content_fit"):
+            self.content_model.ensure_fitted(self.db)
+        return collaborative
     
-    def content_based_filtering(self, user_id: int, n: int = 10) -> List[Tuple[int, float]]:
-        """Content-based filtering using product features"""
-        # Get user's interaction history
-        user_interactions = self.db.query(models.UserInteraction).filter(
-            models.UserInteraction.user_id == user_id
-        ).all()
-        
-        if not user_interactions:
-            return []
-        
-        # Get all products
-        all_products = self.db.query(models.Product).all()
-        
-        if not all_products:
-            return []
-        
-        # Create feature vectors from product descriptions, categories, and tags
-        product_features = []
-        product_ids = []
-        
-        for product in all_products:
-            features = f"{product.name} {product.description} {product.category} {product.tags}"
-            product_features.append(features)
-            product_ids.append(product.id)
-        
-        # Vectorize features
-        vectorizer = TfidfVectorizer(max_features=100, stop_words='english')
-        feature_matrix = vectorizer.fit_transform(product_features)
-        
-        # Get user profile based on interacted products
-        interacted_product_ids = [i.product_id for i in user_interactions]
-        interacted_indices = [product_ids.index(pid) for pid in interacted_product_ids if pid in product_ids]
-        
-        if not interacted_indices:
-            return []
-        
-        # Create user profile as average of interacted products
-        user_profile = feature_matrix[interacted_indices].mean(axis=0)
-        
-        # Calculate similarity with all products
-        similarities = cosine_similarity(user_profile, feature_matrix)[0]
-        
-        # Remove already interacted products
-        for idx in interacted_indices:
-            similarities[idx] = -1
-        
-        # Get top N recommendations
-        top_indices = np.argsort(similarities)[::-1][:n]
-        recommendations = [(product_ids[idx], similarities[idx]) for idx in top_indices if similarities[idx] > 0]
-        
-        return recommendations
+    def get_user_interaction_matrix(self) -> Tuple[sparse.csr_matrix, List[int], List[int]]:
+        """Sparse user-item interaction matrix for collaborative filtering"""
+        with self.metrics.time("interaction_matrix"):
+            self.store.ensure_loaded(self.db)
+        return self.store.matrix, self.store.user_ids, self.store.product_ids
     
-    def hybrid_recommendations(self, user_id: int, n: int = 5) -> List[Tuple[int, float, str]]:
-        """Combine collaborative and content-based filtering"""
-        collab_recs = self.collaborative_filtering(user_id, n * 2)
-        content_recs = self.content_based_filtering(user_id, n * 2)
-        
-        # If no collaborative filtering results, use content-based
-        if not collab_recs and not content_recs:
-            # Return popular products for cold start
+    def _candidate_sources(
+        self,
+        collaborative,
+        collaborative_scores: SourceScores,
+        interacted: List[List[int]],
+        n: int
+    ) -> Dict[str, SourceScores]:
+        """Candidate generation, then both models' scores on the candidates for fusion to re-rank.
+
+        Each source proposes its top FUSION_CANDIDATES products per user: the
+        collaborative model from its scores, the content model through its
+        ANN index. The content model then scores only the union of the
+        proposals, and a product a user was not proposed scores 0 for them,
+        which fusion treats as no signal.
+        """
+        k = max(self.fusion.candidates, n)
+        scores, seen, product_ids = collaborative_scores
+        proposals = []
+        for row, user_product_ids in enumerate(interacted):
+            top = top_k(scores[row], k, exclude=seen[row].indices, min_score=0)
+            proposed = {product_ids[idx] for idx in top}
+            proposed.update(pid for pid, _ in self.content_model.search(user_product_ids, k))
+            proposals.append(proposed)
+
+        candidate_ids = sorted(set().union(*proposals))
+        positions = {pid: col for col, pid in enumerate(candidate_ids)}
+        mask = np.zeros((len(interacted), len(candidate_ids)), dtype=bool)
+        for row, proposed in enumerate(proposals):
+            mask[row, [positions[pid] for pid in proposed]] = True
+
+        # Collaborative scores of the candidates; a model rebuilt since
+        # scoring may map an id elsewhere, so the lookup is checked
+        product_index = collaborative.product_index
+        columns = np.array([product_index.get(pid, -1) for pid in candidate_ids], dtype=np.int64)
+        known = np.array(
+            [0 <= col < scores.shape[1] and product_ids[col] == pid for col, pid in zip(columns, candidate_ids)],
+            dtype=bool
+        )
+        collaborative_block = np.zeros(mask.shape, dtype=np.float32)
+        collaborative_block[:, known] = scores[:, columns[known]]
+
+        content_block, _, _ = self.content_model.user_scores_batch(interacted, candidate_ids)
+
+        # Candidates never include interacted products
+        unseen = sparse.csr_matrix(mask.shape, dtype=np.float32)
+        return {
+            "collaborative": (np.where(mask, collaborative_block, 0.0), unseen, candidate_ids),
+            "content": (np.where(mask, content_block, 0.0), unseen, candidate_ids)
+        }
+
+    def hybrid_recommendations(self, user_id: int, n: int = 5, strategy: Optional[str] = None) -> List[Tuple[int, float, str]]:
+        """Combine collaborative and content-based filtering.
+
+        Each model proposes candidates (the content model through its ANN
+        index); `ScoreFusion` normalizes, blends and re-ranks both models'
+        scores on the candidates in one step.
+        """
+        collaborative = self._prepare_models(strategy)
+        
+        interacted_product_ids = self.store.user_product_ids(user_id)
+        with self.metrics.time("collaborative_score"):
+            collaborative_scores = _single_user(*collaborative.score(self.store, user_id))
+        with self.metrics.time("candidates"):
+            sources = self._candidate_sources(collaborative, collaborative_scores, [interacted_product_ids], n)
+        with self.metrics.time("fusion"):
+            recommendations = self.fusion.fuse(sources, n)[0]
+        
+        # No collaborative or content signal: popular products for cold start
+        if not recommendations:
             return self.get_popular_products(n)
-        
-        # Combine scores
-        combined_scores = {}
-        
-        for product_id, score in collab_recs:
-            combined_scores[product_id] = combined_scores.get(product_id, 0) + score * 0.6
-        
-        for product_id, score in content_recs:
-            combined_scores[product_id] = combined_scores.get(product_id, 0) + score * 0.4
-        
-        # Sort by combined score
-        sorted_recs = sorted(combined_scores.items(), key=lambda x: x[1], reverse=True)[:n]
-        
-        # Determine recommendation reason
-        results = []
-        for product_id, score in sorted_recs:
-            reason = "hybrid"
-            if product_id in [p[0] for p in collab_recs] and product_id in [p[0] for p in content_recs]:
-                reason = "collaborative_and_content"
-            elif product_id in [p[0] for p in collab_recs]:
-                reason = "collaborative"
-            else:
-                reason = "content"
+        return recommendations
+    
+    def hybrid_recommendations_batch(
+        self,
+        user_ids: List[int],
+        n: int = 5,
+        block_size: int = 128,
+        strategy: Optional[str] = None
+    ) -> Iterator[Tuple[int, List[Tuple[int, float, str]]]]:
+        """Hybrid recommendations for many users, scored a block at a time.
+
+        Each block of users is scored against the collaborative model with
+        one matrix-matrix product, the block's candidates are scored by the
+        content model with another, and the block is fused at once; results
+        are yielded per user so callers can stream them.
+        """
+        collaborative = self._prepare_models(strategy)
+        popular = None
+        
+        for start in range(0, len(user_ids), block_size):
+            block_ids = user_ids[start:start + block_size]
+            interacted = [self.store.user_product_ids(uid) for uid in block_ids]
+            # Block-level stages, so they are timed apart from single-user ones
+            with self.metrics.time("collaborative_score_batch"):
+                collaborative_scores = collaborative.score_batch(self.store, block_ids)
+            with self.metrics.time("candidates_batch"):
+                sources = self._candidate_sources(collaborative, collaborative_scores, interacted, n)
+            with self.metrics.time("fusion_batch"):
+                fused = self.fusion.fuse(sources, n)
             
-            results.append((product_id, score, reason))
-        
-        return results
+            for user_id, recommendations in zip(block_ids, fused):
+                if not recommendations:
+                    # Return popular products for cold start
+                    if popular is None:
+                        popular = self.get_popular_products(n)
+                    recommendations = popular
+                yield user_id, recommendations
+    
+    def get_precomputed_recommendations(
+        self,
+        user_id: int,
+        n: int = 5,
+        interactions: Optional[List[models.UserInteraction]] = None
+    ) -> Optional[List[Tuple[int, float, str]]]:
+        """Serve materialized recommendations if they are still fresh.
+
+        Returns None when there is no precomputed row set for the user, it is
+        older than PRECOMPUTED_MAX_AGE_HOURS, too short for n, or the user
+        has interacted since it was computed. Pass the user's already loaded
+        `interactions` to avoid querying them again.
+        """
+        with self.metrics.time("precomputed_lookup"):
+            rows = self.db.query(models.PrecomputedRecommendation).filter(
+                models.PrecomputedRecommendation.user_id == user_id
+            ).order_by(models.PrecomputedRecommendation.rank).limit(n).all()
+        
+        if len(rows) < n:
+            return None
+        
+        if interactions is not None:
+            latest_interaction = max((i.timestamp for i in interactions), default=None)
+        else:
+            latest_interaction = self.db.query(func.max(models.UserInteraction.timestamp)).filter(
+                models.UserInteraction.user_id == user_id
+            ).scalar()
+        
+        return fresh_precomputed(rows, n, latest_interaction)
     
-    def get_popular_products(self, n: int = 5) -> List[Tuple[int, float, str]]:
+    def get_popular_products(self, n: int = 5, category: Optional[str] = None) -> List[Tuple[int, float, str]]:
         """Get popular products for cold start problem"""
-        products = self.db.query(models.Product).order_by(models.Product.rating.desc()).limit(n).all()
-        return [(p.id, p.rating, "popular") for p in products]
-    
-    def get_user_behavior_summary(self, user_id: int) -> Dict:
-        """Get summary of user behavior for LLM context"""
-        interactions = self.db.query(models.UserInteraction).filter(
-            models.UserInteraction.user_id == user_id
-        ).all()
-        
-        if not interactions:
-            return {
-                "total_interactions": 0,
-                "categories": [],
-                "recent_products": [],
-                "interaction_types": {}
-            }
+        with self.metrics.time("popular"):
+            self.popularity.ensure_fitted(self.db)
+            recommendations = [(pid, score, "popular") for pid, score in self.popularity.top(n, category)]
+            if len(recommendations) >= n:
+                return recommendations
+            
+            # Not enough recent engagement yet: fill up with the best rated products,
+            # scored 0 so they rank below anything with engagement
+            seen = {pid for pid, _, _ in recommendations}
+            query = self.db.query(models.Product.id)
+            if category is not None:
+                query = query.filter(models.Product.category == category)
+            product_ids = query.order_by(models.Product.rating.desc()).limit(n + len(seen)).all()
+            recommendations += [(pid, 0.0, "popular") for pid, in product_ids if pid not in seen]
+            return recommendations[:n]
+    
+    def get_user_interactions(self, user_id: int) -> List[models.UserInteraction]:
+        """Load a user's interactions once so a request can share them"""
+        with self.metrics.time("user_interactions"):
+            return self.db.query(models.UserInteraction).filter(
+                models.UserInteraction.user_id == user_id
+            ).all()
+    
+    def get_products(self, product_ids: List[int]) -> Dict[int, models.Product]:
+        """Fetch products with a single IN query"""
+        if not product_ids:
+            return {}
+        with self.metrics.time("fetch_products"):
+            products = self.db.query(models.Product).filter(models.Product.id.in_(set(product_ids))).all()
+        return {p.id: p for p in products}
+    
+    def recent_product_ids(self, interactions: List[models.UserInteraction], limit: int = 5) -> List[int]:
+        """Products of the user's most recent interactions, newest first"""
+        recent = sorted(interactions, key=lambda x: x.timestamp, reverse=True)[:limit]
+        return [i.product_id for i in recent]
+    
+    def get_user_behavior_summary(
+        self,
+        user_id: int,
+        interactions: Optional[List[models.UserInteraction]] = None,
+        product_map: Optional[Dict[int, models.Product]] = None
+    ) -> Dict:
+        """Get summary of user behavior for LLM context.
+
+        `interactions` and `product_map` can be passed in when the caller has
+        already loaded them; otherwise they are queried here.
+        """
+        if interactions is None:
+            interactions = self.get_user_interactions(user_id)
         
         # Get product details
-        product_ids = [i.product_id for i in interactions]
-        products = self.db.query(models.Product).filter(models.Product.id.in_(product_ids)).all()
-        product_map = {p.id: p for p in products}
-        
-        # Analyze behavior
-        categories = {}
-        interaction_types = {}
-        recent_products = []
-        
-        for interaction in sorted(interactions, key=lambda x: x.timestamp, reverse=True)[:5]:
-            product = product_map.get(interaction.product_id)
-            if product:
-                recent_products.append(product.name)
-                categories[product.category] = categories.get(product.category, 0) + 1
-            
-            interaction_types[interaction.interaction_type] = interaction_types.get(interaction.interaction_type, 0) + 1
+        if product_map is None and interactions:
+            product_map = self.get_products(self.recent_product_ids(interactions))
         
+        return summarize_behavior(interactions, product_map)
+
+def _single_user(scores: np.ndarray, interacted: np.ndarray, product_ids: List[int]) -> Tuple[np.ndarray, sparse.csr_matrix, List[int]]:
+    """A model's one-user (scores, interacted indices, ids) as a 1-row fusion source"""
+    seen = sparse.csr_matrix(
+        (np.ones(len(interacted), dtype=np.float32), (np.zeros(len(interacted), dtype=np.int64), interacted)),
+        shape=(1, len(product_ids))
+    )
+    return np.asarray(scores, dtype=np.float32).reshape(1, -1), seen, product_ids
+
+def record_interaction(interaction: models.UserInteraction):
+    """Fold a committed interaction into the shared in-memory models"""
+    record_interactions([{
+        "user_id": interaction.user_id,
+        "product_id": interaction.product_id,
+        "interaction_type": interaction.interaction_type,
+        "rating": interaction.rating,
+        "timestamp": interaction.timestamp
+    }])
+
+def model_version() -> Tuple:
+    """Changes whenever a scoring model is rebuilt or reloaded, or the catalog changes"""
+    return (
+        CF_STRATEGY,
+        item_neighbor_index.built_version,
+        als_model.built_version,
+        content_model.version
+    )
+
+def record_interactions(rows: List[Dict]):
+    """Fold a batch of committed interaction rows into the shared in-memory models"""
+    # Keep the shared interaction matrix in sync without reloading it
+    for row in rows:
+        interaction_store.add_interaction(
+            row["user_id"],
+            row["product_id"],
+            row["interaction_type"],
+            row.get("rating")
+        )
+        popularity_model.add_interaction(
+            row["product_id"],
+            row["interaction_type"],
+            row.get("rating"),
+            row.get("timestamp")
+        )
+    # Only after the models changed, so a response computed in between is not cached
+    for user_id in {row["user_id"] for row in rows}:
+        recommendation_cache.invalidate_user(user_id)
+    if item_neighbor_index.built and item_neighbor_index.is_stale(interaction_store):
+        item_neighbor_index.rebuild_in_background(interaction_store)
+    # Changed users are folded into ALS per request; retrain only occasionally
+    if als_model.built and als_model.is_stale(interaction_store):
+        als_model.rebuild_in_background(interaction_store)
+
+def record_product(product: models.Product):
+    """Add a committed product to the cached content and popularity models"""
+    content_model.add_product(product)
+    popularity_model.add_product(product.id, product.category)
+
+def publish_models(db: Session):
+    """Rebuild the collaborative and content models from the database and publish them"""
+    interaction_store.load(db)
+    collaborative = als_model if CF_STRATEGY == "als" else item_neighbor_index
+    collaborative.build(interaction_store)
+    collaborative.save()
+    content_model.fit(db)
+    content_model.save()
+
+def fresh_precomputed(
+    rows: List[models.PrecomputedRecommendation],
+    n: int,
+    latest_interaction: Optional[datetime]
+) -> Optional[List[Tuple[int, float, str]]]:
+    """Precomputed rows as recommendations, or None if they are stale or too few"""
+    if n <= 0:
+        return []
+    if len(rows) < n:
+        return None
+    
+    computed_at = rows[0].computed_at
+    if datetime.utcnow() - computed_at > timedelta(hours=PRECOMPUTED_MAX_AGE_HOURS):
+        return None
+    
+    if latest_interaction is not None and latest_interaction >= computed_at:
+        return None
+    
+    return [(row.product_id, row.score, row.reason) for row in rows]
+
+def summarize_behavior(interactions: List[models.UserInteraction], product_map: Dict[int, models.Product]) -> Dict:
+    """Behavior summary from already loaded interactions and products"""
+    if not interactions:
         return {
-            "total_interactions": len(interactions),
-            "categories": sorted(categories.items(), key=lambda x: x[1], reverse=True),
-            "recent_products": recent_products,
-            "interaction_types": interaction_types
+            "total_interactions": 0,
+            "categories": [],
+            "recent_products": [],
+            "interaction_types": {}
         }
+    
+    # Analyze behavior
+    categories = {}
+    interaction_types = {}
+    recent_products = []
+    
+    for interaction in sorted(interactions, key=lambda x: x.timestamp, reverse=True)[:5]:
+        product = product_map.get(interaction.product_id)
+        if product:
+            recent_products.append(product.name)
+            categories[product.category] = categories.get(product.category, 0) + 1
+        
+        interaction_types[interaction.interaction_type] = interaction_types.get(interaction.interaction_type, 0) + 1
+    
+    return {
+        "total_interactions": len(interactions),
+        "categories": sorted(categories.items(), key=lambda x: x[1], reverse=True),
+        "recent_products": recent_products,
+        "interaction_types": interaction_types
+    }
@@ -0,0 +1,154 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+from dotenv import load_dotenv
+from fastapi import Response
+from pydantic import TypeAdapter
+import schemas
+
+load_dotenv()
+
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))  # 0 disables
+# Bounds drift from things that don't bump the model version, e.g. other
+# users' events moving popularity fill-ins or a new precomputed batch
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "300"))
+
+# Per-entry bookkeeping (key tuple, OrderedDict node, index set) on top of the body
+_ENTRY_OVERHEAD = 200
+_EPOCH_SLOTS = 4096
+
+class RecommendationCache:
+    """LRU cache of serialized recommendation responses, capped by bytes.
+
+    Entries are keyed on (user_id, num_recommendations, model version), so a
+    rebuilt or reloaded model or a catalog change misses naturally.
+    `invalidate_user` drops every entry of a user as soon as one of their
+    interactions is recorded. A response computed while an invalidation
+    happened is not stored: callers take a `ticket` before computing and
+    pass it to `put`.
+    """
+
+    def __init__(self, max_bytes: int = RESPONSE_CACHE_MAX_BYTES, ttl_seconds: float = RESPONSE_CACHE_TTL):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple, Tuple[bytes, float]]" = OrderedDict()
+        self._user_keys: Dict[int, Set[Tuple]] = {}
+        # Invalidation counters per user slot; a ticket is the counter seen
+        # before computing. Users sharing a slot only cost a skipped put.
+        self._epochs = [0] * _EPOCH_SLOTS
+        self._lock = threading.Lock()
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, user_id: int, num_recommendations: int, model_version: Hashable) -> Optional[bytes]:
+        if not self.enabled:
+            return None
+        key = (user_id, num_recommendations, model_version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                body, created_at = entry
+                if time.time() - created_at < self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return body
+                self._remove(key)
+            self.misses += 1
+            return None
+
+    def ticket(self, user_id: int) -> int:
+        with self._lock:
+            return self._epochs[user_id % _EPOCH_SLOTS]
+
+    def put(self, user_id: int, num_recommendations: int, model_version: Hashable, body: bytes, ticket: int):
+        """Store a response unless the user was invalidated since `ticket`"""
+        size = len(body) + _ENTRY_OVERHEAD
+        if not self.enabled or size > self.max_bytes:
+            return
+        key = (user_id, num_recommendations, model_version)
+        with self._lock:
+            if self._epochs[user_id % _EPOCH_SLOTS] != ticket:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (body, time.time())
+            self._user_keys.setdefault(user_id, set()).add(key)
+            self.bytes_used += size
+            while self.bytes_used > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key: Tuple):
+        body, _ = self._entries.pop(key)
+        self.bytes_used -= len(body) + _ENTRY_OVERHEAD
+        keys = self._user_keys.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._user_keys[key[0]]
+
+    def invalidate_user(self, user_id: int):
+        """Drop a user's cached responses and any response being computed for them"""
+        with self._lock:
+            self._epochs[user_id % _EPOCH_SLOTS] += 1
+            for key in list(self._user_keys.get(user_id, ())):
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._user_keys.clear()
+            self.bytes_used = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes_used": self.bytes_used,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "ttl_seconds": self.ttl_seconds
+            }
+
+# Shared by every request handled by this process
+recommendation_cache = RecommendationCache()
+
+_recommendation_list = TypeAdapter(List[schemas.RecommendationResponse])
+
+async def cached_recommendations(
+    user_id: int,
+    num_recommendations: int,
+    model_version: Callable[[], Hashable],
+    compute: Callable[[], Awaitable[List[schemas.RecommendationResponse]]],
+    cache: RecommendationCache = recommendation_cache
+) -> Response:
+    """Serve a cached JSON response, or compute, serialize and cache one.
+
+    Nothing is cached if a model changed while computing (e.g. the first
+    request building it), since the response may mix both versions.
+    """
+    version = model_version()
+    body = cache.get(user_id, num_recommendations, version)
+    status = "hit"
+    if body is None:
+        status = "miss"
+        ticket = cache.ticket(user_id)
+        body = _recommendation_list.dump_json(await compute())
+        if model_version() == version:
+            cache.put(user_id, num_recommendations, version, body, ticket)
+    return Response(content=body, media_type="application/json", headers={"X-Cache": status})
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional, List
+from pydantic import BaseModel, Field
+from typing import Optional, List, Literal
 from datetime import datetime
 
 class ProductBase(BaseModel):
@@ -57,4 +57,33 @@ class RecommendationResponse(BaseModel):
 
 class RecommendationRequest(BaseModel):
     user_id: int
-    num_recommendations: Optional[int] = 5
+    num_recommendations: int = Field(5, ge=1)
+
+class BatchRecommendationRequest(BaseModel):
+    user_ids: List[int]
+    num_recommendations: int = Field(5, ge=1)
+
+class ScoredProduct(BaseModel):
+    product_id: int
+    score: float
+    reason: str
+
+class BatchRecommendationResult(BaseModel):
+    user_id: int
+    recommendations: List[ScoredProduct]
+
+class StreamedRecommendation(BaseModel):
+    type: Literal["recommendation"] = "recommendation"
+    index: int
+    product: Product
+    score: float
+
+class StreamedExplanation(BaseModel):
+    type: Literal["explanation"] = "explanation"
+    index: int
+    product_id: int
+    explanation: str
+
+class IngestResult(BaseModel):
+    accepted: int
+    buffered: bool
@@ -0,0 +1,49 @@
+import os
+import sys
+import tempfile
+
+# Point the app at a throwaway database and model directory before any
+# backend module reads its configuration
+_tmp = tempfile.mkdtemp(prefix="recommender-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'test.db')}"
+os.environ["MODEL_DIR"] = os.path.join(_tmp, "model_artifacts")
+os.environ["ARTIFACT_POLL_SECONDS"] = "0"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+@pytest.fixture
+def db():
+    """Session on freshly created, empty tables"""
+    from database import Base, SessionLocal, engine
+    import models  # noqa: F401  (registers tables on Base)
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture
+def fresh_models(monkeypatch, tmp_path):
+    """Point the recommender at new, empty models and an empty response cache"""
+    import recommender
+    from als_model import ALSModel
+    from content_model import ContentModel
+    from interaction_store import InteractionStore
+    from neighbor_index import ItemNeighborIndex
+    from popularity_model import PopularityModel
+    from response_cache import recommendation_cache
+
+    model_dir = str(tmp_path / "model_artifacts")
+    monkeypatch.setattr(recommender, "interaction_store", InteractionStore())
+    monkeypatch.setattr(recommender, "item_neighbor_index", ItemNeighborIndex(model_dir=model_dir))
+    monkeypatch.setattr(recommender, "als_model", ALSModel(model_dir=model_dir))
+    monkeypatch.setattr(recommender, "content_model", ContentModel(model_dir=model_dir, publish_delay=0))
+    monkeypatch.setattr(recommender, "popularity_model", PopularityModel())
+    recommendation_cache.clear()
+    yield recommender
+    recommendation_cache.clear()
@@ -0,0 +1,45 @@
+import numpy as np
+import models
+from als_model import ALSModel
+from interaction_store import InteractionStore
+
+def stored_scores(model, user_id):
+    return np.asarray(model.item_factors @ model.user_factors[model.user_index[user_id]]).ravel()
+
+def test_published_factors_skip_users_with_newer_interactions(db, tmp_path):
+    db.add_all(
+        models.Product(id=pid, name=f"Product {pid}", description="", category="c", price=1.0, image_url="", rating=0.0, tags="")
+        for pid in range(1, 9)
+    )
+    db.add_all(models.User(id=uid, username=f"user{uid}", email=f"user{uid}@example.com") for uid in (1, 2, 3))
+    db.add_all(
+        models.UserInteraction(user_id=uid, product_id=pid, interaction_type="purchase")
+        for uid, pids in {1: (1, 2, 3), 2: (2, 3, 4), 3: (5, 6)}.items() for pid in pids
+    )
+    db.commit()
+
+    trainer_store = InteractionStore()
+    trainer_store.load(db)
+    trainer = ALSModel(factors=4, iterations=3, threads=1, model_dir=str(tmp_path))
+    trainer.build(trainer_store)
+    trainer.save()
+
+    # Committed after training, then loaded from the table by a worker
+    db.add(models.UserInteraction(user_id=1, product_id=7, interaction_type="purchase"))
+    db.commit()
+    worker_store = InteractionStore()
+    worker_store.load(db)
+    worker = ALSModel(factors=4, model_dir=str(tmp_path))
+    assert worker.load()
+
+    # User 2 is unchanged and keeps the trained factors; user 1 is folded in
+    assert np.allclose(worker.score(worker_store, 2)[0], stored_scores(worker, 2))
+    scores = worker.score(worker_store, 1)[0]
+    assert not np.allclose(scores, stored_scores(worker, 1))
+    columns, weights = worker._history(worker_store, 1, worker.product_index)
+    folded = worker._fold_in(worker.item_factors, worker._gram, columns, weights)
+    assert np.allclose(scores, np.asarray(worker.item_factors @ folded.astype(np.float32)).ravel(), atol=1e-5)
+
+    # Events recorded in the worker after its load are folded in as well
+    worker_store.add_interaction(2, 8, "purchase")
+    assert not np.allclose(worker.score(worker_store, 2)[0], stored_scores(worker, 2))
@@ -0,0 +1,34 @@
+import pandas as pd
+from fastapi.testclient import TestClient
+import schemas
+from bulk_import import DEFAULTS, TABLES, import_frames, import_rows
+from database import engine
+from main import app
+
+SCHEMAS = {"products": schemas.ProductCreate, "users": schemas.UserCreate, "interactions": schemas.UserInteractionCreate}
+
+def test_schema_fields_are_required_or_defaulted():
+    for name, schema in SCHEMAS.items():
+        required = TABLES[name][1]
+        for field, info in schema.model_fields.items():
+            if info.is_required():
+                assert field in required or (name, field) in DEFAULTS, f"{name}.{field}"
+
+def test_minimal_rows_are_served(db, fresh_models):
+    import_rows("products", [{"id": pid, "name": f"Product {pid}", "price": 5.0} for pid in range(1, 13)], engine)
+    import_rows("users", [{"id": 1, "username": "user1", "email": "user1@example.com"}], engine)
+    import_rows("interactions", [{"user_id": 1, "product_id": pid, "interaction_type": "view"} for pid in (1, 2, 3)], engine)
+
+    client = TestClient(app)
+    assert client.get("/products/12").status_code == 200
+    response = client.get("/products", params={"after_id": 10})
+    assert response.status_code == 200
+    assert [product["id"] for product in response.json()] == [11, 12]
+    response = client.get("/recommendations/1")
+    assert response.status_code == 200
+    assert response.json()
+
+def test_rows_missing_required_values_are_skipped(db):
+    frame = pd.DataFrame({"name": ["Priced", "Unpriced", None], "price": [1.0, None, 2.0]})
+    stats = import_frames("products", [frame], engine)
+    assert (stats["rows"], stats["skipped"]) == (1, 2)
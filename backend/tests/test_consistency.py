@@ -0,0 +1,100 @@
+import random
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+import models
+import recommender
+from als_model import ALSModel
+from consistency import compare_popularity, compare_stores
+from content_model import ContentModel
+from interaction_store import InteractionStore
+from neighbor_index import ItemNeighborIndex
+from popularity_model import PopularityModel
+
+INTERACTION_TYPES = ["view", "click", "cart", "wishlist", "purchase"]
+
+def interaction_rows(rng, count, user_ids, product_ids, start):
+    return [
+        {
+            "user_id": rng.choice(user_ids),
+            "product_id": rng.choice(product_ids),
+            "interaction_type": rng.choice(INTERACTION_TYPES),
+            "rating": rng.choice([None, 3.0, 4.5]),
+            "timestamp": start + timedelta(minutes=i)
+        }
+        for i in range(count)
+    ]
+
+def user_weights(store, user_id):
+    row = store.user_row(user_id)
+    return {store.product_ids[col]: weight for col, weight in zip(row.indices.tolist(), row.data.tolist())}
+
+@pytest.fixture
+def snapshot(db):
+    """A catalog and interaction history loaded into an incremental store"""
+    rng = random.Random(0)
+    db.add_all(
+        models.Product(id=pid, name=f"Product {pid}", description=f"about {pid % 7}", category=f"c{pid % 4}",
+                       price=10.0, image_url="", rating=4.0, tags=f"tag{pid % 5},tag{pid % 3}")
+        for pid in range(1, 41)
+    )
+    db.add_all(
+        models.User(id=uid, username=f"user{uid}", email=f"user{uid}@example.com", preferences="")
+        for uid in range(1, 16)
+    )
+    # Users 13-15 and products 31-40 only appear in the incremental events
+    start = datetime(2025, 1, 1)
+    db.add_all(models.UserInteraction(**row) for row in interaction_rows(rng, 200, range(1, 13), range(1, 31), start))
+    db.commit()
+    return rng
+
+@pytest.mark.parametrize("compact_every", [10_000, 7])
+def test_incremental_state_matches_rebuild(db, snapshot, monkeypatch, compact_every):
+    rng = snapshot
+    store = InteractionStore(compact_every=compact_every)
+    store.load(db)
+    popularity = PopularityModel()
+    popularity.fit(db)
+
+    # record_interactions updates the module's shared models; point it at
+    # these (and at unbuilt CF models so no background rebuild starts)
+    monkeypatch.setattr(recommender, "interaction_store", store)
+    monkeypatch.setattr(recommender, "popularity_model", popularity)
+    monkeypatch.setattr(recommender, "item_neighbor_index", ItemNeighborIndex())
+    monkeypatch.setattr(recommender, "als_model", ALSModel())
+
+    rows = interaction_rows(rng, 120, range(1, 16), range(1, 41), datetime(2025, 2, 1))
+    db.add_all(models.UserInteraction(**row) for row in rows)
+    db.commit()
+    for start in range(0, len(rows), 10):
+        recommender.record_interactions(rows[start:start + 10])
+        # Read rows between batches so merged deltas are exercised too
+        store.user_row(rows[start]["user_id"])
+
+    # With a small compact_every the deltas were folded into the CSR matrix along the way
+    assert store._pending_count == (len(rows) % compact_every if compact_every < len(rows) else len(rows))
+
+    rebuilt = InteractionStore()
+    rebuilt.load(db)
+
+    user_ids = sorted(rebuilt.user_ids)
+    assert sorted(store.user_ids) == user_ids
+    for user_id in user_ids:
+        incremental_weights = user_weights(store, user_id)
+        rebuilt_weights = user_weights(rebuilt, user_id)
+        assert incremental_weights.keys() == rebuilt_weights.keys()
+        for product_id, weight in rebuilt_weights.items():
+            assert incremental_weights[product_id] == pytest.approx(weight, abs=1e-4)
+    assert compare_stores(store, rebuilt)["consistent"]
+
+    rebuilt_popularity = PopularityModel()
+    rebuilt_popularity.fit(db)
+    assert compare_popularity(popularity, rebuilt_popularity)["consistent"]
+
+    # Content profiles built from either store's history score the catalog identically
+    content = ContentModel()
+    content.fit(db)
+    for user_id in user_ids:
+        incremental_scores, _, _ = content.user_scores(store.user_product_ids(user_id))
+        rebuilt_scores, _, _ = content.user_scores(rebuilt.user_product_ids(user_id))
+        np.testing.assert_allclose(incremental_scores, rebuilt_scores, rtol=1e-5, atol=1e-6)
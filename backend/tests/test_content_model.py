@@ -0,0 +1,32 @@
+import models
+from content_model import ContentModel
+
+def add_products(db, ids):
+    products = [
+        models.Product(id=pid, name=f"Product {pid}", description=f"about {pid % 4}", category=f"c{pid % 3}",
+                       price=10.0, image_url="", rating=4.0, tags=f"tag{pid % 5}")
+        for pid in ids
+    ]
+    db.add_all(products)
+    db.commit()
+    return products
+
+def test_load_catches_up_with_unpublished_products(db, tmp_path):
+    add_products(db, range(1, 11))
+    model = ContentModel(model_dir=str(tmp_path), publish_delay=3600)
+    model.fit(db)
+    model.save()
+
+    # Held in memory only; the process then dies before the publish timer fires
+    for product in add_products(db, [11, 12]):
+        model.add_product(product)
+    model._publish_timer.cancel()
+
+    restarted = ContentModel(model_dir=str(tmp_path), publish_delay=0)
+    assert restarted.load(db)
+    assert sorted(restarted.product_ids) == list(range(1, 13))
+
+    # Published again, so a load without a session has them too
+    reloaded = ContentModel(model_dir=str(tmp_path))
+    assert reloaded.load()
+    assert sorted(reloaded.product_ids) == list(range(1, 13))
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+from scipy import sparse
+from fusion import ScoreFusion
+
+PRODUCT_IDS = [1, 2, 3, 4, 5]
+WEIGHTS = {"collaborative": 0.6, "content": 0.4}
+
+def sources(seen_products=()):
+    """One user: product 3 has no signal, product 5 only the weakest content score"""
+    collaborative = np.array([[4.0, 3.0, 0.0, 1.0, 0.0]], dtype=np.float32)
+    content = np.array([[0.1, 0.5, 0.0, 0.3, 0.05]], dtype=np.float32)
+    seen = sparse.csr_matrix(
+        ([1.0] * len(seen_products), ([0] * len(seen_products), [PRODUCT_IDS.index(pid) for pid in seen_products])),
+        shape=(1, len(PRODUCT_IDS))
+    )
+    return {
+        "collaborative": (collaborative, seen, PRODUCT_IDS),
+        "content": (content, seen, PRODUCT_IDS)
+    }
+
+def ids_and_scores(results):
+    return [pid for pid, _, _ in results[0]], [score for _, score, _ in results[0]]
+
+def test_minmax_drops_products_that_fuse_to_zero():
+    ids, scores = ids_and_scores(ScoreFusion(WEIGHTS, normalization="minmax").fuse(sources(), 5))
+
+    # Product 5 is content's weakest candidate and min-max maps it to 0
+    assert ids == [2, 1, 4]
+    assert scores == pytest.approx([0.6 * 2 / 3 + 0.4, 0.6 + 0.4 * 0.05 / 0.45, 0.4 * 0.25 / 0.45], rel=1e-5)
+
+def test_minmax_excludes_interacted_products():
+    ids, scores = ids_and_scores(ScoreFusion(WEIGHTS, normalization="minmax").fuse(sources(seen_products=[2]), 5))
+
+    assert 2 not in ids
+    assert all(score > 0 for score in scores)
+
+def test_rank_scores_only_each_sources_top_candidates():
+    fusion = ScoreFusion(WEIGHTS, normalization="rank", candidates=2)
+    ids, scores = ids_and_scores(fusion.fuse(sources(), 5))
+
+    # Collaborative ranks 1, 2; content ranks 2, 4; product 5 is in neither top 2
+    assert ids == [2, 1, 4]
+    assert scores == pytest.approx([0.6 * 0.5 + 0.4, 0.6, 0.4 * 0.5])
+
+def test_rrf_sums_weighted_reciprocal_ranks():
+    ids, scores = ids_and_scores(ScoreFusion(WEIGHTS, method="rrf", rrf_k=60).fuse(sources(), 5))
+
+    # Collaborative ranks 1, 2, 4; content ranks 2, 4, 1, 5
+    assert ids == [2, 1, 4, 5]
+    assert scores == pytest.approx([0.6 / 62 + 0.4 / 61, 0.6 / 61 + 0.4 / 63, 0.6 / 63 + 0.4 / 62, 0.4 / 64], rel=1e-5)
+
+def test_rows_without_signal_come_back_empty():
+    empty = {name: (np.zeros_like(scores), seen, ids) for name, (scores, seen, ids) in sources().items()}
+    for fusion in (ScoreFusion(WEIGHTS), ScoreFusion(WEIGHTS, normalization="rank"), ScoreFusion(WEIGHTS, method="rrf")):
+        assert fusion.fuse(empty, 5) == [[]]
@@ -0,0 +1,27 @@
+import models
+from recommender import ProductRecommender
+
+def test_hybrid_reranks_candidates_from_both_models(db, fresh_models):
+    # Products 1-3 share a theme; 4-6 are only linked by a co-view from user 2
+    texts = {1: "red running shoe", 2: "red running shoe laces", 3: "red running shoe insole",
+             4: "garden hose", 5: "kitchen knife", 6: "desk lamp"}
+    db.add_all(
+        models.Product(id=pid, name=text, description=text, category="c", price=1.0, image_url="", rating=0.0, tags="")
+        for pid, text in texts.items()
+    )
+    db.add_all(models.User(id=uid, username=f"user{uid}", email=f"user{uid}@example.com") for uid in (1, 2))
+    db.add_all(models.UserInteraction(user_id=1, product_id=pid, interaction_type="purchase") for pid in (1, 4))
+    db.add_all(models.UserInteraction(user_id=2, product_id=pid, interaction_type="purchase") for pid in (4, 5))
+    db.commit()
+
+    recommender = ProductRecommender(db)
+    recommendations = {pid: reason for pid, _, reason in recommender.hybrid_recommendations(1, 10)}
+    content_model = fresh_models.content_model
+
+    # Content candidates come from the ANN index, collaborative ones from the neighbor scores
+    assert content_model.ann is not None
+    assert "content" in recommendations[2]
+    assert "collaborative" in recommendations[5]
+    assert not {1, 4} & recommendations.keys()
+    batch = dict(recommender.hybrid_recommendations_batch([1], 10))
+    assert [pid for pid, _, _ in batch[1]] == list(recommendations)
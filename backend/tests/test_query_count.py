@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+import pytest
+import models
+from database import count_queries
+from interaction_store import interaction_store
+from main import score_recommendations
+
+# user id -> number of interactions
+USERS = {1: 1, 2: 20}
+
+@pytest.fixture
+def catalog(db):
+    db.add_all(
+        models.Product(id=pid, name=f"Product {pid}", description="", category=f"c{pid % 3}",
+                       price=10.0, image_url="", rating=4.0, tags=f"tag{pid % 5}")
+        for pid in range(1, 31)
+    )
+    db.add_all(
+        models.User(id=uid, username=f"user{uid}", email=f"user{uid}@example.com", preferences="")
+        for uid in USERS
+    )
+    now = datetime.utcnow()
+    for uid, count in USERS.items():
+        db.add_all(
+            models.UserInteraction(user_id=uid, product_id=pid, interaction_type="view", timestamp=now - timedelta(minutes=pid))
+            for pid in range(1, count + 1)
+        )
+    db.commit()
+    interaction_store.reset()
+
+def test_recommendation_query_count_is_constant(db, catalog):
+    # The first request loads and fits the shared models
+    score_recommendations(1, 5, db)
+
+    # Called directly: the counter's ContextVar does not reach the app thread under TestClient
+    counts = {}
+    for user_id in USERS:
+        with count_queries() as counter:
+            scored, _ = score_recommendations(user_id, 5, db)
+        assert scored
+        counts[user_id] = counter.count
+
+    assert counts == {user_id: 4 for user_id in USERS}
@@ -0,0 +1,18 @@
+import numpy as np
+from ranking import top_k
+
+def test_block_rows_rank_like_single_rows():
+    rng = np.random.default_rng(0)
+    # Rounded so rows contain ties
+    block = np.round(rng.random((5, 40)), 1)
+    for k in (1, 7, 40, 50):
+        top = top_k(block, k)
+        assert top.shape == (5, min(k, 40))
+        for row in range(5):
+            assert top[row].tolist() == top_k(block[row], k).tolist()
+
+def test_exclude_and_min_score():
+    scores = np.array([0.5, 0.0, 0.9, 0.7, -1.0])
+    assert top_k(scores, 3, exclude=[2]).tolist() == [3, 0, 1]
+    assert top_k(scores, 5, min_score=0).tolist() == [2, 3, 0]
+    assert top_k(np.zeros((2, 0)), 3).shape == (2, 0)
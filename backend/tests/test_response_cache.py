@@ -0,0 +1,28 @@
+from fastapi.testclient import TestClient
+import models
+from main import app
+from response_cache import recommendation_cache
+
+def test_new_product_invalidates_cached_recommendations(db, fresh_models):
+    db.add_all(
+        models.Product(id=pid, name=f"Product {pid}", description=f"about {pid % 4}", category=f"c{pid % 3}",
+                       price=10.0, image_url="", rating=4.0, tags=f"tag{pid % 5}")
+        for pid in range(1, 11)
+    )
+    db.add(models.User(id=1, username="user1", email="user1@example.com", preferences=""))
+    db.add_all(models.UserInteraction(user_id=1, product_id=pid, interaction_type="view") for pid in (1, 2))
+    db.commit()
+
+    client = TestClient(app)
+    # The first request builds the models, which changes the version it would be cached under
+    for _ in range(3):
+        assert client.get("/recommendations/1").status_code == 200
+    hits = recommendation_cache.stats()["hits"]
+    assert hits == 1
+
+    product = {"name": "New", "description": "about 1", "category": "c1", "price": 5.0, "image_url": ""}
+    assert client.post("/products", json=product).status_code == 200
+    misses = recommendation_cache.stats()["misses"]
+    assert client.get("/recommendations/1").status_code == 200
+    stats = recommendation_cache.stats()
+    assert (stats["hits"], stats["misses"]) == (hits, misses + 1)